@@ -1,16 +1,241 @@
 # app.py - Main Streamlit Application
+import os
+import time
+
 import streamlit as st
 import pandas as pd
 
 # Import modular components
 from styles import get_css_styles
 from cash_flow_calculator import CashFlowCalculator
+from cash_flow_result import CashFlowResult
 from chart_generator import ChartGenerator
 from ui_components import UIComponents
+from monte_carlo import MonteCarloSimulator
+from performance_monitor import PerformanceMonitor
+from sensitivity_analysis import SensitivityAnalyzer
+from scenario_comparison import ScenarioComparator
+from result_cache import ResultCache
+from scenario_store import ScenarioStore
+
+
+@st.cache_resource
+def obtener_cache_compartida() -> ResultCache:
+    """
+    Result cache shared by every Streamlit session of this server process
+    """
+    return ResultCache()
+
+
+def obtener_cache() -> ResultCache:
+    """
+    Shared result cache, or a per-session one when STREAMLINE_CACHE_COMPARTIDA=0
+    """
+    if os.environ.get("STREAMLINE_CACHE_COMPARTIDA", "1") != "0":
+        return obtener_cache_compartida()
+    if 'cache_resultados' not in st.session_state:
+        st.session_state.cache_resultados = ResultCache()
+    return st.session_state.cache_resultados
+
+
+@st.cache_resource
+def obtener_cache_exportaciones() -> ResultCache:
+    """
+    Generated download files, keyed on (result hash, format)
+    """
+    return ResultCache(max_entradas=32)
+
+
+@st.cache_resource
+def obtener_cache_graficos() -> ResultCache:
+    """
+    Built chart figures, keyed on (result hash, chart, chart options)
+    """
+    return ResultCache(max_entradas=32)
+
+
+# Points per chart line (ChartGenerator.reducir_puntos); 0 draws every month
+MAX_PUNTOS_GRAFICO = int(os.environ.get("STREAMLINE_MAX_PUNTOS_GRAFICO", ChartGenerator.MAX_PUNTOS)) or None
+
+
+@st.cache_resource
+def obtener_store() -> ScenarioStore:
+    """
+    On-disk scenario store shared by every session
+    """
+    return ScenarioStore()
+
+
+# Seconds the sidebar inputs must stay unchanged before auto recalculation applies them
+DEBOUNCE_SEGUNDOS = float(os.environ.get("STREAMLINE_DEBOUNCE_SEGUNDOS", 0.8))
+
+
+def parametros_escenario(inputs):
+    """
+    Calculator inputs of the sidebar inputs
+    """
+    parametros = {nombre: inputs[nombre] for nombre in CashFlowCalculator.PARAMETROS_ESCENARIO}
+    if inputs.get('etapas') is not None:
+        parametros['etapas'] = inputs['etapas']
+    return parametros
+
+
+def calcular_flujo_caja(inputs):
+    """
+    Calculator inputs, cash flow (CashFlowResult) and financial metrics for the sidebar inputs,
+    memoized on the inputs
+
+    The sales schedule is memoized on its own inputs as well, so editing only monetary
+    inputs (price, costs, commission, down payment, TEA) just revalues the cached schedule.
+    """
+    parametros = parametros_escenario(inputs)
+    cache = obtener_cache()
+
+    def calcular():
+        with PerformanceMonitor.span("calculo"):
+            programa = cache.obtener_o_calcular(
+                cache.clave(parametros, campos=CashFlowCalculator.PARAMETROS_PROGRAMA, etapa="programa"),
+                lambda: CashFlowCalculator.calcular_programa(
+                    **{nombre: parametros[nombre] for nombre in CashFlowCalculator.PARAMETROS_PROGRAMA},
+                    etapas=parametros.get('etapas')
+                )
+            )
+            flujo = CashFlowCalculator.valorizar_programa(
+                programa, **{nombre: parametros[nombre] for nombre in CashFlowCalculator.PARAMETROS_VALORIZACION}
+            )
+        with PerformanceMonitor.span("metricas"):
+            metricas = CashFlowCalculator.calcular_metricas(flujo)
+        return flujo, metricas
+
+    return (parametros, *cache.obtener_o_calcular(cache.clave(parametros, motor="vectorizado"), calcular))
+
+
+def calcular_sensibilidad(parametros, variacion):
+    """
+    Tornado tables of every sensitivity metric shown, memoized on the inputs and the step
+    """
+    cache = obtener_cache()
+    # The percentage is folded into the derived down payment by the key but moved on its own here
+    clave = cache.clave(parametros, sensibilidad=variacion,
+                        porcentaje_down_payment=parametros.get('porcentaje_down_payment'))
+    return cache.obtener_o_calcular(clave, lambda: SensitivityAnalyzer.tornado(
+        parametros, variacion, metricas=list(UIComponents.METRICAS_SENSIBILIDAD)
+    ))
+
+
+def recalculo_pendiente(clave_entradas):
+    """
+    Whether auto recalculation should apply the sidebar inputs on this run
+
+    Inputs apply once they have stayed unchanged for DEBOUNCE_SEGUNDOS. Until then
+    nothing is recomputed and esperar_recalculo reruns the app when the pause ends,
+    so a burst of edits costs one recalculation.
+    """
+    if clave_entradas == st.session_state.get('clave_entradas'):
+        return False
+    ahora = time.monotonic()
+    if clave_entradas != st.session_state.get('clave_pendiente'):
+        st.session_state.clave_pendiente, st.session_state.cambio_pendiente = clave_entradas, ahora
+    if ahora - st.session_state.cambio_pendiente >= DEBOUNCE_SEGUNDOS:
+        return True
+    esperar_recalculo(clave_entradas)
+    return False
+
+
+@st.fragment(run_every=DEBOUNCE_SEGUNDOS or None)
+def esperar_recalculo(clave_entradas):
+    """
+    Pending-changes notice that reruns the app once the inputs stop changing
+    """
+    st.caption("⏳ Cambios pendientes: se aplican al dejar de editar")
+    if (clave_entradas == st.session_state.get('clave_pendiente')
+            and time.monotonic() - st.session_state.cambio_pendiente >= DEBOUNCE_SEGUNDOS):
+        st.rerun()
+
+
+# Main-area sections with widgets are fragments: their widgets rerun only the
+# section, with the inputs it was last given by a full run of the app. A
+# fragment rerun is recorded as its own rerun in the performance panel.
+
+@st.fragment
+def seccion_tabla(flujo):
+    """
+    Data table with its filters and pages
+    """
+    with PerformanceMonitor.rerun("tabla", st.session_state.rendimiento):
+        UIComponents.render_data_table(flujo)
+
+
+@st.fragment
+def seccion_sensibilidad(parametros, clave_resultado):
+    """
+    Sensitivity (tornado) analysis of the scenario shown
+    """
+    with PerformanceMonitor.rerun("sensibilidad", st.session_state.rendimiento):
+        configuracion_sensibilidad = UIComponents.render_sensitivity_controls()
+        metrica_sensibilidad = configuracion_sensibilidad['metrica']
+        tornado = calcular_sensibilidad(parametros, configuracion_sensibilidad['variacion'])[metrica_sensibilidad]
+        st.plotly_chart(obtener_cache_graficos().obtener_o_calcular(
+            (clave_resultado, "tornado", configuracion_sensibilidad['variacion'], metrica_sensibilidad,
+             parametros.get('porcentaje_down_payment')),
+            lambda: ChartGenerator.create_tornado_chart(tornado, *UIComponents.METRICAS_SENSIBILIDAD[metrica_sensibilidad])
+        ), use_container_width=True)
+        UIComponents.render_sensitivity_table(tornado, metrica_sensibilidad)
+
+
+@st.fragment
+def seccion_monte_carlo(inputs):
+    """
+    Monte Carlo simulation of the sidebar inputs
+    """
+    with PerformanceMonitor.rerun("monte_carlo", st.session_state.rendimiento):
+        configuracion_monte_carlo = UIComponents.render_monte_carlo_controls()
+        if configuracion_monte_carlo is not None:
+            st.session_state.monte_carlo = MonteCarloSimulator.simular(inputs, **configuracion_monte_carlo)
+            # Built once per simulation, like the result charts
+            st.session_state.grafico_monte_carlo = ChartGenerator.create_monte_carlo_chart(
+                st.session_state.monte_carlo['bandas_acumulado'], MAX_PUNTOS_GRAFICO
+            )
+        if 'monte_carlo' in st.session_state:
+            UIComponents.render_monte_carlo_summary(st.session_state.monte_carlo)
+            st.plotly_chart(st.session_state.grafico_monte_carlo, use_container_width=True)
+
+
+@st.fragment
+def seccion_comparacion(parametros):
+    """
+    Scenario comparison: only the curves and metrics of each variant are kept in the session
+    """
+    with PerformanceMonitor.rerun("comparacion", st.session_state.rendimiento):
+        store = obtener_store()
+        configuracion_comparacion = UIComponents.render_comparison_controls(store.listar())
+        if configuracion_comparacion is not None:
+            try:
+                if 'guardados' in configuracion_comparacion:
+                    parametros_guardados = store.cargar_parametros(list(configuracion_comparacion['guardados'].values()))
+                    escenarios_comparacion = {etiqueta: parametros_guardados[escenario_id]
+                                              for etiqueta, escenario_id in configuracion_comparacion['guardados'].items()}
+                else:
+                    escenarios_comparacion = ScenarioComparator.grilla(parametros, configuracion_comparacion['grilla'])
+                st.session_state.comparacion = ScenarioComparator.comparar(escenarios_comparacion)
+                st.session_state.grafico_comparacion = ChartGenerator.create_comparison_chart(
+                    st.session_state.comparacion, MAX_PUNTOS_GRAFICO
+                )
+            except ValueError as error:
+                st.error(f"❌ {error}")
+        if 'comparacion' in st.session_state:
+            st.plotly_chart(st.session_state.grafico_comparacion, use_container_width=True)
+            UIComponents.render_comparison_table(st.session_state.comparacion)
+
 
 # Page configuration
 st.set_page_config(page_title="Flujo de Caja Inmobiliario", layout="wide")
 
+# Hot-path instrumentation, a no-op unless STREAMLINE_INSTRUMENTACION or STREAMLINE_PERFILES is set
+if 'rendimiento' not in st.session_state:
+    st.session_state.rendimiento = PerformanceMonitor.nuevo_historial()
+PerformanceMonitor.iniciar_rerun()
+
 # Apply custom styles with dark theme using the correct method
 st.markdown(f"<style>{get_css_styles()}</style>", unsafe_allow_html=True)
 
@@ -18,62 +243,78 @@ st.markdown(f"<style>{get_css_styles()}</style>", unsafe_allow_html=True)
 st.title("Flujo de Caja - Proyecto Inmobiliario")
 
 # Render sidebar and get input parameters
-inputs = UIComponents.render_sidebar()
-
-# Initialize session state
-if 'df' not in st.session_state:
-    st.session_state.df = CashFlowCalculator.generar_flujo_caja(
-        inputs['inversion_inicial'], 
-        inputs['gasto_construccion_mensual'], 
-        inputs['comision_por_venta'], 
-        inputs['precio_por_duplex'],
-        inputs['num_cuotas'], 
-        inputs['duplex_por_etapa'], 
-        inputs['meses_por_etapa'],
-        inputs['total_etapas'], 
-        inputs['tasa_ventas'], 
-        inputs['tea_costo_oportunidad'],
-        inputs['porcentaje_down_payment'],
-        inputs['num_cuotas_restantes'],
-        inputs['down_payment_amount'],
-        inputs['cuota_restante_mensual']
-    )
+with PerformanceMonitor.span("barra_lateral"):
+    inputs = UIComponents.render_sidebar()
+    # Filled in once the results shown are known
+    resumen_rapido = st.sidebar.container()
+clave_entradas = ResultCache.hash_parametros(parametros_escenario(inputs))
 
-# Recalculate when button is clicked
-if inputs['recalcular']:
-    st.session_state.df = CashFlowCalculator.generar_flujo_caja(
-        inputs['inversion_inicial'], 
-        inputs['gasto_construccion_mensual'], 
-        inputs['comision_por_venta'], 
-        inputs['precio_por_duplex'],
-        inputs['num_cuotas'], 
-        inputs['duplex_por_etapa'], 
-        inputs['meses_por_etapa'],
-        inputs['total_etapas'], 
-        inputs['tasa_ventas'], 
-        inputs['tea_costo_oportunidad'],
-        inputs['porcentaje_down_payment'],
-        inputs['num_cuotas_restantes'],
-        inputs['down_payment_amount'],
-        inputs['cuota_restante_mensual']
-    )
+# Initialize session state and recalculate when the inputs are applied
+if ('flujo' not in st.session_state or inputs['recalcular']
+        or (inputs['auto_recalcular'] and recalculo_pendiente(clave_entradas))):
+    st.session_state.parametros, st.session_state.flujo, st.session_state.metricas = calcular_flujo_caja(inputs)
+    st.session_state.clave_entradas = clave_entradas
 
-# Get current DataFrame
-df = st.session_state.df
+# Goal seek on the current sidebar inputs
+configuracion_objetivo = UIComponents.render_goal_seek_section()
+if configuracion_objetivo is not None:
+    st.session_state.objetivo = CashFlowCalculator.resolver_objetivo(inputs, **configuracion_objetivo)
+if 'objetivo' in st.session_state:
+    UIComponents.render_goal_seek_result(st.session_state.objetivo)
 
-# Calculate financial metrics
-metricas = CashFlowCalculator.calcular_metricas_financieras(df, inputs['tea_costo_oportunidad'])
+# Saved scenarios: loading reads the stored table instead of recomputing it
+store = obtener_store()
+acciones_escenarios = UIComponents.render_scenario_section(store.listar())
+if acciones_escenarios['cargar'] is not None:
+    parametros_guardados, tabla_guardada, st.session_state.metricas = store.cargar(acciones_escenarios['cargar'])
+    st.session_state.parametros = parametros_guardados
+    st.session_state.flujo = CashFlowResult.from_frame(tabla_guardada, parametros_guardados['tea_costo_oportunidad'])
+    # The loaded scenario stays shown until the sidebar inputs are edited
+    st.session_state.clave_entradas = clave_entradas
+if acciones_escenarios['guardar'] is not None:
+    store.guardar(acciones_escenarios['guardar'], st.session_state.parametros,
+                  st.session_state.flujo.to_frame(), st.session_state.metricas)
+    # Rerun so the scenario list above (already drawn) includes the new one
+    st.session_state.escenario_guardado = acciones_escenarios['guardar']
+    st.rerun()
+if 'escenario_guardado' in st.session_state:
+    st.sidebar.success(f"💾 Escenario guardado: {st.session_state.pop('escenario_guardado')}")
+
+# Get current cash flow and its financial metrics
+flujo = st.session_state.flujo
+metricas = st.session_state.metricas
+clave_resultado = ResultCache.hash_parametros(st.session_state.parametros)
+UIComponents.render_quick_summary(resumen_rapido, st.session_state.parametros, metricas)
 
 # Render data table
-UIComponents.render_data_table(df)
+seccion_tabla(flujo)
 
 # Render financial summary
-UIComponents.render_financial_summary(metricas, inputs['tea_costo_oportunidad'])
+UIComponents.render_financial_summary(metricas, st.session_state.parametros['tea_costo_oportunidad'])
 
-# Render chart
+# Render chart (figures are built once per result and reused on reruns)
 st.subheader("Gráfico de Flujo de Caja")
-fig = ChartGenerator.create_cash_flow_chart(df, inputs['tea_costo_oportunidad'])
-st.plotly_chart(fig, use_container_width=True)
+with PerformanceMonitor.span("grafico"):
+    fig = obtener_cache_graficos().obtener_o_calcular(
+        (clave_resultado, "flujo_caja", MAX_PUNTOS_GRAFICO),
+        lambda: ChartGenerator.create_cash_flow_chart(flujo, max_puntos=MAX_PUNTOS_GRAFICO)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+seccion_sensibilidad(st.session_state.parametros, clave_resultado)
+
+# Render download section (files are built on click and cached per result)
+UIComponents.render_download_section(flujo, clave_resultado, obtener_cache_exportaciones())
+
+seccion_monte_carlo(inputs)
+
+seccion_comparacion(st.session_state.parametros)
 
-# Render download section
-UIComponents.render_download_section(df)
\ No newline at end of file
+# Performance panel: this rerun is finished first so it is listed too
+PerformanceMonitor.terminar_rerun(st.session_state.rendimiento)
+if PerformanceMonitor.ACTIVO:
+    UIComponents.render_performance_panel(st.session_state.rendimiento, {
+        "Resultados": obtener_cache(),
+        "Gráficos": obtener_cache_graficos(),
+        "Exportaciones": obtener_cache_exportaciones(),
+    })
@@ -0,0 +1,262 @@
+# benchmarks/suite.py - Time and peak-memory benchmarks of the hot paths
+"""
+Time the calculator, the metrics, the cash flow chart and the table exports
+over a grid of project sizes and compare them with stored baselines.
+
+Every case changes one input of the base project (3 etapas of 20 dúplex,
+10-year horizon): horizon, dúplex per etapa, number of etapas, sales rate
+(fractional rates take the month-by-month schedule) and number of scenarios.
+Times are the best of several runs; peak memory is measured in a separate,
+untimed run under tracemalloc. Each time is also expressed relative to a fixed
+calibration workload timed just before it, and regressions are judged on that
+ratio, so a busy or slower machine does not read as a slower release.
+
+A benchmark over the threshold is measured a second time and only reported if
+it is still over.
+
+Usage:
+    python benchmarks/suite.py [--filtro tasa_ventas] [--repeticiones 5] [--umbral 0.25] [--guardar]
+
+Baselines live in benchmarks/baselines.json and are rewritten by --guardar;
+they are only meaningful on the machine that saved them. Exit status is 1
+when a benchmark is slower, or peaks higher, than its baseline by more than
+the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from cash_flow_calculator import CashFlowCalculator  # noqa: E402
+from chart_generator import ChartGenerator  # noqa: E402
+from table_exporter import TableExporter  # noqa: E402
+
+LINEAS_BASE = os.path.join(RAIZ, "benchmarks", "baselines.json")
+
+# Base project: 60 dúplex in 3 etapas, 10-year table, sidebar defaults otherwise
+BASE = {
+    'duplex_por_etapa': 20,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 1.0,
+    'horizonte_meses': 120,
+    'escenarios': 1,
+}
+
+# Values tried per input, one input at a time (the others stay at BASE)
+EJES = {
+    'horizonte_meses': (60, 240, 600),
+    'duplex_por_etapa': (10, 40),
+    'total_etapas': (1, 6),
+    'tasa_ventas': (0.35, 2.5),
+    'escenarios': (10, 100),
+}
+
+# Differences below these are noise, whatever the threshold
+MINIMO_MS = 0.2
+MINIMO_KIB = 64
+
+
+def parametros(duplex_por_etapa: int, meses_por_etapa: int, total_etapas: int, tasa_ventas: float,
+               horizonte_meses: int) -> Dict[str, Any]:
+    """
+    generar_flujo_caja parameters of a project, derived like the sidebar does
+    """
+    total_duplex = duplex_por_etapa * total_etapas
+    gasto_construccion_mensual = 90.4 * 1100.0 * total_duplex / (meses_por_etapa * total_etapas)
+    return {
+        'inversion_inicial': 790000.0,
+        'gasto_construccion_mensual': gasto_construccion_mensual,
+        'comision_por_venta': 2000.0,
+        'precio_por_duplex': 140000.0,
+        'num_cuotas': 10,
+        'duplex_por_etapa': duplex_por_etapa,
+        'meses_por_etapa': meses_por_etapa,
+        'total_etapas': total_etapas,
+        'tasa_ventas': tasa_ventas,
+        'tea_costo_oportunidad': 0.0512,
+        'porcentaje_down_payment': 40.0,
+        'num_cuotas_restantes': 10,
+        'down_payment_amount': 56000.0,
+        'cuota_restante_mensual': 8400.0,
+        'horizonte_meses': horizonte_meses,
+    }
+
+
+def casos() -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Benchmark cases: the base project, then one per value of each axis
+    """
+    yield "base", dict(BASE)
+    for eje, valores in EJES.items():
+        for valor in valores:
+            yield f"{eje}={valor:g}", {**BASE, eje: valor}
+
+
+def benchmarks(caso: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    """
+    Functions to time for a case, with their inputs already built
+    """
+    escenarios = caso['escenarios']
+    p = parametros(**{nombre: valor for nombre, valor in caso.items() if nombre != 'escenarios'})
+    if escenarios > 1:
+        # A price sweep, valued both one table at a time and in one batch
+        precios = np.linspace(120000.0, 160000.0, escenarios)
+        variantes = [{**p, 'precio_por_duplex': precio, 'down_payment_amount': 0.0, 'cuota_restante_mensual': 0.0}
+                     for precio in precios]
+        tabla = pd.DataFrame(variantes)
+        return {
+            'generar_flujo_caja[vectorizado]': lambda: [
+                CashFlowCalculator.generar_flujo_caja(**variante, motor="vectorizado") for variante in variantes
+            ],
+            'evaluate_batch': lambda: CashFlowCalculator.evaluate_batch(tabla),
+        }
+
+    df = CashFlowCalculator.generar_flujo_caja(**p, motor="vectorizado")
+    flujo = CashFlowCalculator.valorizar_programa(
+        CashFlowCalculator.calcular_programa(
+            *(p[nombre] for nombre in CashFlowCalculator.PARAMETROS_PROGRAMA)
+        ),
+        **{nombre: p[nombre] for nombre in CashFlowCalculator.PARAMETROS_VALORIZACION}
+    )
+    funciones = {
+        'generar_flujo_caja[referencia]': lambda: CashFlowCalculator.generar_flujo_caja(**p),
+        'generar_flujo_caja[vectorizado]': lambda: CashFlowCalculator.generar_flujo_caja(**p, motor="vectorizado"),
+        'calcular_metricas_financieras': lambda: CashFlowCalculator.calcular_metricas_financieras(
+            df, p['tea_costo_oportunidad']),
+        'create_cash_flow_chart': lambda: ChartGenerator.create_cash_flow_chart(flujo),
+    }
+    # As render_download_section builds each file
+    for formato in ("csv", "xlsx"):
+        if TableExporter.formato_disponible(formato):
+            funciones[f'exportar[{formato}]'] = lambda formato=formato: TableExporter.exportar(flujo.to_frame(), formato)
+    return funciones
+
+
+def calibrar(repeticiones: int = 5) -> float:
+    """
+    Best time in ms of a fixed pure-Python and NumPy workload, the unit of the relative times
+    """
+    valores = np.arange(20000, dtype=np.float64)
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        sum(i * i for i in range(20000))
+        np.cumsum(np.sqrt(valores))
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def medir(funcion: Callable[[], Any], repeticiones: int, tiempo_minimo: float = 0.25) -> Dict[str, float]:
+    """
+    Best time and peak traced memory of a function
+
+    Args:
+        funcion: Function to measure
+        repeticiones: Minimum timed runs (after one warm-up run)
+        tiempo_minimo: Fast functions keep running until this many seconds are spent
+
+    Returns:
+        Dict with 'ms' (best run), 'relativo' (ms over the calibration time) and
+        'kib' (peak allocated during one run)
+    """
+    funcion()
+    calibracion = calibrar()
+    mejor, total, ejecuciones = float("inf"), 0.0, 0
+    while ejecuciones < repeticiones or total < tiempo_minimo:
+        inicio = time.perf_counter()
+        funcion()
+        duracion = time.perf_counter() - inicio
+        mejor, total, ejecuciones = min(mejor, duracion), total + duracion, ejecuciones + 1
+
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'ms': mejor * 1000, 'relativo': mejor * 1000 / calibracion, 'kib': pico / 1024}
+
+
+def regresiones(resultado: Dict[str, float], base: Dict[str, float], umbral: float) -> list:
+    """
+    Measures of a result over its baseline by more than the threshold (and the noise floor)
+    """
+    excedidas = []
+    if (resultado['relativo'] > base['relativo'] * (1 + umbral)
+            and resultado['ms'] - base['ms'] > MINIMO_MS):
+        excedidas.append('ms')
+    if resultado['kib'] > base['kib'] * (1 + umbral) and resultado['kib'] - base['kib'] > MINIMO_KIB:
+        excedidas.append('kib')
+    return excedidas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de cálculo, métricas, gráficos y exportación")
+    parser.add_argument("--filtro", default="", help="Solo casos o benchmarks que contengan este texto")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones medidas por benchmark (default: 5)")
+    parser.add_argument("--umbral", type=float, default=float(os.environ.get("STREAMLINE_UMBRAL_BENCHMARK", 0.25)),
+                        help="Aumento tolerado sobre la línea base (default: 0.25 = 25%%)")
+    parser.add_argument("--guardar", action="store_true", help="Guarda los resultados como nuevas líneas base")
+    parser.add_argument("--lineas-base", default=LINEAS_BASE, help="Archivo JSON de líneas base")
+    args = parser.parse_args(argv)
+
+    lineas_base = {}
+    if os.path.exists(args.lineas_base):
+        with open(args.lineas_base, encoding="utf-8") as archivo:
+            lineas_base = json.load(archivo)
+    anteriores = lineas_base.get("resultados", {})
+
+    resultados, fallos = {}, 0
+    for nombre_caso, caso in casos():
+        for nombre, funcion in benchmarks(caso).items():
+            clave = f"{nombre_caso} {nombre}"
+            if args.filtro not in clave:
+                continue
+            resultado = medir(funcion, args.repeticiones)
+            base = anteriores.get(clave)
+            if base is not None and not args.guardar and regresiones(resultado, base, args.umbral):
+                # Confirm with a second measurement before reporting, times are noisy
+                resultado = min(resultado, medir(funcion, args.repeticiones), key=lambda r: r['relativo'])
+            resultados[clave] = {medida: round(valor, 4) for medida, valor in resultado.items()}
+            if base is None:
+                estado, detalle = "NUEVO", ""
+            else:
+                excedidas = regresiones(resultado, base, args.umbral)
+                estado = "FAIL" if excedidas else "OK  "
+                fallos += bool(excedidas)
+                detalle = f" (base {base['relativo']:.2f}x, {base['kib']:.0f} KiB)"
+            print(f"{estado} {nombre_caso:<24} {nombre:<34} {resultado['ms']:9.2f} ms {resultado['relativo']:8.2f}x "
+                  f"{resultado['kib']:7.0f} KiB{detalle}")
+
+    if args.guardar:
+        lineas_base = {
+            'entorno': {
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'maquina': platform.machine(),
+            },
+            # A filtered run only replaces the benchmarks it measured
+            'resultados': {**anteriores, **resultados},
+        }
+        with open(args.lineas_base, "w", encoding="utf-8") as archivo:
+            json.dump(lineas_base, archivo, indent=2, sort_keys=True, ensure_ascii=False)
+            archivo.write("\n")
+        print(f"Líneas base guardadas en {args.lineas_base}")
+        return 0
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,68 @@
 # cash_flow_calculator.py
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+from cash_flow_result import CashFlowResult
+from financial_metrics import FinancialMetrics
+from stage_scheduler import StageScheduler
 
 class CashFlowCalculator:
     """
     Handles all cash flow calculations for real estate projects
     """
     
+    # Available calculation engines: the month-by-month reference loop and the NumPy array engine
+    MOTORES = ("referencia", "vectorizado")
+    
+    # generar_flujo_caja parameters accepted as scenario columns by evaluate_batch
+    # (None marks a required column, anything else is the default value)
+    PARAMETROS_ESCENARIO = {
+        'inversion_inicial': None,
+        'gasto_construccion_mensual': None,
+        'comision_por_venta': None,
+        'precio_por_duplex': None,
+        'num_cuotas': None,
+        'duplex_por_etapa': None,
+        'meses_por_etapa': None,
+        'total_etapas': None,
+        'tasa_ventas': None,
+        'tea_costo_oportunidad': None,
+        'porcentaje_down_payment': 40.0,
+        'num_cuotas_restantes': 10,
+        'down_payment_amount': 0.0,
+        'cuota_restante_mensual': 0.0,
+        'horizonte_meses': 0,
+    }
+    PARAMETROS_ENTEROS = ('num_cuotas', 'duplex_por_etapa', 'meses_por_etapa', 'total_etapas', 'num_cuotas_restantes',
+                          'horizonte_meses')
+    
+    # Inputs that determine the sales schedule and the timeline (the others only value it)
+    PARAMETROS_PROGRAMA = ('duplex_por_etapa', 'meses_por_etapa', 'total_etapas', 'tasa_ventas',
+                           'num_cuotas_restantes', 'horizonte_meses')
+    # Inputs valorizar_programa takes on top of a schedule
+    PARAMETROS_VALORIZACION = ('inversion_inicial', 'gasto_construccion_mensual', 'comision_por_venta',
+                               'precio_por_duplex', 'tea_costo_oportunidad', 'porcentaje_down_payment',
+                               'down_payment_amount', 'cuota_restante_mensual')
+    
+    # Sales are never scheduled past this month, whatever the sales rate
+    MESES_MAXIMOS = 1200
+    
+    # Goal seek: inputs that can be solved for (with their default tolerance) and the
+    # metrics they can target (True when a higher value of the metric is better)
+    VARIABLES_OBJETIVO = {'precio_por_duplex': 0.01, 'tasa_ventas': 1e-4, 'porcentaje_down_payment': 1e-4}
+    METRICAS_OBJETIVO = {'ganancia_neta': True, 'mes_recuperacion': False, 'costo_oportunidad_total': False,
+                         'van': True, 'tir': True}
+    
     @staticmethod
     def generar_flujo_caja(inversion_inicial: float, gasto_construccion_mensual: float, 
                           comision_por_venta: float, precio_por_duplex: float,
                           num_cuotas: int, duplex_por_etapa: int, meses_por_etapa: int, 
                           total_etapas: int, tasa_ventas: float, tea_costo_oportunidad: float,
                           porcentaje_down_payment: float = 40.0, num_cuotas_restantes: int = 10,
-                          down_payment_amount: float = 0.0, cuota_restante_mensual: float = 0.0) -> pd.DataFrame:
+                          down_payment_amount: float = 0.0, cuota_restante_mensual: float = 0.0,
+                          horizonte_meses: int = 0, etapas: Optional[List[Dict[str, Any]]] = None,
+                          motor: str = "referencia") -> pd.DataFrame:
         """
         Generate cash flow calculations for real estate project
         
@@ -29,45 +77,47 @@ class CashFlowCalculator:
             total_etapas: Total stages
             tasa_ventas: Sales rate (duplexes per month)
             tea_costo_oportunidad: Opportunity cost rate
+            horizonte_meses: Fixed last month of the table, e.g. to align scenarios
+                (sales after it are dropped); 0 sizes the table exactly to the end
+                of construction or the last cuota of the last sale, whichever is later
+            etapas: Optional per-etapa specs (see StageScheduler.normalizar_etapas);
+                replaces duplex_por_etapa, meses_por_etapa and total_etapas and
+                requires the "vectorizado" engine
+            motor: Calculation engine, "referencia" (month-by-month loop) or
+                "vectorizado" (NumPy arrays, identical output)
             
         Returns:
             pd.DataFrame: Cash flow data
         """
+        if motor not in CashFlowCalculator.MOTORES:
+            raise ValueError(f"Motor desconocido: {motor!r}. Opciones: {', '.join(CashFlowCalculator.MOTORES)}")
+        
+        if etapas is not None and motor == "referencia":
+            raise ValueError("Las etapas personalizadas requieren motor='vectorizado'")
+        
+        if motor == "vectorizado":
+            return CashFlowCalculator.valorizar_programa(
+                CashFlowCalculator.calcular_programa(duplex_por_etapa, meses_por_etapa, total_etapas, tasa_ventas,
+                                                     num_cuotas_restantes, horizonte_meses, etapas),
+                inversion_inicial, gasto_construccion_mensual, comision_por_venta, precio_por_duplex,
+                tea_costo_oportunidad, porcentaje_down_payment, down_payment_amount, cuota_restante_mensual
+            ).to_frame()
+        
         # Calcular parámetros derivados
         total_duplex = duplex_por_etapa * total_etapas
         total_meses_construccion = meses_por_etapa * total_etapas
         
         # Calculate payment structure if not provided
-        if down_payment_amount == 0.0:
-            down_payment_amount = precio_por_duplex * (porcentaje_down_payment / 100)
-        if cuota_restante_mensual == 0.0:
-            remaining_amount = precio_por_duplex - down_payment_amount
-            cuota_restante_mensual = remaining_amount / num_cuotas_restantes if num_cuotas_restantes > 0 else 0
-        
-        # Calculate realistic timeline to ensure ALL payments are collected
-        # Estimate when the last duplex will be sold based on non-overlapping etapa sales
-        
-        # Etapa 1: starts month 1, sells 11 duplexes at 0.5/month = ~22 months to complete
-        # Etapa 2: starts max(month 16, when etapa 1 finishes), sells 11 duplexes
-        # Etapa 3: starts max(month 31, when etapa 2 finishes), sells 11 duplexes
-        
-        # Conservative estimate: account for sales rate and etapa dependencies
-        etapa_1_completion = max(1, int(duplex_por_etapa / max(tasa_ventas, 0.1)))
-        etapa_2_start = max(meses_por_etapa + 1, etapa_1_completion + 1)  # Month 16 or when etapa 1 finishes
-        etapa_2_completion = etapa_2_start + int(duplex_por_etapa / max(tasa_ventas, 0.1))
-        etapa_3_start = max(meses_por_etapa * 2 + 1, etapa_2_completion + 1)  # Month 31 or when etapa 2 finishes
-        etapa_3_completion = etapa_3_start + int(duplex_por_etapa / max(tasa_ventas, 0.1))
+        down_payment_amount, cuota_restante_mensual = CashFlowCalculator._estructura_pago(
+            precio_por_duplex, porcentaje_down_payment, num_cuotas_restantes, down_payment_amount,
+            cuota_restante_mensual
+        )
         
-        # Last sale month is when etapa 3 completes
-        estimated_last_sale_month = etapa_3_completion
-        
-        # Ensure timeline extends enough to collect ALL payments from the last sale
-        minimum_total_months = estimated_last_sale_month + num_cuotas_restantes
-        
-        # Use the larger of the original calculation or our new minimum
-        extra_meses = max(0, int(total_duplex / max(tasa_ventas, 0.1)) - total_meses_construccion)
-        original_total_meses = total_meses_construccion + num_cuotas_restantes + extra_meses
-        total_meses = max(original_total_meses, minimum_total_months)
+        # Exact timeline: construction and ALL payments are covered, with no padding
+        _, _, total_meses = CashFlowCalculator._programar_etapas(
+            duplex_por_etapa, meses_por_etapa, total_etapas, tasa_ventas, num_cuotas_restantes,
+            etapas, horizonte_meses
+        )
         tasa_mensual = (1 + tea_costo_oportunidad) ** (1/12) - 1 if tea_costo_oportunidad > 0 else 0
 
         # Crear DataFrame
@@ -97,7 +147,8 @@ class CashFlowCalculator:
         # Calcular ventas y cuotas - NON-OVERLAPPING ETAPA SALES
         duplex_vendidos_acumulados = 0
         fraccion_acumulada = 0.0  # Accumulate fractions until we have whole duplexes
-        cuotas_por_duplex = {}  # {mes_inicio: cuotas_restantes}
+        ventas_por_mes = [0] * (total_meses + 1)  # Installment cohorts: duplexes sold per sale month
+        cuotas_activas = 0
         
         # Track sales by etapa
         duplex_vendidos_por_etapa = [0] * total_etapas  # Track sold duplexes per etapa
@@ -105,10 +156,13 @@ class CashFlowCalculator:
         
         # Calculate when each etapa can start selling
         # Etapa 1: starts month 1 (construction starts)
-        # Etapa 2: starts max(month 16, month when etapa 1 is sold out)
-        # Etapa 3: starts max(month 31, month when etapa 2 is sold out)
+        # Etapa N: starts max(its construction start, month after etapa N-1 is sold out)
         etapa_inicio_venta = {}  # Will be populated as we go
         
+        # Running balances (month 0 holds the initial investment)
+        ingresos_acumulados = 0.0
+        acumulado = -inversion_inicial
+        
         for mes in range(1, total_meses + 1):
             # Asignar etapa
             if mes <= total_meses_construccion:
@@ -118,31 +172,21 @@ class CashFlowCalculator:
                 df.loc[mes, "Etapa de Construcción"] = "Post-Construcción"
 
             # Gastos de construcción
+            gasto_construccion_mes = 0.0
             if mes <= total_meses_construccion:
-                df.loc[mes, "Gastos Construcción (USD)"] = gasto_construccion_mensual
+                gasto_construccion_mes = gasto_construccion_mensual
+                df.loc[mes, "Gastos Construcción (USD)"] = gasto_construccion_mes
 
             # Determine which etapa we can sell from this month
-            # Calculate when each etapa's sales can start
-            if etapa_actual_venta == 0:
-                # Etapa 1 can start selling from month 1
-                if 1 not in etapa_inicio_venta:
-                    etapa_inicio_venta[1] = 1
-            elif etapa_actual_venta == 1:
-                # Etapa 2 can start selling when:
-                # 1. Etapa 2 construction starts (month 16) AND
-                # 2. Etapa 1 is sold out
-                etapa_2_construccion_inicio = meses_por_etapa + 1  # Month 16
-                if duplex_vendidos_por_etapa[0] >= duplex_por_etapa and mes >= etapa_2_construccion_inicio:
-                    if 2 not in etapa_inicio_venta:
-                        etapa_inicio_venta[2] = mes
-            elif etapa_actual_venta == 2:
-                # Etapa 3 can start selling when:
-                # 1. Etapa 3 construction starts (month 31) AND
-                # 2. Etapa 2 is sold out
-                etapa_3_construccion_inicio = meses_por_etapa * 2 + 1  # Month 31
-                if duplex_vendidos_por_etapa[1] >= duplex_por_etapa and mes >= etapa_3_construccion_inicio:
-                    if 3 not in etapa_inicio_venta:
-                        etapa_inicio_venta[3] = mes
+            # Etapa N can start selling when:
+            # 1. Etapa N construction starts (month (N-1) * meses_por_etapa + 1) AND
+            # 2. Etapa N-1 is sold out (etapa 1 has no previous etapa)
+            if etapa_actual_venta < total_etapas and etapa_actual_venta + 1 not in etapa_inicio_venta:
+                etapa_construccion_inicio = etapa_actual_venta * meses_por_etapa + 1
+                anterior_agotada = (etapa_actual_venta == 0 or
+                                    duplex_vendidos_por_etapa[etapa_actual_venta - 1] >= duplex_por_etapa)
+                if anterior_agotada and mes >= etapa_construccion_inicio:
+                    etapa_inicio_venta[etapa_actual_venta + 1] = mes
 
             # Ventas de dúplex - NON-OVERLAPPING ETAPA SALES
             duplex_vendidos_mes = 0
@@ -197,36 +241,16 @@ class CashFlowCalculator:
                         df.loc[mes, "Ingresos por Downpayment - Gastos Comision (USD)"] = down_payment_income - commission_expense
                         df.loc[mes, "Gastos Comisiones (USD)"] = commission_expense  # Keep for reference/tracking
                         
-                        # Generate remaining cuotas for each complete duplex sold - START NEXT MONTH
-                        for i in range(duplex_completos):
-                            duplex_id = f"{mes}_{i}"
-                            cuotas_por_duplex[duplex_id] = {
-                                'cuotas_restantes': num_cuotas_restantes,
-                                'mes_venta': mes
-                            }
+                        # Register the sale-month cohort; its cuotas START NEXT MONTH
+                        ventas_por_mes[mes] = duplex_completos
 
             # Calcular cuotas activas e ingresos restantes - START FROM NEXT MONTH AFTER SALE
-            cuotas_activas = 0
-            cuotas_por_duplex_actualizadas = {}
-            
-            for duplex_id, duplex_info in cuotas_por_duplex.items():
-                mes_venta = duplex_info['mes_venta']
-                cuotas_restantes = duplex_info['cuotas_restantes']
-                
-                # First cuota starts the month AFTER the sale
-                if mes > mes_venta and cuotas_restantes > 0:
-                    cuotas_activas += 1
-                    cuotas_restantes -= 1
-                    if cuotas_restantes > 0:
-                        cuotas_por_duplex_actualizadas[duplex_id] = {
-                            'cuotas_restantes': cuotas_restantes,
-                            'mes_venta': mes_venta
-                        }
-                elif cuotas_restantes > 0:
-                    # Keep the duplex in the list but don't collect cuota this month
-                    cuotas_por_duplex_actualizadas[duplex_id] = duplex_info
-            
-            cuotas_por_duplex = cuotas_por_duplex_actualizadas
+            # Active cuotas are a windowed sum over sale-month cohorts: the cohort sold last
+            # month starts paying and the one sold num_cuotas_restantes + 1 months ago is done
+            if num_cuotas_restantes > 0:
+                cuotas_activas += ventas_por_mes[mes - 1]
+                if mes - 1 - num_cuotas_restantes >= 0:
+                    cuotas_activas -= ventas_por_mes[mes - 1 - num_cuotas_restantes]
             df.loc[mes, "Cuotas Activas"] = cuotas_activas
             
             # Calculate income from remaining cuotas
@@ -238,21 +262,217 @@ class CashFlowCalculator:
             df.loc[mes, "Ingresos por Down Payment + Cuotas Mensuales (USD)"] = total_income
 
             # Ingresos acumulados y acumulado (commission already subtracted in down payment column)
-            df.loc[mes, "Ingresos Acumulados (USD)"] = df.loc[:mes, "Ingresos por Down Payment + Cuotas Mensuales (USD)"].sum()
+            # Running sums keep the whole loop O(months) instead of re-summing every earlier month
+            ingresos_acumulados += total_income
+            df.loc[mes, "Ingresos Acumulados (USD)"] = ingresos_acumulados
             
             # Calculate net flow for this month (commission already subtracted in down payment column)
-            saldo_neto_mensual = df.loc[mes, "Ingresos por Down Payment + Cuotas Mensuales (USD)"] - \
-                                df.loc[mes, "Gastos Construcción (USD)"]
+            saldo_neto_mensual = total_income - gasto_construccion_mes
             
             # Update accumulated balance
-            df.loc[mes, "Acumulado (USD)"] = df.loc[mes-1, "Acumulado (USD)"] + saldo_neto_mensual
+            acumulado += saldo_neto_mensual
+            df.loc[mes, "Acumulado (USD)"] = acumulado
 
             # Capital invertido y costo de oportunidad
-            df.loc[mes, "Capital Invertido (USD)"] = -df.loc[mes, "Acumulado (USD)"] if df.loc[mes, "Acumulado (USD)"] < 0 else 0
+            capital_invertido = -acumulado if acumulado < 0 else 0
+            df.loc[mes, "Capital Invertido (USD)"] = capital_invertido
             df.loc[mes, "Costo de Oportunidad Mensual (USD, TEA {:.2f}% Depósito USD)".format(tea_costo_oportunidad * 100)] = \
-                df.loc[mes, "Capital Invertido (USD)"] * tasa_mensual
+                capital_invertido * tasa_mensual
 
         return df
+
+    @staticmethod
+    def _programar_etapas(duplex_por_etapa: int, meses_por_etapa: int, total_etapas: int,
+                          tasa_ventas: float, num_cuotas_restantes: int,
+                          etapas: Optional[List[Dict[str, Any]]] = None, horizonte_meses: int = 0):
+        """
+        Resolve the etapas, their sales schedule and the exact timeline length
+
+        The timeline ends with the later of the last construction month and the
+        last cuota of the last sale. Sales so slow that they would go past
+        MESES_MAXIMOS are cut there and the timeline ends at that month.
+
+        Args:
+            etapas: Optional per-etapa specs; uniform etapas are built from the
+                other arguments otherwise
+            horizonte_meses: Fixed timeline length (0 = exact timeline)
+
+        Returns:
+            Tuple (normalized etapas, StageScheduler.programar_ventas schedule, total_meses)
+        """
+        if etapas is None:
+            etapas = StageScheduler.etapas_uniformes(duplex_por_etapa, meses_por_etapa, total_etapas)
+        else:
+            etapas = StageScheduler.normalizar_etapas(etapas)
+        total_meses_construccion = int(StageScheduler.fin_construccion(etapas)[-1]) if etapas else 0
+
+        if horizonte_meses > 0:
+            return etapas, StageScheduler.programar_ventas(etapas, tasa_ventas, horizonte_meses), horizonte_meses
+
+        limite = max(total_meses_construccion, CashFlowCalculator.MESES_MAXIMOS)
+        programa = StageScheduler.programar_ventas(etapas, tasa_ventas, limite)
+        if tasa_ventas > 0 and StageScheduler.duplex_vendidos(programa) < sum(etapa['duplex'] for etapa in etapas):
+            return etapas, programa, limite
+        return etapas, programa, max(total_meses_construccion,
+                                     StageScheduler.ultimo_mes_venta(programa) + num_cuotas_restantes)
+
+    @staticmethod
+    def calcular_programa(duplex_por_etapa: int, meses_por_etapa: int, total_etapas: int, tasa_ventas: float,
+                          num_cuotas_restantes: int = 10, horizonte_meses: int = 0,
+                          etapas: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Schedule stage of the vectorized engine: everything that depends only on
+        PARAMETROS_PROGRAMA (which month each duplex sells in, the active cuotas,
+        the construction months and the timeline)
+        
+        The result can be cached and valued with valorizar_programa for any
+        price, commission, costs, down payment or TEA; its arrays are read-only
+        so a cached schedule cannot be modified by accident.
+        
+        Args:
+            Same as generar_flujo_caja
+            
+        Returns:
+            Dict with 'total_meses', 'total_meses_construccion', 'num_cuotas_restantes',
+            'etapas' (etapa labels) and the int32 arrays 'etapa' (code into 'etapas'),
+            'duplex_vendidos' and 'cuotas_activas' (one value per month)
+        """
+        etapas, programa, total_meses = CashFlowCalculator._programar_etapas(
+            duplex_por_etapa, meses_por_etapa, total_etapas, tasa_ventas, num_cuotas_restantes,
+            etapas, horizonte_meses
+        )
+        total_etapas = len(etapas)
+        fin_construccion = StageScheduler.fin_construccion(etapas)
+        total_meses_construccion = int(fin_construccion[-1]) if total_etapas else 0
+        meses = np.arange(total_meses + 1)
+
+        # Etapa de construcción
+        etiquetas = ("Inicial", *(f"Etapa {n}" for n in range(1, total_etapas + 1)), "Post-Construcción")
+        indice_etapa = np.where(meses <= total_meses_construccion,
+                                np.searchsorted(fin_construccion, meses) + 1, total_etapas + 1)
+        indice_etapa[0] = 0
+
+        # Ventas y cuotas activas: each sale pays num_cuotas_restantes cuotas starting the month after the sale
+        duplex_vendidos = StageScheduler.ventas_mensuales(programa, total_meses)
+        ventas_previas = np.concatenate(([0], np.cumsum(duplex_vendidos)))
+        if num_cuotas_restantes > 0:
+            cuotas_activas = ventas_previas[meses] - ventas_previas[np.maximum(meses - num_cuotas_restantes, 0)]
+        else:
+            cuotas_activas = np.zeros(total_meses + 1, dtype=np.int64)
+        columnas = {'etapa': indice_etapa, 'duplex_vendidos': duplex_vendidos, 'cuotas_activas': cuotas_activas}
+        for nombre, valores in columnas.items():
+            columnas[nombre] = valores.astype(np.int32)
+            columnas[nombre].flags.writeable = False
+
+        return {
+            'total_meses': total_meses,
+            'total_meses_construccion': total_meses_construccion,
+            'num_cuotas_restantes': num_cuotas_restantes,
+            'etapas': etiquetas,
+            **columnas,
+        }
+
+    @staticmethod
+    def valorizar_programa(programa: Dict[str, Any], inversion_inicial: float, gasto_construccion_mensual: float,
+                           comision_por_venta: float, precio_por_duplex: float, tea_costo_oportunidad: float,
+                           porcentaje_down_payment: float = 40.0, down_payment_amount: float = 0.0,
+                           cuota_restante_mensual: float = 0.0) -> CashFlowResult:
+        """
+        Valuation stage of the vectorized engine: apply the monetary inputs to a schedule
+        
+        Only array arithmetic over the months, so editing a price, a cost or the
+        TEA revalues a cached schedule without scheduling the sales again.
+        
+        Args:
+            programa: Output of calcular_programa
+            Remaining arguments: Same as generar_flujo_caja
+            
+        Returns:
+            CashFlowResult: Cash flow data; its to_frame() is identical to the reference engine
+        """
+        num_cuotas_restantes = programa['num_cuotas_restantes']
+        down_payment_amount, cuota_restante_mensual = CashFlowCalculator._estructura_pago(
+            precio_por_duplex, porcentaje_down_payment, num_cuotas_restantes, down_payment_amount,
+            cuota_restante_mensual
+        )
+        tasa_mensual = (1 + tea_costo_oportunidad) ** (1/12) - 1 if tea_costo_oportunidad > 0 else 0
+        total_meses = programa['total_meses']
+        total_meses_construccion = programa['total_meses_construccion']
+        duplex_vendidos = programa['duplex_vendidos']
+        cuotas_activas = programa['cuotas_activas']
+        meses = np.arange(total_meses + 1)
+
+        # Gastos de construcción
+        gastos_construccion = np.where((meses >= 1) & (meses <= total_meses_construccion),
+                                       float(gasto_construccion_mensual), 0.0)
+        gastos_construccion[0] = inversion_inicial
+
+        # Comisiones, down payment y cuotas
+        gastos_comisiones = duplex_vendidos * float(comision_por_venta)
+        ingresos_down_payment = duplex_vendidos * float(down_payment_amount) - gastos_comisiones
+        ingresos_cuotas = cuotas_activas * float(cuota_restante_mensual)
+        ingresos_totales = ingresos_down_payment + ingresos_cuotas
+
+        # Acumulados, capital invertido y costo de oportunidad
+        saldo_neto = ingresos_totales - gastos_construccion
+        saldo_neto[0] = -inversion_inicial
+        acumulado = np.cumsum(saldo_neto)
+        capital_invertido = np.where(acumulado < 0, -acumulado, 0.0)
+        capital_invertido[0] = inversion_inicial
+        costo_oportunidad = capital_invertido * tasa_mensual
+
+        # The read-only schedule arrays are shared with the cached schedule, not copied
+        return CashFlowResult(
+            etapa=programa['etapa'],
+            etapas=programa['etapas'],
+            tea_costo_oportunidad=tea_costo_oportunidad,
+            gastos_construccion=gastos_construccion,
+            gastos_comisiones=gastos_comisiones,
+            ingresos_down_payment=ingresos_down_payment,
+            ingresos_cuotas=ingresos_cuotas,
+            ingresos_totales=ingresos_totales,
+            duplex_vendidos=duplex_vendidos,
+            cuotas_activas=cuotas_activas,
+            ingresos_acumulados=np.cumsum(ingresos_totales),
+            acumulado=acumulado,
+            capital_invertido=capital_invertido,
+            costo_oportunidad=costo_oportunidad,
+        )
+
+    @staticmethod
+    def _estructura_pago(precio_por_duplex: float, porcentaje_down_payment: float, num_cuotas_restantes: int,
+                         down_payment_amount: float = 0.0, cuota_restante_mensual: float = 0.0):
+        """
+        Down payment and monthly cuota, derived from the price when not provided (0.0)
+        
+        Returns:
+            Tuple (down_payment_amount, cuota_restante_mensual)
+        """
+        if down_payment_amount == 0.0:
+            down_payment_amount = precio_por_duplex * (porcentaje_down_payment / 100)
+        if cuota_restante_mensual == 0.0:
+            remaining_amount = precio_por_duplex - down_payment_amount
+            cuota_restante_mensual = remaining_amount / num_cuotas_restantes if num_cuotas_restantes > 0 else 0
+        return down_payment_amount, cuota_restante_mensual
+
+    @staticmethod
+    def _sumar_meses(valores):
+        """
+        Sum monthly values in month order (along the last axis)
+        
+        Unlike pairwise summation, a sequential sum does not depend on trailing
+        zero padding, so single runs and batch blocks of any size agree bit for bit.
+        
+        Args:
+            valores: 1-D series of months or 2-D array (scenario x month)
+            
+        Returns:
+            np.float64 or array with one total per scenario
+        """
+        valores = np.asarray(valores, dtype=np.float64)
+        if valores.shape[-1] == 0:
+            return np.zeros(valores.shape[:-1])[()]
+        return np.cumsum(valores, axis=-1)[..., -1][()]
     
     @staticmethod
     def calcular_metricas_financieras(df: pd.DataFrame, tea_costo_oportunidad: float) -> Dict[str, Any]:
@@ -263,26 +483,526 @@ class CashFlowCalculator:
             df: Cash flow DataFrame
             tea_costo_oportunidad: Opportunity cost rate
             
+        Returns:
+            Dict with financial metrics
+        """
+        return CashFlowCalculator.calcular_metricas(CashFlowResult.from_frame(df, tea_costo_oportunidad))
+    
+    @staticmethod
+    def calcular_metricas(resultado: CashFlowResult) -> Dict[str, Any]:
+        """
+        Calculate key financial metrics of a CashFlowResult (see calcular_metricas_financieras)
+        
+        Args:
+            resultado: Cash flow, e.g. from valorizar_programa
+            
         Returns:
             Dict with financial metrics
         """
         # Calcular métricas (commission already netted in down payment column)
-        total_ingresos = df["Ingresos por Down Payment + Cuotas Mensuales (USD)"].sum()
-        total_gastos = df["Gastos Construcción (USD)"].sum()  # Commission already subtracted from income
-        total_comisiones = df["Gastos Comisiones (USD)"].sum()  # Track commission separately for display
+        total_ingresos = CashFlowCalculator._sumar_meses(resultado.ingresos_totales)
+        total_gastos = CashFlowCalculator._sumar_meses(resultado.gastos_construccion)  # Commission already subtracted from income
+        total_comisiones = CashFlowCalculator._sumar_meses(resultado.gastos_comisiones)  # Track commission separately for display
         ganancia_neta = total_ingresos - total_gastos
-        costo_oportunidad_total = df[f"Costo de Oportunidad Mensual (USD, TEA {tea_costo_oportunidad * 100:.2f}% Depósito USD)"].sum()
-        positive_months = df[df["Acumulado (USD)"] > 0]
-        if len(positive_months) > 0:
-            mes_recuperacion = positive_months["Mes"].tolist()[0]
+        costo_oportunidad_total = CashFlowCalculator._sumar_meses(resultado.costo_oportunidad)
+        positivos = np.flatnonzero(resultado.acumulado > 0)
+        if positivos.size > 0:
+            mes_recuperacion = int(resultado.mes[positivos[0]])
         else:
             mes_recuperacion = "No alcanzado"
         
+        # Investment metrics of the monthly net flows, discounted at the opportunity cost
+        tea_costo_oportunidad = resultado.tea_costo_oportunidad
+        tasa_mensual = (1 + tea_costo_oportunidad) ** (1/12) - 1 if tea_costo_oportunidad > 0 else 0
+        saldo_neto = resultado.ingresos_totales - resultado.gastos_construccion
+        inversion = FinancialMetrics.calcular(saldo_neto[None, :], np.array([tasa_mensual], dtype=np.float64))
+        
         return {
             'total_ingresos': total_ingresos,
             'total_gastos': total_gastos,
             'total_comisiones': total_comisiones,
             'ganancia_neta': ganancia_neta,
             'costo_oportunidad_total': costo_oportunidad_total,
-            'mes_recuperacion': mes_recuperacion
-        } 
\ No newline at end of file
+            'mes_recuperacion': mes_recuperacion,
+            **FinancialMetrics.a_escalares(inversion)
+        }
+    
+    @staticmethod
+    def calcular_metricas_directas(inversion_inicial: float, gasto_construccion_mensual: float,
+                                   comision_por_venta: float, precio_por_duplex: float,
+                                   num_cuotas: int, duplex_por_etapa: int, meses_por_etapa: int,
+                                   total_etapas: int, tasa_ventas: float, tea_costo_oportunidad: float,
+                                   porcentaje_down_payment: float = 40.0, num_cuotas_restantes: int = 10,
+                                   down_payment_amount: float = 0.0, cuota_restante_mensual: float = 0.0,
+                                   horizonte_meses: int = 0, etapas: Optional[List[Dict[str, Any]]] = None,
+                                   tamano_bloque: int = 256) -> Dict[str, Any]:
+        """
+        Metrics-only fast path: calcular_metricas_financieras without building the table
+        
+        The months are streamed in blocks of tamano_bloque with running balances
+        carried from block to block, so memory does not grow with the timeline.
+        Every value is computed with the same operations in the same order as
+        the table engines (carried sums are prepended to each block's running
+        sum), so the result equals calcular_metricas_financieras(generar_flujo_caja(...))
+        exactly. The IRR search streams the months again once per search step.
+        
+        Args:
+            Same as generar_flujo_caja (without motor), plus
+            tamano_bloque: Months valued together per block
+            
+        Returns:
+            Dict with the calcular_metricas_financieras keys
+        """
+        down_payment_amount, cuota_restante_mensual = CashFlowCalculator._estructura_pago(
+            precio_por_duplex, porcentaje_down_payment, num_cuotas_restantes, down_payment_amount,
+            cuota_restante_mensual
+        )
+        etapas, programa, total_meses = CashFlowCalculator._programar_etapas(
+            duplex_por_etapa, meses_por_etapa, total_etapas, tasa_ventas, num_cuotas_restantes,
+            etapas, horizonte_meses
+        )
+        total_meses_construccion = int(StageScheduler.fin_construccion(etapas)[-1]) if etapas else 0
+        tasa_mensual = (1 + tea_costo_oportunidad) ** (1/12) - 1 if tea_costo_oportunidad > 0 else 0
+        
+        def saldos():
+            """Yield (months, ingresos totales, gastos construcción, gastos comisiones) block by block"""
+            # Duplexes sold in the num_cuotas_restantes months before the block (their cuotas are still due)
+            ventas_anteriores = np.zeros(max(num_cuotas_restantes, 0), dtype=np.int64)
+            for inicio in range(0, total_meses + 1, max(tamano_bloque, 1)):
+                fin = min(inicio + tamano_bloque, total_meses + 1)
+                meses = np.arange(inicio, fin)
+                vendidos = StageScheduler.ventas_mensuales(programa, fin - 1, inicio)
+                ventas = np.concatenate((ventas_anteriores, vendidos))
+                if num_cuotas_restantes > 0:
+                    ventas_previas = np.concatenate(([0], np.cumsum(ventas)))
+                    cuotas_activas = ventas_previas[num_cuotas_restantes:-1] - ventas_previas[:len(meses)]
+                    ventas_anteriores = ventas[len(ventas) - num_cuotas_restantes:]
+                else:
+                    cuotas_activas = np.zeros(len(meses), dtype=np.int64)
+                comisiones = vendidos * comision_por_venta
+                ingresos = vendidos * down_payment_amount - comisiones + cuotas_activas * cuota_restante_mensual
+                gastos = np.where((meses >= 1) & (meses <= total_meses_construccion), gasto_construccion_mensual, 0.0)
+                if inicio == 0:
+                    gastos[0] = inversion_inicial
+                yield meses, ingresos, gastos, comisiones
+        
+        acumular = FinancialMetrics.acumular
+        total_ingresos = total_gastos = total_comisiones = costo_oportunidad_total = acumulado = 0.0
+        distribuido = aportado = capital_maximo = 0.0
+        tasas_descuento = np.array([[tasa_mensual]], dtype=np.float64)
+        descontado = None
+        mes_recuperacion = "No alcanzado"
+        for meses, ingresos, gastos, comisiones in saldos():
+            total_ingresos = acumular(ingresos, total_ingresos)[-1]
+            total_gastos = acumular(gastos, total_gastos)[-1]
+            total_comisiones = acumular(comisiones, total_comisiones)[-1]
+            saldo_neto = ingresos - gastos
+            acumulados = acumular(saldo_neto, acumulado)
+            acumulado = acumulados[-1]
+            capital_invertido = np.where(acumulados < 0, -acumulados, 0.0)
+            capital_maximo = max(capital_maximo, capital_invertido.max())
+            if meses[0] == 0:
+                capital_invertido[0] = inversion_inicial
+            costo_oportunidad_total = acumular(capital_invertido * tasa_mensual, costo_oportunidad_total)[-1]
+            distribuido = acumular(np.where(saldo_neto > 0, saldo_neto, 0.0), distribuido)[-1]
+            aportado = acumular(np.where(saldo_neto < 0, -saldo_neto, 0.0), aportado)[-1]
+            descontado = FinancialMetrics.descontar(saldo_neto[None, :], tasas_descuento, descontado, payback=True)
+            positivos = np.flatnonzero(acumulados > 0)
+            if mes_recuperacion == "No alcanzado" and len(positivos):
+                mes_recuperacion = int(meses[positivos[0]])
+        
+        def valorar(tasas, _filas, derivada):
+            estado = None
+            for _, ingresos, gastos, _ in saldos():
+                estado = FinancialMetrics.descontar((ingresos - gastos)[None, :], tasas, estado, derivada=derivada)
+            return estado
+        
+        inversion = {
+            'capital_maximo': np.array([capital_maximo]),
+            'van': descontado['van'][:, 0],
+            'tir': FinancialMetrics.tir_por_valoracion(valorar, 1),
+            'moic': np.divide(distribuido, aportado, out=np.full(1, np.nan), where=aportado > 0),
+            'payback_descontado': descontado['payback'][:, 0],
+        }
+        return {
+            'total_ingresos': total_ingresos,
+            'total_gastos': total_gastos,
+            'total_comisiones': total_comisiones,
+            'ganancia_neta': total_ingresos - total_gastos,
+            'costo_oportunidad_total': costo_oportunidad_total,
+            'mes_recuperacion': mes_recuperacion,
+            **FinancialMetrics.a_escalares(inversion)
+        }
+    
+    @staticmethod
+    def evaluate_batch(params_table, tamano_bloque: int = 2048) -> pd.DataFrame:
+        """
+        Evaluate many scenarios in one call without building per-scenario DataFrames
+        
+        Scenarios are computed as stacked arrays (one row per scenario, one column
+        per month) and sales schedules are simulated once per distinct combination
+        of schedule parameters, so sweeps over price, down payment or TEA reuse them.
+        
+        Args:
+            params_table: DataFrame (or anything pd.DataFrame accepts) with one row per
+                scenario and columns named like the generar_flujo_caja parameters;
+                optional parameters that are missing or NaN fall back to their defaults
+            tamano_bloque: Number of scenarios stacked together per block
+            
+        Returns:
+            pd.DataFrame: One row of metrics per scenario, indexed like params_table
+        """
+        escenarios = params_table if isinstance(params_table, pd.DataFrame) else pd.DataFrame(params_table)
+        faltantes = [nombre for nombre, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items()
+                     if defecto is None and nombre not in escenarios.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas de parámetros: {', '.join(faltantes)}")
+        
+        parametros = {}
+        for nombre, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items():
+            tipo = np.int64 if nombre in CashFlowCalculator.PARAMETROS_ENTEROS else np.float64
+            if nombre in escenarios.columns:
+                columna = escenarios[nombre] if defecto is None else escenarios[nombre].fillna(defecto)
+                parametros[nombre] = columna.to_numpy(dtype=tipo)
+            else:
+                parametros[nombre] = np.full(len(escenarios), defecto, dtype=tipo)
+        
+        bloques = [
+            CashFlowCalculator._evaluar_lote({nombre: valores[inicio:inicio + tamano_bloque]
+                                              for nombre, valores in parametros.items()})
+            for inicio in range(0, len(escenarios), max(tamano_bloque, 1))
+        ]
+        metricas = {
+            nombre: np.concatenate([bloque[nombre] for bloque in bloques]) if bloques else np.zeros(0, dtype=tipo)
+            for nombre, tipo in (('total_ingresos', np.float64), ('total_gastos', np.float64),
+                                 ('total_comisiones', np.float64), ('ganancia_neta', np.float64),
+                                 ('costo_oportunidad_total', np.float64), ('mes_recuperacion', np.int64),
+                                 ('capital_maximo', np.float64), ('van', np.float64), ('tir', np.float64),
+                                 ('moic', np.float64), ('payback_descontado', np.int64))
+        }
+        
+        resultado = pd.DataFrame(metricas, index=escenarios.index)
+        # Scenarios that never recover the investment get <NA> ("No alcanzado")
+        for nombre in ('mes_recuperacion', 'payback_descontado'):
+            resultado[nombre] = resultado[nombre].astype("Int64").mask(resultado[nombre] < 0)
+        return resultado
+    
+    @staticmethod
+    def resolver_objetivo(parametros: Dict[str, Any], variable: str, metrica: str, objetivo: float,
+                          minimo: float, maximo: float, tolerancia: Optional[float] = None,
+                          puntos_por_iteracion: int = 8, max_iteraciones: int = 100) -> Dict[str, Any]:
+        """
+        Find the value of one input that meets a target metric (goal seek)
+        
+        The metric is assumed monotonic in the input over [minimo, maximo]. The
+        range is narrowed by bracketing: every iteration values puntos_por_iteracion
+        evenly spaced candidates at once on the metrics-only array path (one sales
+        schedule per distinct tasa_ventas, no DataFrames) and keeps the sub-interval
+        where the target starts or stops being met. One point per iteration is
+        plain bisection; the sales schedule moves in whole duplexes, so stepwise
+        metrics such as mes_recuperacion are bracketed the same way.
+        
+        Args:
+            parametros: generar_flujo_caja parameters (optionally with 'etapas')
+            variable: Input to solve for, one of VARIABLES_OBJETIVO
+            metrica: Target metric, one of METRICAS_OBJETIVO
+            objetivo: Target value; met when the metric is at least objetivo
+                (ganancia_neta, van, tir) or at most objetivo (the other metrics)
+            minimo: Lower end of the search range
+            maximo: Upper end of the search range
+            tolerancia: Width of the final bracket (default: VARIABLES_OBJETIVO[variable])
+            puntos_por_iteracion: Candidates valued per iteration
+            max_iteraciones: Iteration limit
+            
+        Returns:
+            Dict with 'valor' (the value closest to the edge of the range where the
+            target is met, or the lowest value when the whole range meets it; None
+            when no end of the range meets it), 'metrica' (metric at valor; None for
+            an unreached mes_recuperacion), 'alcanzado', 'iteraciones' and 'evaluaciones'
+        """
+        if variable not in CashFlowCalculator.VARIABLES_OBJETIVO:
+            raise ValueError(f"Variable desconocida: {variable!r}. Opciones: {', '.join(CashFlowCalculator.VARIABLES_OBJETIVO)}")
+        if metrica not in CashFlowCalculator.METRICAS_OBJETIVO:
+            raise ValueError(f"Métrica desconocida: {metrica!r}. Opciones: {', '.join(CashFlowCalculator.METRICAS_OBJETIVO)}")
+        if not minimo <= maximo:
+            raise ValueError("El mínimo del rango no puede superar al máximo")
+        if puntos_por_iteracion < 1:
+            raise ValueError("puntos_por_iteracion debe ser al menos 1")
+        
+        base = {nombre: parametros.get(nombre, defecto)
+                for nombre, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items()}
+        faltantes = [nombre for nombre, valor in base.items() if valor is None and nombre != variable]
+        if faltantes:
+            raise ValueError(f"Faltan parámetros: {', '.join(faltantes)}")
+        if variable in ('precio_por_duplex', 'porcentaje_down_payment'):
+            # Down payment and cuota follow the solved price / percentage
+            base['down_payment_amount'] = base['cuota_restante_mensual'] = 0.0
+        tolerancia = CashFlowCalculator.VARIABLES_OBJETIVO[variable] if tolerancia is None else tolerancia
+        mayor_es_mejor = CashFlowCalculator.METRICAS_OBJETIVO[metrica]
+        evaluaciones = 0
+        
+        def evaluar(valores):
+            nonlocal evaluaciones
+            evaluaciones += len(valores)
+            valores_metrica = CashFlowCalculator._evaluar_variable(
+                base, parametros.get('etapas'), variable, valores, incluir_inversion=metrica in ('van', 'tir')
+            )[metrica]
+            if mayor_es_mejor:
+                cumple = valores_metrica >= objetivo
+            else:
+                # mes_recuperacion is -1 when the investment is never recovered
+                cumple = (valores_metrica <= objetivo) & (valores_metrica >= 0)
+            return valores_metrica, cumple
+        
+        (metrica_minimo, metrica_maximo), (cumple_minimo, cumple_maximo) = evaluar(np.array([minimo, maximo], dtype=np.float64))
+        iteraciones = 0
+        if not (cumple_minimo or cumple_maximo):
+            valor, valor_metrica = None, None
+        elif cumple_minimo and cumple_maximo:
+            valor, valor_metrica = minimo, metrica_minimo
+        else:
+            # Invariant: the target is met at exactly one end of [bajo, alto]
+            bajo, alto = float(minimo), float(maximo)
+            metrica_bajo, metrica_alto = metrica_minimo, metrica_maximo
+            while alto - bajo > tolerancia and iteraciones < max_iteraciones:
+                iteraciones += 1
+                puntos = np.linspace(bajo, alto, puntos_por_iteracion + 2)[1:-1]
+                valores_metrica, cumple = evaluar(puntos)
+                # First candidate on the other side of the target than bajo
+                cambio = np.flatnonzero(cumple != cumple_minimo)
+                if len(cambio):
+                    indice = int(cambio[0])
+                    alto, metrica_alto = float(puntos[indice]), valores_metrica[indice]
+                else:
+                    indice = len(puntos)
+                if indice > 0:
+                    bajo, metrica_bajo = float(puntos[indice - 1]), valores_metrica[indice - 1]
+            valor, valor_metrica = (bajo, metrica_bajo) if cumple_minimo else (alto, metrica_alto)
+        
+        if valor_metrica is not None:
+            valor_metrica = int(valor_metrica) if metrica == 'mes_recuperacion' else float(valor_metrica)
+            if metrica == 'mes_recuperacion' and valor_metrica < 0:
+                valor_metrica = None
+        return {
+            'variable': variable,
+            'metrica': metrica,
+            'objetivo': objetivo,
+            'valor': None if valor is None else float(valor),
+            'valor_metrica': valor_metrica,
+            'alcanzado': valor is not None,
+            'iteraciones': iteraciones,
+            'evaluaciones': evaluaciones,
+        }
+    
+    @staticmethod
+    def _evaluar_variable(base: Dict[str, Any], etapas: Optional[List[Dict[str, Any]]], variable: str,
+                          valores: np.ndarray, incluir_inversion: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Metrics of one scenario for several values of one input, on stacked arrays
+        
+        Args:
+            base: Complete scalar generar_flujo_caja parameters
+            etapas: Optional per-etapa specs
+            variable: Input that takes the given values
+            valores: Values of the input, one per row
+            incluir_inversion: Also compute the FinancialMetrics investment metrics
+            
+        Returns:
+            Dict of metric arrays as returned by _metricas_lote
+        """
+        num_filas = len(valores)
+        lote = {
+            nombre: np.full(num_filas, valor, dtype=np.int64 if nombre in CashFlowCalculator.PARAMETROS_ENTEROS else np.float64)
+            for nombre, valor in base.items() if nombre != variable
+        }
+        lote[variable] = np.asarray(valores, dtype=np.float64)
+        return CashFlowCalculator._evaluar_filas(lote, etapas, incluir_inversion)
+    
+    @staticmethod
+    def _evaluar_filas(lote: Dict[str, np.ndarray], etapas: Optional[List[Dict[str, Any]]] = None,
+                       incluir_inversion: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Metrics of a few scenarios that share most of their inputs, on stacked arrays
+        
+        Args:
+            lote: One array per generar_flujo_caja parameter, one value per row
+            etapas: Optional per-etapa specs shared by every row
+            incluir_inversion: Also compute the FinancialMetrics investment metrics
+            
+        Returns:
+            Dict of metric arrays as returned by _metricas_lote
+        """
+        columnas, tasa_mensual = CashFlowCalculator._valorizar_filas(lote, etapas)
+        return CashFlowCalculator._metricas_lote(columnas, tasa_mensual if incluir_inversion else None)
+    
+    @staticmethod
+    def _valorizar_filas(lote: Dict[str, np.ndarray], etapas: Optional[List[Dict[str, Any]]] = None):
+        """
+        Valued 2-D cash flow columns of a few scenarios that share most of their inputs
+        
+        Each distinct sales schedule is computed once and shared by every row that
+        only differs in monetary inputs (price, commission, TEA, costs), so those
+        rows cost one valuation each.
+        
+        Args:
+            lote: One array per generar_flujo_caja parameter, one value per row
+            etapas: Optional per-etapa specs shared by every row
+            
+        Returns:
+            Tuple (columns as returned by _valorizar_lote, monthly opportunity rate per row)
+        """
+        num_filas = len(lote['tasa_ventas'])
+        down_payment_amount, cuota_restante_mensual, tasa_mensual = CashFlowCalculator._estructura_pago_lote(lote)
+        
+        # Rows sharing a schedule are filled together
+        programas = {}
+        claves = zip(*(lote[nombre].tolist() for nombre in CashFlowCalculator.PARAMETROS_PROGRAMA))
+        for fila, clave in enumerate(claves):
+            programas.setdefault(clave, []).append(fila)
+        total_meses = np.zeros(num_filas, dtype=np.int64)
+        total_meses_construccion = np.zeros(num_filas, dtype=np.int64)
+        calculados = []
+        for clave, filas in programas.items():
+            duplex_por_etapa, meses_por_etapa, total_etapas, tasa_ventas, num_cuotas_restantes, horizonte = clave
+            etapas_fila, programa, total_meses[filas] = CashFlowCalculator._programar_etapas(
+                int(duplex_por_etapa), int(meses_por_etapa), int(total_etapas), tasa_ventas,
+                int(num_cuotas_restantes), etapas, int(horizonte)
+            )
+            total_meses_construccion[filas] = int(StageScheduler.fin_construccion(etapas_fila)[-1]) if etapas_fila else 0
+            calculados.append((programa, filas))
+        ancho = int(total_meses.max()) + 1 if num_filas else 1
+        duplex_vendidos = np.zeros((num_filas, ancho), dtype=np.int64)
+        for programa, filas in calculados:
+            duplex_vendidos[filas] = StageScheduler.ventas_mensuales(programa, ancho - 1)
+        
+        columnas = CashFlowCalculator._valorizar_lote(
+            duplex_vendidos, total_meses, lote['inversion_inicial'], lote['gasto_construccion_mensual'],
+            total_meses_construccion, lote['comision_por_venta'],
+            down_payment_amount, cuota_restante_mensual, lote['num_cuotas_restantes'], tasa_mensual
+        )
+        return columnas, tasa_mensual
+    
+    @staticmethod
+    def _evaluar_lote(parametros: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Compute the financial metrics of a block of scenarios on 2-D arrays
+        
+        Args:
+            parametros: One array per generar_flujo_caja parameter, one value per scenario
+            
+        Returns:
+            Dict with one metric array per calcular_metricas_financieras key
+            (mes_recuperacion is -1 when not reached)
+        """
+        return CashFlowCalculator._evaluar_filas(parametros, incluir_inversion=True)
+    
+    @staticmethod
+    def _estructura_pago_lote(parametros: Dict[str, np.ndarray]):
+        """
+        Derive down payment, monthly cuota and monthly opportunity rate per scenario
+        (same rules as generar_flujo_caja)
+        
+        Returns:
+            Tuple of arrays (down_payment_amount, cuota_restante_mensual, tasa_mensual)
+        """
+        precio_por_duplex = parametros['precio_por_duplex']
+        num_cuotas_restantes = parametros['num_cuotas_restantes']
+        tea_costo_oportunidad = parametros['tea_costo_oportunidad']
+        
+        down_payment_amount = np.where(parametros['down_payment_amount'] == 0.0,
+                                       precio_por_duplex * (parametros['porcentaje_down_payment'] / 100),
+                                       parametros['down_payment_amount'])
+        cuota_calculada = np.divide(precio_por_duplex - down_payment_amount, num_cuotas_restantes,
+                                    out=np.zeros(len(precio_por_duplex)), where=num_cuotas_restantes > 0)
+        cuota_restante_mensual = np.where(parametros['cuota_restante_mensual'] == 0.0,
+                                          cuota_calculada, parametros['cuota_restante_mensual'])
+        # Scalar powers like generar_flujo_caja; the vectorized power can differ in the last bit
+        tasa_mensual = np.array([(1 + tea) ** (1/12) - 1 if tea > 0 else 0.0
+                                 for tea in tea_costo_oportunidad.tolist()], dtype=np.float64)
+        return down_payment_amount, cuota_restante_mensual, tasa_mensual
+    
+    @staticmethod
+    def _valorizar_lote(duplex_vendidos: np.ndarray, total_meses: np.ndarray, inversion_inicial: np.ndarray,
+                        gasto_construccion_mensual: np.ndarray, total_meses_construccion: np.ndarray,
+                        comision_por_venta: np.ndarray, down_payment_amount: np.ndarray,
+                        cuota_restante_mensual: np.ndarray, num_cuotas_restantes: np.ndarray,
+                        tasa_mensual: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Apply the monetary inputs to stacked sales schedules
+        
+        Args:
+            duplex_vendidos: Duplexes sold per month (scenario x month)
+            total_meses: Last month of each scenario's timeline; later months are zeroed
+            Remaining arguments: One value per scenario
+            
+        Returns:
+            Dict of 2-D arrays (scenario x month) named after the cash flow columns
+        """
+        num_escenarios, ancho = duplex_vendidos.shape
+        meses = np.arange(ancho)
+        dentro = meses[None, :] <= total_meses[:, None]
+        
+        # Gastos, comisiones y down payment
+        gastos_construccion = np.where(dentro & (meses[None, :] >= 1) & (meses[None, :] <= total_meses_construccion[:, None]),
+                                       gasto_construccion_mensual[:, None], 0.0)
+        gastos_construccion[:, 0] = inversion_inicial
+        gastos_comisiones = duplex_vendidos * comision_por_venta[:, None]
+        ingresos_down_payment = duplex_vendidos * down_payment_amount[:, None] - gastos_comisiones
+        
+        # Cuotas activas as a windowed sum over sale-month cohorts
+        ventas_previas = np.zeros((num_escenarios, ancho + 1), dtype=np.int64)
+        np.cumsum(duplex_vendidos, axis=1, out=ventas_previas[:, 1:])
+        inicio_ventana = np.maximum(meses[None, :] - num_cuotas_restantes[:, None], 0)
+        cuotas_activas = ventas_previas[:, :ancho] - np.take_along_axis(ventas_previas, inicio_ventana, axis=1)
+        cuotas_activas[num_cuotas_restantes <= 0] = 0
+        ingresos_totales = np.where(dentro, ingresos_down_payment + cuotas_activas * cuota_restante_mensual[:, None], 0.0)
+        
+        # Acumulado, capital invertido y costo de oportunidad
+        saldo_neto = ingresos_totales - gastos_construccion
+        saldo_neto[:, 0] = -inversion_inicial
+        acumulado = np.cumsum(saldo_neto, axis=1)
+        capital_invertido = np.where(dentro & (acumulado < 0), -acumulado, 0.0)
+        capital_invertido[:, 0] = inversion_inicial
+        
+        return {
+            'dentro': dentro,
+            'gastos_construccion': gastos_construccion,
+            'gastos_comisiones': gastos_comisiones,
+            'ingresos_totales': ingresos_totales,
+            'acumulado': acumulado,
+            'capital_invertido': capital_invertido,
+            'costo_oportunidad': capital_invertido * tasa_mensual[:, None],
+        }
+    
+    @staticmethod
+    def _metricas_lote(columnas: Dict[str, np.ndarray],
+                       tasa_mensual: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Reduce valued 2-D cash flow columns to one set of metrics per scenario
+        
+        Args:
+            columnas: Output of _valorizar_lote
+            tasa_mensual: Monthly opportunity cost rate per scenario; when given, the
+                FinancialMetrics investment metrics are added
+        
+        Returns:
+            Dict with one metric array per calcular_metricas_financieras key
+            (mes_recuperacion and payback_descontado are -1 when not reached,
+            tir and moic are NaN when undefined)
+        """
+        meses_positivos = columnas['dentro'] & (columnas['acumulado'] > 0)
+        total_ingresos = CashFlowCalculator._sumar_meses(columnas['ingresos_totales'])
+        total_gastos = CashFlowCalculator._sumar_meses(columnas['gastos_construccion'])
+        metricas = {
+            'total_ingresos': total_ingresos,
+            'total_gastos': total_gastos,
+            'total_comisiones': CashFlowCalculator._sumar_meses(columnas['gastos_comisiones']),
+            'ganancia_neta': total_ingresos - total_gastos,
+            'costo_oportunidad_total': CashFlowCalculator._sumar_meses(columnas['costo_oportunidad']),
+            'mes_recuperacion': np.where(meses_positivos.any(axis=1), meses_positivos.argmax(axis=1), -1)
+        }
+        if tasa_mensual is not None:
+            # Months past a scenario's timeline are zero in both columns, so they add nothing
+            metricas.update(FinancialMetrics.calcular(columnas['ingresos_totales'] - columnas['gastos_construccion'],
+                                                      tasa_mensual))
+        return metricas
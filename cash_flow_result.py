@@ -0,0 +1,152 @@
+# cash_flow_result.py
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+class CashFlowResult:
+    """
+    Monthly cash flow of one scenario as contiguous typed arrays
+
+    Every field has a short, stable key (see COLUMNAS); the long display names
+    of the generar_flujo_caja table only exist in to_frame, for display and
+    export. The etapa of each month is a small integer code into 'etapas'.
+    """
+
+    # Field -> display label, in table order (the opportunity cost label embeds the TEA)
+    COLUMNAS = {
+        'mes': "Mes",
+        'etapa': "Etapa de Construcción",
+        'gastos_construccion': "Gastos Construcción (USD)",
+        'gastos_comisiones': "Gastos Comisiones (USD)",
+        'ingresos_down_payment': "Ingresos por Downpayment - Gastos Comision (USD)",
+        'ingresos_cuotas': "Ingresos Cuotas Restantes (USD)",
+        'ingresos_totales': "Ingresos por Down Payment + Cuotas Mensuales (USD)",
+        'duplex_vendidos': "Dúplex Vendidos",
+        'cuotas_activas': "Cuotas Activas",
+        'ingresos_acumulados': "Ingresos Acumulados (USD)",
+        'acumulado': "Acumulado (USD)",
+        'capital_invertido': "Capital Invertido (USD)",
+        'costo_oportunidad': "Costo de Oportunidad Mensual (USD, TEA {tea:.2f}% Depósito USD)",
+    }
+    CAMPOS_ENTEROS = ('mes', 'etapa', 'duplex_vendidos', 'cuotas_activas')
+
+    # 'mes' is always 0..total_meses, so it is computed rather than stored
+    __slots__ = (*(campo for campo in COLUMNAS if campo != 'mes'), 'etapas', 'tea_costo_oportunidad')
+
+    def __init__(self, etapa: np.ndarray, etapas: Sequence[str], tea_costo_oportunidad: float,
+                 gastos_construccion: np.ndarray, gastos_comisiones: np.ndarray, ingresos_down_payment: np.ndarray,
+                 ingresos_cuotas: np.ndarray, ingresos_totales: np.ndarray, duplex_vendidos: np.ndarray,
+                 cuotas_activas: np.ndarray, ingresos_acumulados: np.ndarray, acumulado: np.ndarray,
+                 capital_invertido: np.ndarray, costo_oportunidad: np.ndarray):
+        """
+        Args:
+            etapa: Etapa code per month (index into etapas)
+            etapas: Etapa labels, e.g. ("Inicial", "Etapa 1", ..., "Post-Construcción")
+            tea_costo_oportunidad: Opportunity cost rate the flow was valued at
+            Remaining arguments: One value per month (see COLUMNAS)
+        """
+        self.etapa = np.ascontiguousarray(etapa, dtype=np.int32)
+        self.etapas = tuple(etapas)
+        self.tea_costo_oportunidad = float(tea_costo_oportunidad)
+        self.duplex_vendidos = np.ascontiguousarray(duplex_vendidos, dtype=np.int32)
+        self.cuotas_activas = np.ascontiguousarray(cuotas_activas, dtype=np.int32)
+        self.gastos_construccion = np.ascontiguousarray(gastos_construccion, dtype=np.float64)
+        self.gastos_comisiones = np.ascontiguousarray(gastos_comisiones, dtype=np.float64)
+        self.ingresos_down_payment = np.ascontiguousarray(ingresos_down_payment, dtype=np.float64)
+        self.ingresos_cuotas = np.ascontiguousarray(ingresos_cuotas, dtype=np.float64)
+        self.ingresos_totales = np.ascontiguousarray(ingresos_totales, dtype=np.float64)
+        self.ingresos_acumulados = np.ascontiguousarray(ingresos_acumulados, dtype=np.float64)
+        self.acumulado = np.ascontiguousarray(acumulado, dtype=np.float64)
+        self.capital_invertido = np.ascontiguousarray(capital_invertido, dtype=np.float64)
+        self.costo_oportunidad = np.ascontiguousarray(costo_oportunidad, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.etapa)
+
+    def __repr__(self) -> str:
+        return (f"CashFlowResult(meses={len(self)}, etapas={len(self.etapas)}, "
+                f"tea_costo_oportunidad={self.tea_costo_oportunidad:.4f})")
+
+    @property
+    def mes(self) -> np.ndarray:
+        """
+        Month numbers, 0..total_meses
+        """
+        return np.arange(len(self), dtype=np.int32)
+
+    @property
+    def total_meses(self) -> int:
+        """
+        Last month of the timeline
+        """
+        return len(self) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the monthly arrays
+        """
+        return sum(getattr(self, campo).nbytes for campo in self.COLUMNAS if campo != 'mes')
+
+    def etiqueta(self, campo: str) -> str:
+        """
+        Display label of a field (the opportunity cost one shows this result's TEA)
+        """
+        return self.COLUMNAS[campo].format(tea=self.tea_costo_oportunidad * 100)
+
+    def to_frame(self, labels: Union[bool, Mapping[str, str]] = True,
+                 filas: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Table view for display and export
+
+        With the default labels the table is identical to generar_flujo_caja's
+        (int64 counts, text etapa column).
+
+        Args:
+            labels: True for the display labels, False for the field keys, or a
+                mapping field -> label (fields left out keep their display label)
+            filas: Optional row positions to include (e.g. one page of a table)
+
+        Returns:
+            pd.DataFrame: One row per month
+        """
+        seleccion = slice(None) if filas is None else filas
+        columnas = {}
+        for campo in self.COLUMNAS:
+            if labels is True:
+                nombre = self.etiqueta(campo)
+            elif labels is False:
+                nombre = campo
+            else:
+                nombre = labels.get(campo, self.etiqueta(campo))
+            valores = getattr(self, campo)[seleccion]
+            if campo == 'etapa':
+                valores = [self.etapas[codigo] for codigo in valores.tolist()]
+            elif campo in self.CAMPOS_ENTEROS:
+                valores = valores.astype(np.int64)
+            else:
+                valores = valores.copy()
+            columnas[nombre] = valores
+        # Every column above is a fresh array or list
+        return pd.DataFrame(columnas, copy=False)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, tea_costo_oportunidad: float) -> "CashFlowResult":
+        """
+        Result from a generar_flujo_caja table (e.g. a stored scenario)
+
+        Args:
+            df: Table with the display labels
+            tea_costo_oportunidad: TEA the table was valued at (names its last column)
+
+        Returns:
+            CashFlowResult
+        """
+        codigos, etapas = pd.factorize(df[cls.COLUMNAS['etapa']])
+        valores = {
+            campo: df[etiqueta.format(tea=tea_costo_oportunidad * 100)].to_numpy()
+            for campo, etiqueta in cls.COLUMNAS.items() if campo not in ('mes', 'etapa')
+        }
+        return cls(codigos, [str(etapa) for etapa in etapas], tea_costo_oportunidad, **valores)
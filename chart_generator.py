@@ -1,60 +1,153 @@
 # chart_generator.py
-import plotly.express as px
-import plotly.graph_objects as go
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+
+import numpy as np
 import pandas as pd
 
+from cash_flow_result import CashFlowResult
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# plotly is imported inside each method so importing this module (and the app)
+# does not pay for it until a chart is actually drawn
+
 class ChartGenerator:
     """
     Handles all chart generation for the cash flow application
     """
     
+    # Points per line sent to the browser; longer series are downsampled with LTTB
+    MAX_PUNTOS = 2000
+
+    @staticmethod
+    def _aplicar_tema(fig: "go.Figure") -> "go.Figure":
+        """
+        Apply the app's dark theme to a figure: template, backgrounds, fonts,
+        legend box and axis grid. Charts set their title, size and any
+        theme overrides with update_layout afterwards.
+        
+        Args:
+            fig: Figure to style (modified in place)
+            
+        Returns:
+            go.Figure: The same figure
+        """
+        fig.update_layout(
+            template="plotly_dark",
+            title_font_size=22,
+            title_font_color="#e0e0e0",
+            font=dict(color="#e0e0e0", size=14),
+            plot_bgcolor='#2d2d2d',
+            paper_bgcolor='#2d2d2d',
+            margin=dict(l=80, r=80, t=100, b=80),
+            legend=dict(bgcolor='rgba(45, 45, 45, 0.8)', font=dict(size=13, color="#e0e0e0"))
+        )
+        fig.update_xaxes(gridcolor='#444444', zerolinecolor='#444444', color='#e0e0e0')
+        fig.update_yaxes(gridcolor='#444444', zerolinecolor='#444444', color='#e0e0e0')
+        return fig
+
+    @staticmethod
+    def reducir_puntos(x, y, max_puntos: Optional[int] = MAX_PUNTOS) -> np.ndarray:
+        """
+        Indices of a shape-preserving subset of a line (Largest-Triangle-Three-Buckets)
+
+        The first and last points are kept; every bucket in between keeps the point
+        that forms the largest triangle with the previously kept point and the
+        average of the next bucket, so peaks and turning points survive.
+
+        Args:
+            x: X values, ascending
+            y: Y values
+            max_puntos: Points to keep (at least 3); None or a longer limit keeps them all
+
+        Returns:
+            np.ndarray: Ascending indices of the points to draw
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n = len(x)
+        if max_puntos is None or n <= max_puntos:
+            return np.arange(n)
+        if max_puntos < 3:
+            raise ValueError("max_puntos debe ser al menos 3")
+
+        # Buckets of the interior points, and the average of each bucket (the last
+        # point is its own bucket, so it is left out of the sums)
+        bordes = (1 + np.arange(max_puntos - 1) * (n - 2) / (max_puntos - 2)).astype(np.int64)
+        bordes[-1] = n - 1
+        tamanos = np.diff(bordes)
+        promedio_x = np.append(np.add.reduceat(x[:-1], bordes[:-1]) / tamanos, x[-1])
+        promedio_y = np.append(np.add.reduceat(y[:-1], bordes[:-1]) / tamanos, y[-1])
+
+        indices = np.empty(max_puntos, dtype=np.int64)
+        indices[0], indices[-1] = 0, n - 1
+        anterior = 0
+        for cubo in range(max_puntos - 2):
+            inicio, fin = bordes[cubo], bordes[cubo + 1]
+            areas = np.abs((x[anterior] - promedio_x[cubo + 1]) * (y[inicio:fin] - y[anterior])
+                           - (x[anterior] - x[inicio:fin]) * (promedio_y[cubo + 1] - y[anterior]))
+            anterior = inicio + int(np.argmax(areas))
+            indices[cubo + 1] = anterior
+        return indices
+
     @staticmethod
-    def create_cash_flow_chart(df: pd.DataFrame, tea_costo_oportunidad: float) -> go.Figure:
+    def create_cash_flow_chart(flujo: Union[CashFlowResult, pd.DataFrame], tea_costo_oportunidad: float = 0.0,
+                               max_puntos: Optional[int] = MAX_PUNTOS, alto: int = 700,
+                               ancho: Optional[int] = None) -> "go.Figure":
         """
         Create the main cash flow chart showing accumulated expenses, income, and difference
         
+        Only the needed arrays are read (nothing is copied) and the lines are WebGL
+        traces, downsampled to max_puntos each for long horizons.
+        
         Args:
-            df: Cash flow DataFrame
-            tea_costo_oportunidad: Opportunity cost rate
+            flujo: CashFlowResult, or a generar_flujo_caja DataFrame
+            tea_costo_oportunidad: Not used (the chart has no opportunity cost line); kept so
+                calls with the baseline (df, tea_costo_oportunidad) arguments still work
+            max_puntos: Points per line (see reducir_puntos); None draws every month
+            alto: Chart height in pixels
+            ancho: Chart width in pixels; None fits the container
             
         Returns:
             go.Figure: Plotly figure object
         """
-        # Calculate accumulated values
-        df_chart = df.copy()
-        
-        # Calculate accumulated expenses (construction + commissions)
-        df_chart['Gasto Acumulado por Mes (USD)'] = (
-            df_chart['Gastos Construcción (USD)'] + df_chart['Gastos Comisiones (USD)']
-        ).cumsum()
-        
-        # Calculate accumulated income
-        df_chart['Ingreso Acumulado por Mes (USD)'] = (
-            df_chart['Ingresos por Down Payment + Cuotas Mensuales (USD)']
-        ).cumsum()
-        
-        # Calculate difference (Income - Expenses)
-        df_chart['Diferencia Entre Ingresos y Gastos (USD)'] = (
-            df_chart['Ingreso Acumulado por Mes (USD)'] - df_chart['Gasto Acumulado por Mes (USD)']
-        )
+        import plotly.graph_objects as go
+
+        def columna(campo):
+            # A table is read by label, only the columns drawn (its TEA-named column is not)
+            if isinstance(flujo, pd.DataFrame):
+                return flujo[CashFlowResult.COLUMNAS[campo]].to_numpy()
+            return getattr(flujo, campo)
+
+        meses = columna('mes')
         
-        # Create the line chart with the three traces
-        fig = px.line(df_chart, x="Mes", 
-                      y=["Gasto Acumulado por Mes (USD)", 
-                         "Ingreso Acumulado por Mes (USD)", 
-                         "Diferencia Entre Ingresos y Gastos (USD)"],
-                      title="Evolución de Ingresos y Gastos Acumulados",
-                      labels={"value": "USD", "variable": "Métricas"})
+        # Accumulated expenses (construction + commissions), accumulated income and their difference
+        gasto_acumulado = np.cumsum(columna('gastos_construccion') + columna('gastos_comisiones'))
+        ingreso_acumulado = np.cumsum(columna('ingresos_totales'))
+        lineas = {
+            "Gasto Acumulado por Mes (USD)": (gasto_acumulado, '#e74c3c'),  # Red for expenses
+            "Ingreso Acumulado por Mes (USD)": (ingreso_acumulado, '#4CAF50'),  # Green for income
+            "Diferencia Entre Ingresos y Gastos (USD)": (ingreso_acumulado - gasto_acumulado, '#3498db'),  # Blue for difference
+        }
         
-        # Improve chart styling with dark theme and increased scale
+        fig = go.Figure()
+        for nombre, (valores, color) in lineas.items():
+            indices = ChartGenerator.reducir_puntos(meses, valores, max_puntos)
+            fig.add_trace(go.Scattergl(
+                x=meses[indices], y=valores[indices], mode="lines", name=nombre,
+                line=dict(color=color, width=4),  # Increased line width for better visibility
+                hovertemplate='<b>%{fullData.name}</b><br>Mes: %{x}<br>USD: $%{y:,.0f}<extra></extra>'
+            ))
+        
+        # Dark theme, with a larger title and a detailed legend for the main chart
+        ChartGenerator._aplicar_tema(fig)
         fig.update_layout(
+            title_text="Evolución de Ingresos y Gastos Acumulados",
+            xaxis_title="Mes",
+            yaxis_title="USD",
             legend_title_text="",
-            template="plotly_dark",  # Changed to dark template
             title_font_size=24,  # Increased title font size
-            title_font_color="#e0e0e0",  # Light color for dark background
-            font=dict(size=14, color="#e0e0e0"),  # Increased font size
-            plot_bgcolor='#2d2d2d',  # Dark background
-            paper_bgcolor='#2d2d2d',  # Dark background
             margin=dict(l=80, r=80, t=120, b=80),  # Increased margins for better spacing
             hovermode='x unified',
             hoverlabel=dict(
@@ -69,56 +162,23 @@ class ChartGenerator:
                 y=0.98,  # Positioned closer to the chart
                 xanchor="center",
                 x=0.5,  # Centered horizontally
-                bgcolor='rgba(45, 45, 45, 0.8)',  # Semi-transparent dark background
                 bordercolor='#555555',
                 borderwidth=1,
-                font=dict(size=13, color="#e0e0e0"),  # Increased legend font size
                 itemsizing='constant',
                 itemwidth=40,  # Increased item width
                 itemclick=False,  # Disable click to hide/show
                 itemdoubleclick=False
             ),
-            # Increased chart size for better visibility
-            width=1200,  # Increased width
-            height=700   # Increased height
-        )
-        
-        # Update line colors and styles
-        colors = ['#e74c3c', '#4CAF50', '#3498db']  # Red for expenses, Green for income, Blue for difference
-        
-        # Update all traces with common styling
-        fig.update_traces(
-            line=dict(width=4),  # Increased line width for better visibility
-            hovertemplate='<b>%{fullData.name}</b><br>Mes: %{x}<br>USD: $%{y:,.0f}<extra></extra>'
-        )
-        
-        # Update individual trace colors using update_traces with selector
-        trace_names = ["Gasto Acumulado por Mes (USD)", "Ingreso Acumulado por Mes (USD)", "Diferencia Entre Ingresos y Gastos (USD)"]
-        for i, (name, color) in enumerate(zip(trace_names, colors)):
-            fig.update_traces(
-                line_color=color,
-                selector=dict(name=name)
-            )
-        
-        # Update axes for dark theme
-        fig.update_xaxes(
-            gridcolor='#444444',
-            zerolinecolor='#444444',
-            showgrid=True,
-            color='#e0e0e0'
-        )
-        
-        fig.update_yaxes(
-            gridcolor='#444444',
-            zerolinecolor='#444444',
-            showgrid=True,
-            color='#e0e0e0'
+            width=ancho,
+            height=alto
         )
+        fig.update_xaxes(showgrid=True)
+        fig.update_yaxes(showgrid=True)
         
         return fig
     
     @staticmethod
-    def create_summary_chart(df: pd.DataFrame) -> go.Figure:
+    def create_summary_chart(df: pd.DataFrame) -> "go.Figure":
         """
         Create a summary chart showing key metrics with dark theme
         
@@ -128,6 +188,8 @@ class ChartGenerator:
         Returns:
             go.Figure: Plotly figure object
         """
+        import plotly.graph_objects as go
+
         # Calculate summary metrics
         total_ingresos = df['Ingresos por Down Payment + Cuotas Mensuales (USD)'].sum()
         total_gastos_construccion = df['Gastos Construcción (USD)'].sum()
@@ -149,34 +211,150 @@ class ChartGenerator:
             )
         ])
         
+        ChartGenerator._aplicar_tema(fig)
         fig.update_layout(
-            title="Resumen Financiero del Proyecto",
-            title_font_size=22,  # Increased title font size
-            title_font_color="#e0e0e0",
+            title_text="Resumen Financiero del Proyecto",
             xaxis_title="Categorías",
             yaxis_title="USD",
-            template="plotly_dark",
-            plot_bgcolor='#2d2d2d',
-            paper_bgcolor='#2d2d2d',
-            margin=dict(l=80, r=80, t=100, b=80),  # Increased margins
             showlegend=False,
-            font=dict(color="#e0e0e0", size=14),  # Increased font size
             # Increased chart size for better visibility
             width=1200,  # Increased width
             height=600   # Increased height
         )
         
-        # Update axes for dark theme
-        fig.update_xaxes(
-            gridcolor='#444444',
-            zerolinecolor='#444444',
-            color='#e0e0e0'
+        return fig 
+    
+    @staticmethod
+    def create_monte_carlo_chart(bandas: pd.DataFrame, max_puntos: Optional[int] = MAX_PUNTOS) -> "go.Figure":
+        """
+        Create the Monte Carlo chart with percentile bands of "Acumulado (USD)"
+        
+        Args:
+            bandas: Percentile bands per month (Mes plus one column per percentile,
+                lowest to highest, as returned by MonteCarloSimulator.simular)
+            max_puntos: Points per line (see reducir_puntos); None draws every month
+            
+        Returns:
+            go.Figure: Plotly figure object
+        """
+        import plotly.graph_objects as go
+
+        percentiles = [col for col in bandas.columns if col != "Mes"]
+        inferior, superior = percentiles[0], percentiles[-1]
+        central = percentiles[len(percentiles) // 2]
+        meses = bandas["Mes"].to_numpy()
+        
+        def linea(columna):
+            valores = bandas[columna].to_numpy(dtype=np.float64)
+            indices = ChartGenerator.reducir_puntos(meses, valores, max_puntos)
+            return meses[indices], valores[indices]
+        
+        fig = go.Figure()
+        x, y = linea(superior)
+        fig.add_trace(go.Scattergl(
+            x=x, y=y, mode="lines", line=dict(width=0),
+            name=superior, showlegend=False, hoverinfo="skip"
+        ))
+        x, y = linea(inferior)
+        fig.add_trace(go.Scattergl(
+            x=x, y=y, mode="lines", line=dict(width=0),
+            fill="tonexty", fillcolor="rgba(52, 152, 219, 0.3)",
+            name=f"Banda {inferior}-{superior}", hoverinfo="skip"
+        ))
+        x, y = linea(central)
+        fig.add_trace(go.Scattergl(
+            x=x, y=y, mode="lines",
+            line=dict(color="#3498db", width=4), name=f"Acumulado {central}",
+            hovertemplate='<b>%{fullData.name}</b><br>Mes: %{x}<br>USD: $%{y:,.0f}<extra></extra>'
+        ))
+        
+        ChartGenerator._aplicar_tema(fig)
+        fig.update_layout(
+            title_text="Simulación Monte Carlo - Acumulado (USD)",
+            xaxis_title="Mes",
+            yaxis_title="USD",
+            hovermode='x unified',
+            legend=dict(orientation="h", yanchor="bottom", y=0.98, xanchor="center", x=0.5),
+            height=600
         )
         
-        fig.update_yaxes(
-            gridcolor='#444444',
-            zerolinecolor='#444444',
-            color='#e0e0e0'
+        return fig
+    
+    @staticmethod
+    def create_comparison_chart(comparacion: Dict[str, Any], max_puntos: Optional[int] = MAX_PUNTOS) -> "go.Figure":
+        """
+        Create one chart with the "Acumulado (USD)" curve of every compared scenario
+        
+        Args:
+            comparacion: Output of ScenarioComparator.comparar
+            max_puntos: Points per line (see reducir_puntos); None draws every month
+            
+        Returns:
+            go.Figure: Plotly figure object
+        """
+        import plotly.graph_objects as go
+
+        fig = go.Figure()
+        for nombre, curva in zip(comparacion['nombres'], comparacion['acumulado']):
+            # Each curve is NaN past its own timeline
+            meses = np.flatnonzero(~np.isnan(curva))
+            indices = ChartGenerator.reducir_puntos(meses, curva[meses], max_puntos)
+            fig.add_trace(go.Scattergl(
+                x=meses[indices], y=curva[meses[indices]], mode="lines", name=nombre, line=dict(width=3),
+                hovertemplate='<b>%{fullData.name}</b><br>Mes: %{x}<br>USD: $%{y:,.0f}<extra></extra>'
+            ))
+        
+        fig.add_hline(y=0, line_color="#e0e0e0", line_dash="dash")
+        ChartGenerator._aplicar_tema(fig)
+        fig.update_layout(
+            title_text="Comparación de Escenarios - Acumulado (USD)",
+            xaxis_title="Mes",
+            yaxis_title="USD",
+            legend=dict(font=dict(size=12)),
+            height=600
         )
         
-        return fig 
\ No newline at end of file
+        return fig
+    
+    @staticmethod
+    def create_tornado_chart(tornado: pd.DataFrame, titulo: str, formato: str = "$,.0f") -> "go.Figure":
+        """
+        Create a tornado chart: one bar per input from the base result to the
+        result at its low and high values, the widest range on top
+        
+        Args:
+            tornado: One metric's table from SensitivityAnalyzer.tornado
+            titulo: Chart title (the metric name)
+            formato: d3 format of the metric values (e.g. ".1%" for the TIR)
+            
+        Returns:
+            go.Figure: Plotly figure object
+        """
+        import plotly.graph_objects as go
+
+        # Plotly draws the first category at the bottom
+        tabla = tornado.iloc[::-1]
+        base = float(tabla["Base"].iloc[0]) if len(tabla) else 0.0
+        
+        fig = go.Figure()
+        for lado, color in (("Bajo", "#e74c3c"), ("Alto", "#2ecc71")):
+            fig.add_trace(go.Bar(
+                y=tabla["Variable"], x=tabla[f"Resultado {lado}"] - base, base=base, orientation="h",
+                name=f"Valor {lado.lower()}", marker_color=color,
+                customdata=tabla[[f"Valor {lado}", f"Resultado {lado}"]],
+                hovertemplate=(f'<b>%{{y}}</b><br>Valor: %{{customdata[0]:,.4g}}<br>'
+                               f'Resultado: %{{customdata[1]:{formato}}}<extra></extra>')
+            ))
+        
+        fig.add_vline(x=base, line_color="#e0e0e0", line_dash="dash")
+        ChartGenerator._aplicar_tema(fig)
+        fig.update_layout(
+            title_text=f"Sensibilidad - {titulo}",
+            xaxis_title=titulo,
+            xaxis_tickformat=formato,
+            barmode="overlay",
+            legend=dict(orientation="h", yanchor="bottom", y=0.98, xanchor="center", x=0.5),
+            height=max(400, 60 * len(tabla) + 180)
+        )
+        
+        return fig
@@ -0,0 +1,195 @@
+# cli.py - Headless batch runner for the cash flow model
+"""
+Run CashFlowCalculator on a file of scenarios without the Streamlit UI.
+
+Usage:
+    python cli.py escenarios.csv --salida resultados --formato xlsx --tablas --jobs 4
+
+Scenarios come from CSV, JSON or YAML, one per row/object, with columns named
+like the generar_flujo_caja parameters plus an optional "nombre" column.
+Streamlit and Plotly are never imported, so the runner starts fast.
+"""
+import argparse
+import json
+import os
+import sys
+from functools import partial
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from cash_flow_calculator import CashFlowCalculator
+from scenario_sweep import ScenarioSweepRunner
+from table_exporter import TableExporter
+
+COLUMNA_NOMBRE = "nombre"
+COLUMNA_COSTO_OPORTUNIDAD = "Costo de Oportunidad Mensual (USD)"
+
+
+def leer_escenarios(ruta: str, tamano_chunk: int) -> Iterator[pd.DataFrame]:
+    """
+    Read scenarios lazily in chunks
+
+    Args:
+        ruta: CSV, JSON or YAML file; JSON/YAML hold a list of scenarios or
+            {"escenarios": [...]}
+        tamano_chunk: Scenarios per chunk
+
+    Yields:
+        pd.DataFrame: Chunks of scenarios (CSV files are never fully loaded)
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".csv":
+        for chunk in pd.read_csv(ruta, chunksize=tamano_chunk):
+            yield validar_escenarios(chunk)
+        return
+
+    with open(ruta, encoding="utf-8") as archivo:
+        if extension == ".json":
+            datos = json.load(archivo)
+        elif extension in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError as error:
+                raise ImportError("Leer escenarios YAML requiere pyyaml (pip install pyyaml)") from error
+            datos = yaml.safe_load(archivo)
+        else:
+            raise ValueError(f"Formato de escenarios no soportado: {extension or ruta}")
+
+    if isinstance(datos, dict):
+        datos = datos.get("escenarios", [datos])
+    escenarios = pd.DataFrame(datos)
+    for inicio in range(0, len(escenarios), tamano_chunk):
+        yield validar_escenarios(escenarios.iloc[inicio:inicio + tamano_chunk])
+
+
+def validar_escenarios(escenarios: pd.DataFrame) -> pd.DataFrame:
+    """
+    Check a chunk of scenarios before it is computed
+
+    Args:
+        escenarios: Chunk of scenarios, indexed by position in the file (from 0)
+
+    Returns:
+        pd.DataFrame: The same chunk
+
+    Raises:
+        ValueError: A required column is missing, or a parameter cell is blank
+            (required parameters) or not a number; names the row and column
+    """
+    faltantes = [nombre for nombre, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items()
+                 if defecto is None and nombre not in escenarios.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas de parámetros: {', '.join(faltantes)}")
+
+    for columna, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items():
+        if columna not in escenarios.columns:
+            continue
+        valores = escenarios[columna]
+        numeros = pd.to_numeric(valores, errors="coerce")
+        invalidos = numeros.isna() if defecto is None else numeros.isna() & valores.notna()
+        if invalidos.any():
+            indice = invalidos.idxmax()
+            detalle = "vacía" if pd.isna(valores[indice]) else f"no numérica ({valores[indice]!r})"
+            raise ValueError(f"Escenario en la fila {indice + 1}, columna '{columna}': celda {detalle}")
+    return escenarios
+
+
+def procesar_chunk(escenarios: pd.DataFrame, incluir_tablas: bool) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Compute metrics (and optionally cash flow tables) for a chunk of scenarios
+
+    Args:
+        escenarios: Chunk of scenarios
+        incluir_tablas: Also build the long-format cash flow tables
+
+    Returns:
+        Tuple (metrics per scenario, cash flow rows of every scenario or None)
+    """
+    if COLUMNA_NOMBRE in escenarios.columns:
+        nombres = escenarios[COLUMNA_NOMBRE].astype(str).tolist()
+    else:
+        nombres = [f"escenario_{indice}" for indice in escenarios.index]
+
+    metricas = CashFlowCalculator.evaluate_batch(escenarios)
+    metricas.insert(0, "escenario", nombres)
+    metricas = metricas.reset_index(drop=True)
+    if not incluir_tablas:
+        return metricas, None
+
+    partes = []
+    for escenario, fila in zip(nombres, escenarios.to_dict("records")):
+        parametros = {
+            **CashFlowCalculator.PARAMETROS_ESCENARIO,
+            **{clave: int(valor) if clave in CashFlowCalculator.PARAMETROS_ENTEROS else valor
+               for clave, valor in fila.items()
+               if clave in CashFlowCalculator.PARAMETROS_ESCENARIO and not pd.isna(valor)}
+        }
+        flujo = CashFlowCalculator.valorizar_programa(
+            CashFlowCalculator.calcular_programa(
+                *(parametros[nombre] for nombre in CashFlowCalculator.PARAMETROS_PROGRAMA)
+            ),
+            **{nombre: parametros[nombre] for nombre in CashFlowCalculator.PARAMETROS_VALORIZACION}
+        )
+        # The TEA-specific label differs between scenarios; use one name for the whole table
+        df = flujo.to_frame(labels={'costo_oportunidad': COLUMNA_COSTO_OPORTUNIDAD})
+        df.insert(0, "Escenario", escenario)
+        partes.append(df)
+    return metricas, pd.concat(partes, ignore_index=True) if partes else None
+
+
+def construir_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Calcula flujos de caja y métricas para un archivo de escenarios (CSV/JSON/YAML)."
+    )
+    parser.add_argument("escenarios", help="Archivo de escenarios (.csv, .json, .yaml)")
+    parser.add_argument("--salida", default="resultados", help="Directorio de salida (default: resultados)")
+    parser.add_argument("--formato", choices=TableExporter.FORMATOS, default="csv",
+                        help="Formato de salida (default: csv)")
+    parser.add_argument("--tablas", action="store_true",
+                        help="Escribir también las tablas de flujo de caja de cada escenario")
+    parser.add_argument("--jobs", type=int, default=1, help="Procesos en paralelo (default: 1)")
+    parser.add_argument("--tamano-chunk", type=int, default=500,
+                        help="Escenarios por bloque de trabajo (default: 500)")
+    parser.add_argument("--silencioso", action="store_true", help="No mostrar el progreso")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = construir_parser().parse_args(argv)
+    if args.jobs < 1 or args.tamano_chunk < 1:
+        print("--jobs y --tamano-chunk deben ser al menos 1", file=sys.stderr)
+        return 2
+    os.makedirs(args.salida, exist_ok=True)
+
+    def progreso(completados, _total):
+        if not args.silencioso:
+            print(f"\rEscenarios procesados: {completados:,}", end="", file=sys.stderr, flush=True)
+
+    extension = TableExporter.EXTENSIONES[args.formato]
+    runner = ScenarioSweepRunner(num_workers=args.jobs, tamano_chunk=args.tamano_chunk, progreso=progreso)
+    resultados = runner.mapear_chunks(leer_escenarios(args.escenarios, args.tamano_chunk),
+                                      partial(procesar_chunk, incluir_tablas=args.tablas))
+
+    try:
+        with TableExporter(os.path.join(args.salida, f"metricas{extension}"), args.formato,
+                           hoja="Métricas") as metricas_out, \
+                TableExporter(os.path.join(args.salida, f"flujos{extension}"), args.formato) as flujos_out:
+            for metricas, tablas in resultados:
+                metricas_out.escribir(metricas)
+                if tablas is not None:
+                    flujos_out.escribir(tablas)
+    except ValueError as error:
+        if not args.silencioso:
+            print(file=sys.stderr)
+        print(f"{args.escenarios}: {error}", file=sys.stderr)
+        return 2
+
+    if not args.silencioso:
+        print(f"\nResultados escritos en {args.salida}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
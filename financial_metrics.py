@@ -0,0 +1,334 @@
+# financial_metrics.py
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+class FinancialMetrics:
+    """
+    Investment metrics of monthly net cash flows, vectorized across scenarios
+
+    Flows are 2-D arrays (scenario x month, month 0 first). Every sum runs in
+    month order, and long timelines can be fed block by block through the
+    state returned by descontar. The results do not depend on how scenarios
+    are batched or months are blocked, nor on trailing zero months. Wide
+    batches are discounted one month at a time across every scenario, which
+    gives the same numbers with far less per-row overhead.
+    """
+
+    # IRR: monthly rates searched (-98.6% to 4,000% a year; lower rates overflow the
+    # discount factors of long timelines), bracketing grid and Newton stopping rule
+    TIR_MENSUAL_MINIMA = -0.3
+    TIR_MENSUAL_MAXIMA = 1.0
+    PUNTOS_TIR = 8
+    TOLERANCIA_TIR = 1e-10
+    MAX_ITERACIONES_TIR = 100
+
+    # Cap on the (scenario x rate x month) work arrays of one discounting step, and
+    # scenario x rate count from which discounting steps month by month instead
+    ELEMENTOS_POR_BLOQUE = 1 << 16
+    FILAS_MES_A_MES = 64
+
+    @staticmethod
+    def acumular(valores: np.ndarray, acumulado=0.0) -> np.ndarray:
+        """
+        Running sum along the last axis, continuing the running sum of earlier months
+
+        Args:
+            valores: Monthly values (..., month)
+            acumulado: Sum of the earlier months (scalar or one per row)
+
+        Returns:
+            np.ndarray: Running sums, shaped like valores
+        """
+        valores = np.asarray(valores, dtype=np.float64)
+        suma = np.empty(valores.shape[:-1] + (valores.shape[-1] + 1,))
+        suma[..., 0] = acumulado
+        suma[..., 1:] = valores
+        return np.cumsum(suma, axis=-1, out=suma)[..., 1:]
+
+    @staticmethod
+    def descontar(flujos: np.ndarray, tasas_mensuales: np.ndarray, estado: Optional[Dict[str, Any]] = None,
+                  derivada: bool = False, payback: bool = False) -> Dict[str, Any]:
+        """
+        Discount a block of monthly flows at one or more monthly rates per scenario
+
+        Args:
+            flujos: Net flows (scenario x month) of the months following estado
+            tasas_mensuales: Rates (scenario x rate)
+            estado: Output for the previous block of months (None for the block starting at month 0)
+            derivada: Also track 'ponderado' (sum of month x discounted flow; the VAN
+                derivative is -ponderado / (1 + rate))
+            payback: Also track 'payback' (first month where the discounted running
+                sum is positive, -1 if none yet)
+
+        Returns:
+            Dict of (scenario x rate) arrays: 'van' (discounted sum so far) and
+            'siguiente' (discount factor of the next month), the optional ones,
+            and 'mes' (next month)
+        """
+        flujos = np.asarray(flujos, dtype=np.float64)
+        tasas_mensuales = np.asarray(tasas_mensuales, dtype=np.float64)
+        num_meses = flujos.shape[1]
+        descuentos = 1.0 / (1.0 + tasas_mensuales)
+        if estado is None:
+            estado = FinancialMetrics._estado_inicial(tasas_mensuales.shape, derivada, payback)
+        if num_meses == 0:
+            return estado
+
+        if tasas_mensuales.size >= FinancialMetrics.FILAS_MES_A_MES:
+            resultado = FinancialMetrics._descontar_mes_a_mes(flujos, descuentos, estado, derivada, payback)
+            if np.isfinite(resultado['siguiente']).all():
+                return resultado
+            # Overflowed discount factors need the masking below
+
+        resultado = {'mes': estado['mes'] + num_meses}
+        forma = tasas_mensuales.shape
+        with np.errstate(over='ignore', invalid='ignore'):
+            factores = np.empty(forma + (num_meses,))
+            factores[..., 0] = estado['siguiente']
+            factores[..., 1:] = descuentos[..., None]
+            np.cumprod(factores, axis=-1, out=factores)
+            # The leading slot carries the discounted sum of the earlier months
+            van = np.empty(forma + (num_meses + 1,))
+            van[..., 0] = estado['van']
+            terminos = van[..., 1:]
+            np.multiply(flujos[:, None, :], factores, out=terminos)
+            if not np.isfinite(factores[..., -1]).all():
+                # A month without flows adds nothing, even where its factor overflowed
+                terminos[np.broadcast_to(flujos[:, None, :] == 0.0, terminos.shape)] = 0.0
+            if derivada:
+                ponderado = np.empty_like(van)
+                ponderado[..., 0] = estado['ponderado']
+                np.multiply(terminos, np.arange(estado['mes'], estado['mes'] + num_meses), out=ponderado[..., 1:])
+                resultado['ponderado'] = np.cumsum(ponderado, axis=-1, out=ponderado)[..., -1]
+            np.cumsum(van, axis=-1, out=van)
+        if payback:
+            positivos = van[..., 1:] > 0
+            resultado['payback'] = np.where((estado['payback'] < 0) & positivos.any(axis=-1),
+                                            estado['mes'] + positivos.argmax(axis=-1), estado['payback'])
+        resultado['siguiente'] = factores[..., -1] * descuentos
+        resultado['van'] = van[..., -1]
+        return resultado
+
+    @staticmethod
+    def _estado_inicial(forma: tuple, derivada: bool, payback: bool) -> Dict[str, Any]:
+        """
+        descontar state before month 0
+        """
+        estado = {'mes': 0, 'siguiente': np.ones(forma), 'van': np.zeros(forma)}
+        if derivada:
+            estado['ponderado'] = np.zeros(forma)
+        if payback:
+            estado['payback'] = np.full(forma, -1, dtype=np.int64)
+        return estado
+
+    @staticmethod
+    def _descontar_mes_a_mes(flujos: np.ndarray, descuentos: np.ndarray, estado: Dict[str, Any],
+                             derivada: bool, payback: bool) -> Dict[str, Any]:
+        """
+        descontar for many rows: one vectorized step per month, with the same
+        products and sums in the same order as the running products and sums
+        """
+        factor = estado['siguiente'].copy()
+        van = estado['van'].copy()
+        termino = np.empty(factor.shape)
+        ponderado = estado['ponderado'].copy() if derivada else None
+        primer_positivo = estado['payback'].copy() if payback else None
+        with np.errstate(over='ignore', invalid='ignore'):
+            for mes, flujo in enumerate(np.ascontiguousarray(flujos.T), start=estado['mes']):
+                np.multiply(flujo[:, None], factor, out=termino)
+                np.add(van, termino, out=van)
+                if derivada:
+                    ponderado += termino * mes
+                if payback:
+                    primer_positivo[(primer_positivo < 0) & (van > 0)] = mes
+                np.multiply(factor, descuentos, out=factor)
+        resultado = {'mes': estado['mes'] + flujos.shape[1], 'siguiente': factor, 'van': van}
+        if derivada:
+            resultado['ponderado'] = ponderado
+        if payback:
+            resultado['payback'] = primer_positivo
+        return resultado
+
+    @staticmethod
+    def descontar_por_bloques(flujos: np.ndarray, tasas_mensuales: np.ndarray, derivada: bool = False,
+                              payback: bool = False) -> Dict[str, Any]:
+        """
+        descontar over a whole timeline, splitting the scenarios so the work arrays
+        stay small (a month-by-month pass needs no split)
+        """
+        flujos = np.asarray(flujos, dtype=np.float64)
+        tasas_mensuales = np.asarray(tasas_mensuales, dtype=np.float64)
+        num_escenarios, num_meses = flujos.shape
+        if tasas_mensuales.size >= FinancialMetrics.FILAS_MES_A_MES and num_meses:
+            resultado = FinancialMetrics._descontar_mes_a_mes(
+                flujos, 1.0 / (1.0 + tasas_mensuales),
+                FinancialMetrics._estado_inicial(tasas_mensuales.shape, derivada, payback), derivada, payback)
+            if np.isfinite(resultado['siguiente']).all():
+                return resultado
+        paso = max(FinancialMetrics.ELEMENTOS_POR_BLOQUE // max(tasas_mensuales.shape[1] * num_meses, 1), 1)
+        partes = [FinancialMetrics.descontar(flujos[inicio:inicio + paso], tasas_mensuales[inicio:inicio + paso],
+                                             derivada=derivada, payback=payback)
+                  for inicio in range(0, num_escenarios, paso)]
+        if not partes:
+            return FinancialMetrics.descontar(flujos, tasas_mensuales, derivada=derivada, payback=payback)
+        return {clave: np.concatenate([parte[clave] for parte in partes]) if clave != 'mes' else num_meses
+                for clave in partes[0]}
+
+    @staticmethod
+    def van(flujos: np.ndarray, tasas_mensuales: np.ndarray) -> np.ndarray:
+        """
+        Net present value at month 0 of each scenario
+
+        Args:
+            flujos: Net flows (scenario x month)
+            tasas_mensuales: Monthly discount rate of each scenario
+
+        Returns:
+            np.ndarray: One VAN per scenario
+        """
+        return FinancialMetrics.descontar_por_bloques(flujos, np.asarray(tasas_mensuales)[:, None])['van'][:, 0]
+
+    @staticmethod
+    def payback_descontado(flujos: np.ndarray, tasas_mensuales: np.ndarray) -> np.ndarray:
+        """
+        First month where the discounted running sum of the flows turns positive (-1 if never)
+        """
+        return FinancialMetrics.descontar_por_bloques(flujos, np.asarray(tasas_mensuales)[:, None],
+                                                      payback=True)['payback'][:, 0]
+
+    @staticmethod
+    def capital_maximo(flujos: np.ndarray) -> np.ndarray:
+        """
+        Peak equity: largest shortfall of the running sum of the flows (0 if never negative)
+        """
+        acumulado = np.cumsum(np.asarray(flujos, dtype=np.float64), axis=-1)
+        return np.maximum(-acumulado, 0.0).max(axis=-1, initial=0.0)
+
+    @staticmethod
+    def moic(flujos: np.ndarray) -> np.ndarray:
+        """
+        Multiple on invested capital: positive flows over negative flows (NaN without negative flows)
+        """
+        flujos = np.asarray(flujos, dtype=np.float64)
+        if flujos.shape[-1] == 0:
+            return np.full(flujos.shape[:-1], np.nan)
+        distribuido = np.cumsum(np.where(flujos > 0, flujos, 0.0), axis=-1)[..., -1]
+        aportado = np.cumsum(np.where(flujos < 0, -flujos, 0.0), axis=-1)[..., -1]
+        return np.divide(distribuido, aportado, out=np.full(aportado.shape, np.nan), where=aportado > 0)
+
+    @staticmethod
+    def tir(flujos: np.ndarray) -> np.ndarray:
+        """
+        Internal rate of return of each scenario, as an effective annual rate (like the TEA)
+
+        Args:
+            flujos: Net flows (scenario x month)
+
+        Returns:
+            np.ndarray: One IRR per scenario (NaN when undefined, see tir_por_valoracion)
+        """
+        flujos = np.asarray(flujos, dtype=np.float64)
+
+        def valorar(tasas, filas, derivada):
+            return FinancialMetrics.descontar_por_bloques(flujos[filas], tasas, derivada=derivada)
+
+        return FinancialMetrics.tir_por_valoracion(valorar, len(flujos))
+
+    @staticmethod
+    def tir_por_valoracion(valorar: Callable[[np.ndarray, np.ndarray, bool], Dict[str, Any]],
+                           num_escenarios: int) -> np.ndarray:
+        """
+        IRR search shared by every path, vectorized across scenarios
+
+        The VAN is valued on a grid of PUNTOS_TIR + 2 monthly rates and the first
+        sign change brackets the root (an exact zero on the grid is the IRR).
+        Then every scenario takes Newton steps at once, falling back to
+        bisection whenever a step leaves the bracket, until a step or the
+        bracket is below TOLERANCIA_TIR.
+
+        Args:
+            valorar: Function (rates of shape scenario x rate, scenario rows, derivada) ->
+                descontar output for those rows over the whole timeline
+            num_escenarios: Number of scenarios
+
+        Returns:
+            np.ndarray: Annual IRR per scenario; NaN when the VAN does not change sign
+            between TIR_MENSUAL_MINIMA and TIR_MENSUAL_MAXIMA
+        """
+        tir_mensual = np.full(num_escenarios, np.nan)
+        if num_escenarios == 0:
+            return tir_mensual
+        todas = np.arange(num_escenarios)
+        grilla = np.linspace(FinancialMetrics.TIR_MENSUAL_MINIMA, FinancialMetrics.TIR_MENSUAL_MAXIMA,
+                             FinancialMetrics.PUNTOS_TIR + 2)
+        valores = valorar(np.broadcast_to(grilla, (num_escenarios, len(grilla))), todas, False)['van']
+
+        # First exact zero or sign change on the grid (pairs with an undefined VAN never bracket)
+        ceros = valores == 0.0
+        cambios = ((np.signbit(valores[:, :-1]) != np.signbit(valores[:, 1:]))
+                   & ~np.isnan(valores[:, :-1]) & ~np.isnan(valores[:, 1:]))
+        hay_cero, hay_cambio = ceros.any(axis=1), cambios.any(axis=1)
+        primer_cero, primer_cambio = ceros.argmax(axis=1), cambios.argmax(axis=1)
+        en_cero = hay_cero & (~hay_cambio | (primer_cero <= primer_cambio))
+        tir_mensual[en_cero] = grilla[primer_cero[en_cero]]
+
+        activas = np.flatnonzero(hay_cambio & ~en_cero)
+        bajo, alto = grilla[primer_cambio[activas]], grilla[primer_cambio[activas] + 1]
+        signo_bajo = np.signbit(valores[activas, primer_cambio[activas]])
+        tasa = (bajo + alto) / 2
+        for _ in range(FinancialMetrics.MAX_ITERACIONES_TIR):
+            if not len(activas):
+                break
+            estado = valorar(tasa[:, None], activas, True)
+            van, derivada = estado['van'][:, 0], -estado['ponderado'][:, 0] / (1.0 + tasa)
+            mismo_lado = np.signbit(van) == signo_bajo
+            bajo, alto = np.where(mismo_lado, tasa, bajo), np.where(mismo_lado, alto, tasa)
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                newton = tasa - van / derivada
+            siguiente = np.where(np.isfinite(newton) & (newton > bajo) & (newton < alto), newton, (bajo + alto) / 2)
+            terminada = (van == 0.0) | (np.abs(siguiente - tasa) <= FinancialMetrics.TOLERANCIA_TIR) \
+                | (alto - bajo <= FinancialMetrics.TOLERANCIA_TIR)
+            tir_mensual[activas[terminada]] = np.where(van == 0.0, tasa, siguiente)[terminada]
+            seguir = ~terminada
+            activas, bajo, alto, signo_bajo, tasa = (activas[seguir], bajo[seguir], alto[seguir],
+                                                     signo_bajo[seguir], siguiente[seguir])
+        tir_mensual[activas] = tasa
+        return (1 + tir_mensual) ** 12 - 1
+
+    @staticmethod
+    def calcular(flujos: np.ndarray, tasas_mensuales: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Every investment metric of a batch of scenarios
+
+        Args:
+            flujos: Net flows (scenario x month)
+            tasas_mensuales: Monthly discount (opportunity cost) rate of each scenario
+
+        Returns:
+            Dict of arrays: capital_maximo, van, tir, moic and payback_descontado (-1 if never)
+        """
+        descontado = FinancialMetrics.descontar_por_bloques(flujos, np.asarray(tasas_mensuales)[:, None], payback=True)
+        return {
+            'capital_maximo': FinancialMetrics.capital_maximo(flujos),
+            'van': descontado['van'][:, 0],
+            'tir': FinancialMetrics.tir(flujos),
+            'moic': FinancialMetrics.moic(flujos),
+            'payback_descontado': descontado['payback'][:, 0],
+        }
+
+    @staticmethod
+    def a_escalares(metricas: Dict[str, np.ndarray], fila: int = 0) -> Dict[str, Any]:
+        """
+        One scenario of calcular's output as Python scalars, in the calcular_metricas_financieras
+        style ("No alcanzado" for a payback never reached, None for an undefined TIR or MOIC)
+        """
+        resultado = {}
+        for nombre, valores in metricas.items():
+            valor = valores[fila].item()
+            if nombre == 'payback_descontado':
+                resultado[nombre] = valor if valor >= 0 else "No alcanzado"
+            else:
+                resultado[nombre] = valor if valor == valor else None
+        return resultado
@@ -0,0 +1,254 @@
+# monte_carlo.py
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from cash_flow_calculator import CashFlowCalculator
+from stage_scheduler import StageScheduler
+
+
+class MonteCarloSimulator:
+    """
+    Monte Carlo simulation of the cash flow with stochastic monthly sales and prices
+    """
+
+    DISTRIBUCIONES_VENTAS = ("poisson", "binomial_negativa")
+    DISTRIBUCIONES_PRECIO = ("fijo", "normal", "lognormal")
+
+    @staticmethod
+    def simular(parametros: Dict[str, Any], num_caminos: int = 10000,
+                distribucion_ventas: str = "poisson", dispersion_ventas: float = 2.0,
+                distribucion_precio: str = "normal", volatilidad_precio: float = 0.05,
+                horizonte_meses: Optional[int] = None, semilla: Optional[int] = None,
+                percentiles: Sequence[float] = (5, 50, 95)) -> Dict[str, Any]:
+        """
+        Simulate many cash flow paths at once, vectorized across paths
+
+        Each path draws its monthly sales around tasa_ventas and one price around
+        precio_por_duplex, applied to every duplex it sells; the etapa rules and
+        the monetary calculations are the same as in CashFlowCalculator.
+
+        Unless a horizon is given, each path runs until it sells out plus the
+        cuotas of its last sale (at least to the end of construction), like
+        the exact timeline of generar_flujo_caja, so slow paths are not cut
+        short; paths that never sell out stop at MESES_MAXIMOS.
+
+        Args:
+            parametros: generar_flujo_caja parameters (e.g. the sidebar inputs), optionally
+                with per-etapa specs under 'etapas'
+            num_caminos: Number of simulated paths (at least 1)
+            distribucion_ventas: "poisson" or "binomial_negativa" (mean tasa_ventas)
+            dispersion_ventas: Negative binomial shape; lower values mean burstier sales
+            distribucion_precio: Distribution of each path's price: "fijo", "normal" or
+                "lognormal" (mean precio_por_duplex)
+            volatilidad_precio: Price standard deviation relative to precio_por_duplex
+            horizonte_meses: Months simulated for every path (default:
+                parametros['horizonte_meses'] when set, else each path's own timeline)
+            semilla: Random seed for reproducible results
+            percentiles: Percentiles reported for every distribution
+
+        Returns:
+            Dict with the "Acumulado (USD)" percentile bands per month, peak capital
+            invested percentiles and the recovery month distribution;
+            'horizonte_meses' is the longest path
+
+        Raises:
+            ValueError: On unknown distributions, missing parameters or num_caminos < 1
+        """
+        if num_caminos < 1:
+            raise ValueError(f"num_caminos debe ser al menos 1 (recibido: {num_caminos})")
+        if distribucion_ventas not in MonteCarloSimulator.DISTRIBUCIONES_VENTAS:
+            raise ValueError(f"Distribución de ventas desconocida: {distribucion_ventas!r}")
+        if distribucion_precio not in MonteCarloSimulator.DISTRIBUCIONES_PRECIO:
+            raise ValueError(f"Distribución de precio desconocida: {distribucion_precio!r}")
+
+        p = {nombre: parametros.get(nombre, defecto)
+             for nombre, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items()}
+        faltantes = [nombre for nombre, valor in p.items() if valor is None]
+        if faltantes:
+            raise ValueError(f"Faltan parámetros: {', '.join(faltantes)}")
+
+        if horizonte_meses is None and p['horizonte_meses'] > 0:
+            horizonte_meses = p['horizonte_meses']
+        etapas, _, total_meses = CashFlowCalculator._programar_etapas(
+            p['duplex_por_etapa'], p['meses_por_etapa'], p['total_etapas'],
+            p['tasa_ventas'], p['num_cuotas_restantes'], parametros.get('etapas'), horizonte_meses or 0
+        )
+        total_meses_construccion = int(StageScheduler.fin_construccion(etapas)[-1]) if etapas else 0
+        num_cuotas_restantes = int(p['num_cuotas_restantes'])
+        # Without a fixed horizon, paths slower than the deterministic schedule keep selling
+        limite = None if horizonte_meses is not None else max(total_meses_construccion,
+                                                               CashFlowCalculator.MESES_MAXIMOS)
+        rng = np.random.default_rng(semilla)
+
+        # Precios por camino; down payment and cuotas keep the deterministic proportions
+        precio_base = float(p['precio_por_duplex'])
+        if distribucion_precio == "normal":
+            precios = np.maximum(rng.normal(precio_base, volatilidad_precio * precio_base, num_caminos), 0.0)
+        elif distribucion_precio == "lognormal":
+            sigma = np.sqrt(np.log1p(volatilidad_precio ** 2))
+            precios = rng.lognormal(np.log(precio_base) - sigma ** 2 / 2, sigma, num_caminos) if precio_base > 0 \
+                else np.zeros(num_caminos)
+        else:
+            precios = np.full(num_caminos, precio_base)
+
+        base = {nombre: np.array([valor]) for nombre, valor in p.items()}
+        down_payment_base, cuota_base, tasa_mensual = CashFlowCalculator._estructura_pago_lote(base)
+        proporcion_down_payment = down_payment_base[0] / precio_base if precio_base else 0.0
+        proporcion_cuota = cuota_base[0] / precio_base if precio_base else 0.0
+
+        duplex_vendidos = MonteCarloSimulator._simular_ventas_caminos(
+            rng, num_caminos, total_meses, etapas, p['tasa_ventas'], distribucion_ventas, dispersion_ventas, limite
+        )
+
+        def por_camino(valor):
+            return np.full(num_caminos, valor)
+
+        if limite is None:
+            meses_camino = por_camino(horizonte_meses)
+        else:
+            # Each path ends like the exact timeline: the later of the end of
+            # construction and the last cuota of its last sale
+            con_ventas = duplex_vendidos > 0
+            ultima_venta = np.where(con_ventas.any(axis=1),
+                                    duplex_vendidos.shape[1] - 1 - np.argmax(con_ventas[:, ::-1], axis=1), 0)
+            meses_camino = np.maximum(total_meses_construccion, ultima_venta + num_cuotas_restantes)
+            if p['tasa_ventas'] > 0:
+                agotados = duplex_vendidos.sum(axis=1) == sum(etapa['duplex'] for etapa in etapas)
+                meses_camino = np.where(agotados, meses_camino, limite)
+            meses_camino = np.minimum(meses_camino, limite)
+            horizonte_meses = int(meses_camino.max())
+            duplex_vendidos = np.pad(duplex_vendidos[:, :horizonte_meses + 1],
+                                     ((0, 0), (0, max(horizonte_meses + 1 - duplex_vendidos.shape[1], 0))))
+            # Sales past a path's own end are not valued (nor paid commission)
+            duplex_vendidos[np.arange(horizonte_meses + 1)[None, :] > meses_camino[:, None]] = 0
+
+        columnas = CashFlowCalculator._valorizar_lote(
+            duplex_vendidos, meses_camino, por_camino(float(p['inversion_inicial'])),
+            por_camino(float(p['gasto_construccion_mensual'])),
+            por_camino(total_meses_construccion), por_camino(float(p['comision_por_venta'])),
+            precios * proporcion_down_payment, precios * proporcion_cuota,
+            por_camino(num_cuotas_restantes), por_camino(tasa_mensual[0])
+        )
+        metricas = CashFlowCalculator._metricas_lote(columnas)
+        etiquetas = [f"P{q:g}" for q in percentiles]
+
+        bandas = pd.DataFrame(np.percentile(columnas['acumulado'], percentiles, axis=0).T, columns=etiquetas)
+        bandas.insert(0, "Mes", np.arange(horizonte_meses + 1))
+
+        capital_maximo = columnas['capital_invertido'].max(axis=1)
+        mes_recuperacion = metricas['mes_recuperacion']
+        recuperados = mes_recuperacion[mes_recuperacion >= 0]
+        meses_distintos, caminos = np.unique(recuperados, return_counts=True)
+        distribucion_recuperacion = pd.DataFrame({
+            "Mes": meses_distintos,
+            "Caminos": caminos,
+            "Probabilidad": caminos / num_caminos,
+        })
+
+        return {
+            'bandas_acumulado': bandas,
+            'capital_maximo': dict(zip(etiquetas, np.percentile(capital_maximo, percentiles))),
+            'ganancia_neta': dict(zip(etiquetas, np.percentile(metricas['ganancia_neta'], percentiles))),
+            'mes_recuperacion': dict(zip(etiquetas, np.percentile(recuperados, percentiles)))
+            if len(recuperados) else {etiqueta: None for etiqueta in etiquetas},
+            'distribucion_recuperacion': distribucion_recuperacion,
+            'probabilidad_recuperacion': len(recuperados) / num_caminos,
+            'num_caminos': num_caminos,
+            'horizonte_meses': horizonte_meses,
+        }
+
+    @staticmethod
+    def _simular_ventas_caminos(rng: np.random.Generator, num_caminos: int, total_meses: int,
+                                etapas: List[Dict[str, Any]], tasa_ventas: float, distribucion_ventas: str,
+                                dispersion_ventas: float, limite: Optional[int] = None) -> np.ndarray:
+        """
+        Simulate the etapa sales schedule for every path at once
+
+        Monthly demand is drawn in blocks of months; each month a path sells
+        min(demand, duplexes left in its open etapas), following the etapa
+        rules of StageScheduler.
+
+        Args:
+            total_meses: Months simulated
+            limite: When given, keep simulating past total_meses until every
+                path sells out or this month is reached
+
+        Returns:
+            np.ndarray: Duplexes sold (path x month), total_meses + 1 months or more
+        """
+        tasa = max(float(tasa_ventas), 0.0)
+
+        def sortear_demanda(meses):
+            forma = (num_caminos, meses)
+            if distribucion_ventas == "binomial_negativa" and tasa > 0:
+                return rng.negative_binomial(dispersion_ventas, dispersion_ventas / (dispersion_ventas + tasa), forma)
+            return rng.poisson(tasa, forma)
+
+        demanda = sortear_demanda(total_meses + 1)
+        ventas = np.zeros((num_caminos, total_meses + 1), dtype=np.int64)
+        numero_etapas = len(etapas)
+        if numero_etapas == 0:
+            return ventas
+        if limite is None or tasa == 0:
+            limite = total_meses
+        sin_fecha = np.iinfo(np.int64).max // 2
+        inicio_venta = np.array([etapa['inicio_venta'] for etapa in etapas], dtype=np.int64)
+        espera = np.array([k > 0 and not etapa['solapar'] for k, etapa in enumerate(etapas)])
+        restante = np.tile(np.array([etapa['duplex'] for etapa in etapas], dtype=np.int64), (num_caminos, 1))
+        # First sales month and sell-out month of each etapa per path (sin_fecha until known)
+        apertura = np.tile(np.where(espera, sin_fecha, inicio_venta), (num_caminos, 1))
+        agotamiento = np.full((num_caminos, numero_etapas), sin_fecha, dtype=np.int64)
+
+        def resolver_aperturas(filas):
+            # Only paths that just sold out an etapa can unlock a waiting one
+            apertura_filas, agotamiento_filas, restante_filas = apertura[filas], agotamiento[filas], restante[filas]
+            while True:
+                previas = np.maximum.accumulate(agotamiento_filas, axis=1)
+                previas = np.concatenate([np.zeros((len(filas), 1), dtype=np.int64), previas[:, :-1]], axis=1)
+                pendiente = espera & (apertura_filas == sin_fecha) & (previas != sin_fecha)
+                apertura_filas[pendiente] = np.maximum(inicio_venta, previas + 1)[pendiente]
+                sin_unidades = (restante_filas == 0) & (agotamiento_filas == sin_fecha) & (apertura_filas != sin_fecha)
+                if not sin_unidades.any():
+                    break
+                agotamiento_filas[sin_unidades] = apertura_filas[sin_unidades]
+            apertura[filas], agotamiento[filas] = apertura_filas, agotamiento_filas
+            return apertura_filas.min(axis=0)
+
+        apertura_minima = resolver_aperturas(np.arange(num_caminos))
+        primera = 0
+        mes = 0
+        while mes < limite:
+            mes += 1
+            # Only the etapas open in some path take part this month
+            while primera < numero_etapas and not restante[:, primera].any():
+                primera += 1
+            if mes > total_meses:
+                if primera == numero_etapas:
+                    break
+                if mes == demanda.shape[1]:
+                    # One more block of months, as long as the ones so far
+                    bloque = min(demanda.shape[1], limite + 1 - mes)
+                    demanda = np.concatenate([demanda, sortear_demanda(bloque)], axis=1)
+                    ventas = np.concatenate([ventas, np.zeros((num_caminos, bloque), dtype=np.int64)], axis=1)
+            abiertas = np.nonzero(apertura_minima[primera:] <= mes)[0]
+            if primera == numero_etapas or len(abiertas) == 0:
+                continue
+            ventana = slice(primera, primera + abiertas[-1] + 1)
+
+            restante_ventana = restante[:, ventana]
+            disponibles = np.where((apertura[:, ventana] <= mes) & (restante_ventana > 0), restante_ventana, 0)
+            # Demand is served from the open etapas in order
+            previos = np.cumsum(disponibles, axis=1) - disponibles
+            vendidos = np.clip(demanda[:, mes, None] - previos, 0, disponibles)
+            restante_ventana -= vendidos
+            ventas[:, mes] = vendidos.sum(axis=1)
+
+            agotadas = (vendidos > 0) & (restante_ventana == 0)
+            if agotadas.any():
+                # The sell-out is seen next month; a waiting etapa may sell the month after
+                agotamiento[:, ventana][agotadas] = mes + 1
+                apertura_minima = np.minimum(apertura_minima, resolver_aperturas(np.nonzero(agotadas.any(axis=1))[0]))
+
+        return ventas
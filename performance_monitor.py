@@ -0,0 +1,194 @@
+# performance_monitor.py
+import contextlib
+import cProfile
+import itertools
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, ContextManager, Deque, Dict, Iterator, Optional
+
+
+class PerformanceMonitor:
+    """
+    Timing and allocation spans around the app's hot paths, grouped per rerun
+
+    Disabled by default: span() and rerun() then return one shared no-op
+    context manager, so instrumented code pays a single attribute check.
+    STREAMLINE_INSTRUMENTACION=1 times the spans, STREAMLINE_INSTRUMENTACION=memoria
+    also records the memory each span leaves allocated (tracemalloc), and
+    STREAMLINE_PERFILES=<directory> additionally writes a cProfile profile and a
+    tracemalloc snapshot of every rerun to that directory.
+    """
+
+    DIRECTORIO_PERFILES = os.environ.get("STREAMLINE_PERFILES") or None
+    MEMORIA = os.environ.get("STREAMLINE_INSTRUMENTACION", "0") == "memoria" or DIRECTORIO_PERFILES is not None
+    ACTIVO = os.environ.get("STREAMLINE_INSTRUMENTACION", "0") != "0" or MEMORIA
+
+    # Reruns kept per session
+    HISTORIAL = 20
+
+    _SIN_MEDICION = contextlib.nullcontext()
+    # The rerun being recorded, per script thread
+    _local = threading.local()
+    _numero_perfil = itertools.count(1)
+
+    @staticmethod
+    def nuevo_historial() -> Deque[Dict[str, Any]]:
+        """
+        Empty history of the last HISTORIAL reruns
+        """
+        return deque(maxlen=PerformanceMonitor.HISTORIAL)
+
+    @staticmethod
+    def registro_actual() -> Optional[Dict[str, Any]]:
+        """
+        Record of the rerun running in this thread, if one is being recorded
+        """
+        return getattr(PerformanceMonitor._local, 'registro', None)
+
+    @staticmethod
+    def span(nombre: str, registro: Optional[Dict[str, Any]] = None) -> ContextManager:
+        """
+        Time (and with memory tracing, measure the allocations of) a block
+
+        Repeated spans of one name within a rerun add up.
+
+        Args:
+            nombre: Span name, e.g. "calculo"
+            registro: Rerun record to add the span to (default: the current rerun);
+                lets work done later in another thread, like a download, be
+                attributed to the rerun that offered it
+
+        Returns:
+            Context manager; a no-op when instrumentation is off
+        """
+        if not PerformanceMonitor.ACTIVO:
+            return PerformanceMonitor._SIN_MEDICION
+        return PerformanceMonitor._medir(nombre, registro)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _medir(nombre: str, registro: Optional[Dict[str, Any]]) -> Iterator[None]:
+        registro = PerformanceMonitor.registro_actual() if registro is None else registro
+        memoria = tracemalloc.is_tracing()
+        antes = tracemalloc.get_traced_memory()[0] if memoria else 0
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracion = (time.perf_counter() - inicio) * 1000
+            if registro is not None:
+                span = registro['spans'].setdefault(nombre, {'ms': 0.0, 'kib': None, 'llamadas': 0})
+                span['ms'] += duracion
+                span['llamadas'] += 1
+                if memoria:
+                    span['kib'] = (span['kib'] or 0.0) + (tracemalloc.get_traced_memory()[0] - antes) / 1024
+
+    @staticmethod
+    def iniciar_rerun(nombre: str = "app") -> Optional[Dict[str, Any]]:
+        """
+        Start recording a rerun in this thread
+
+        A rerun left unfinished (e.g. stopped by st.rerun) is discarded.
+
+        Args:
+            nombre: "app" for a full run, or the fragment that reran
+
+        Returns:
+            The new rerun record, or None when instrumentation is off
+        """
+        if not PerformanceMonitor.ACTIVO:
+            return None
+        PerformanceMonitor._descartar()
+        if PerformanceMonitor.MEMORIA and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        perfil = None
+        if PerformanceMonitor.DIRECTORIO_PERFILES is not None:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+            except ValueError:
+                # Another session's rerun holds the profiler; this one is only timed
+                perfil = None
+
+        registro = {'nombre': nombre, 'hora': time.time(), 'total_ms': None, 'spans': {}, 'perfil': None}
+        PerformanceMonitor._local.registro = registro
+        PerformanceMonitor._local.perfil = perfil
+        PerformanceMonitor._local.inicio = time.perf_counter()
+        return registro
+
+    @staticmethod
+    def terminar_rerun(historial: Optional[Deque[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Finish the rerun recorded in this thread and write its profile files
+
+        Args:
+            historial: History (see nuevo_historial) to append the record to
+
+        Returns:
+            The finished record ('perfil' is the path of its files without extension,
+            .prof and .tracemalloc), or None when no rerun was being recorded
+        """
+        registro = PerformanceMonitor.registro_actual()
+        if registro is None:
+            return None
+        registro['total_ms'] = (time.perf_counter() - PerformanceMonitor._local.inicio) * 1000
+        perfil = PerformanceMonitor._local.perfil
+        PerformanceMonitor._local.registro = PerformanceMonitor._local.perfil = None
+
+        if perfil is not None:
+            perfil.disable()
+            os.makedirs(PerformanceMonitor.DIRECTORIO_PERFILES, exist_ok=True)
+            ruta = os.path.join(
+                PerformanceMonitor.DIRECTORIO_PERFILES,
+                f"{time.strftime('%Y%m%d-%H%M%S')}-{next(PerformanceMonitor._numero_perfil):05d}-{registro['nombre']}"
+            )
+            perfil.dump_stats(ruta + ".prof")
+            tracemalloc.take_snapshot().dump(ruta + ".tracemalloc")
+            registro['perfil'] = ruta
+        if historial is not None:
+            historial.append(registro)
+        return registro
+
+    @staticmethod
+    def rerun(nombre: str, historial: Optional[Deque[Dict[str, Any]]] = None) -> ContextManager:
+        """
+        Record a fragment: a span of the app run when the whole app is running,
+        or a rerun of its own when only the fragment reruns
+
+        Args:
+            nombre: Fragment name
+            historial: History the fragment's own reruns are appended to
+
+        Returns:
+            Context manager; a no-op when instrumentation is off
+        """
+        if not PerformanceMonitor.ACTIVO:
+            return PerformanceMonitor._SIN_MEDICION
+        if PerformanceMonitor.registro_actual() is not None:
+            return PerformanceMonitor._medir(nombre, None)
+        return PerformanceMonitor._rerun_fragmento(nombre, historial)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _rerun_fragmento(nombre: str, historial: Optional[Deque[Dict[str, Any]]]) -> Iterator[None]:
+        PerformanceMonitor.iniciar_rerun(nombre)
+        try:
+            # Also a span, so the fragment lines up with its column of full runs
+            with PerformanceMonitor._medir(nombre, None):
+                yield
+        finally:
+            PerformanceMonitor.terminar_rerun(historial)
+
+    @staticmethod
+    def _descartar():
+        """
+        Drop the unfinished rerun of this thread, stopping its profiler
+        """
+        perfil = getattr(PerformanceMonitor._local, 'perfil', None)
+        if perfil is not None:
+            perfil.disable()
+        PerformanceMonitor._local.registro = PerformanceMonitor._local.perfil = None
@@ -0,0 +1,152 @@
+# result_cache.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+from cash_flow_calculator import CashFlowCalculator
+from stage_scheduler import StageScheduler
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of calculator results keyed on a canonical hash of the inputs
+    """
+
+    def __init__(self, max_entradas: int = 128, tolerancia: float = 1e-6):
+        """
+        Args:
+            max_entradas: Maximum cached results; the least recently used one is evicted
+            tolerancia: Floats closer than this are treated as the same input
+        """
+        if max_entradas < 1:
+            raise ValueError("max_entradas debe ser al menos 1")
+        self.max_entradas = max_entradas
+        self.tolerancia = tolerancia
+        self._entradas: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    @staticmethod
+    def normalizar_parametros(parametros: Dict[str, Any], tolerancia: float = 1e-6) -> Dict[str, Any]:
+        """
+        Reduce calculator inputs to the values that actually determine the result
+
+        Derived payment values are folded in (down_payment_amount and
+        cuota_restante_mensual are resolved the way generar_flujo_caja does) and
+        floats are rounded to multiples of the tolerance.
+
+        Args:
+            parametros: generar_flujo_caja parameters, including 'etapas' when given
+                (other extra keys are ignored)
+            tolerancia: Rounding step for floats
+
+        Returns:
+            Dict of normalized inputs
+        """
+        p = {nombre: parametros.get(nombre, defecto)
+             for nombre, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items()}
+
+        p['down_payment_amount'], p['cuota_restante_mensual'] = CashFlowCalculator._estructura_pago(
+            p['precio_por_duplex'], p['porcentaje_down_payment'], p['num_cuotas_restantes'],
+            p['down_payment_amount'], p['cuota_restante_mensual']
+        )
+        # Only used to derive the values above; num_cuotas is a legacy alias
+        del p['porcentaje_down_payment'], p['num_cuotas']
+
+        normalizados = {}
+        for nombre, valor in p.items():
+            if nombre in CashFlowCalculator.PARAMETROS_ENTEROS:
+                normalizados[nombre] = int(valor)
+            else:
+                normalizados[nombre] = int(round(float(valor) / tolerancia))
+        if parametros.get('etapas') is not None:
+            normalizados['etapas'] = [[etapa['duplex'], etapa['meses'], etapa['inicio_venta'], etapa['solapar']]
+                                      for etapa in StageScheduler.normalizar_etapas(parametros['etapas'])]
+        return normalizados
+
+    @staticmethod
+    def hash_parametros(parametros: Dict[str, Any], tolerancia: float = 1e-6,
+                        campos: Optional[Sequence[str]] = None, **extra: Any) -> str:
+        """
+        Canonical hash of the normalized inputs
+
+        Args:
+            parametros: generar_flujo_caja parameters
+            tolerancia: Rounding step for floats
+            campos: Only hash these normalized inputs (plus 'etapas' when given), for results
+                that depend on a subset, e.g. CashFlowCalculator.PARAMETROS_PROGRAMA
+            **extra: Additional values that distinguish results (e.g. the engine)
+
+        Returns:
+            str: Hex digest
+        """
+        normalizados = ResultCache.normalizar_parametros(parametros, tolerancia)
+        if campos is not None:
+            normalizados = {nombre: valor for nombre, valor in normalizados.items()
+                            if nombre in campos or nombre == 'etapas'}
+        normalizados.update(extra)
+        contenido = json.dumps(normalizados, sort_keys=True, default=str)
+        return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+    def clave(self, parametros: Dict[str, Any], campos: Optional[Sequence[str]] = None, **extra: Any) -> str:
+        """
+        Cache key for the given inputs, using this cache's tolerance (see hash_parametros)
+        """
+        return ResultCache.hash_parametros(parametros, self.tolerancia, campos, **extra)
+
+    def obtener_o_calcular(self, clave: Hashable, calcular: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for a key, computing and storing it on a miss
+
+        Args:
+            clave: Cache key (usually from clave())
+            calcular: Builds the result on a miss
+
+        Returns:
+            The cached or freshly computed result
+        """
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave]
+            self.fallos += 1
+
+        # Compute outside the lock so other sessions are not blocked meanwhile
+        resultado = calcular()
+
+        with self._lock:
+            self._entradas[clave] = resultado
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+        return resultado
+
+    def limpiar(self):
+        """
+        Drop every cached result (counters are kept)
+        """
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Hit/miss/eviction counters
+
+        Returns:
+            Dict with the counters, current size and hit rate
+        """
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'entradas': len(self._entradas),
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            }
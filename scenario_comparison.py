@@ -0,0 +1,171 @@
+# scenario_comparison.py
+import itertools
+import json
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from cash_flow_calculator import CashFlowCalculator
+from sensitivity_analysis import SensitivityAnalyzer
+from stage_scheduler import StageScheduler
+
+
+class ScenarioComparator:
+    """
+    Side-by-side comparison of several project variants
+
+    Variants are valued together on stacked arrays (scenarios sharing per-etapa
+    specs go in one batch, and each distinct sales schedule is computed once),
+    and only the monthly "Acumulado (USD)" curves and one row of metrics per
+    variant are kept, never a cash flow DataFrame per variant.
+    """
+
+    # Metrics reported per variant, in table order
+    METRICAS = ('ganancia_neta', 'total_ingresos', 'total_gastos', 'total_comisiones', 'costo_oportunidad_total',
+                'mes_recuperacion', 'capital_maximo', 'van', 'tir', 'moic', 'payback_descontado')
+    METRICAS_MESES = ('mes_recuperacion', 'payback_descontado')
+
+    # Upper bound on the variants of a grid
+    MAX_ESCENARIOS = 50
+
+    @staticmethod
+    def comparar(escenarios: Mapping[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Value several variants and keep their curves and metrics
+
+        Args:
+            escenarios: Variant name -> generar_flujo_caja parameters (optionally
+                with per-etapa specs under 'etapas'), in display order
+
+        Returns:
+            Dict with:
+                'nombres': Variant names
+                'acumulado': 2-D array (variant x month) of "Acumulado (USD)", NaN past
+                    each variant's timeline
+                'metricas': pd.DataFrame of METRICAS indexed by variant name (months not
+                    reached are <NA>)
+        """
+        if not escenarios:
+            raise ValueError("No hay escenarios para comparar")
+        nombres = list(escenarios)
+
+        # Per-etapa specs are shared within a batch, so group the variants by them
+        grupos: Dict[Optional[str], list] = {}
+        for fila, nombre in enumerate(nombres):
+            etapas = escenarios[nombre].get('etapas')
+            clave = None if etapas is None else json.dumps(StageScheduler.normalizar_etapas(etapas), sort_keys=True)
+            grupos.setdefault(clave, []).append(fila)
+
+        curvas, metricas = [None] * len(nombres), {nombre: np.zeros(len(nombres)) for nombre in ScenarioComparator.METRICAS}
+        for filas in grupos.values():
+            lote = ScenarioComparator._lote([escenarios[nombres[fila]] for fila in filas])
+            columnas, tasa_mensual = CashFlowCalculator._valorizar_filas(lote, escenarios[nombres[filas[0]]].get('etapas'))
+            resultados = CashFlowCalculator._metricas_lote(columnas, tasa_mensual)
+            acumulado = np.where(columnas['dentro'], columnas['acumulado'], np.nan)
+            for posicion, fila in enumerate(filas):
+                curvas[fila] = acumulado[posicion]
+                for metrica in ScenarioComparator.METRICAS:
+                    metricas[metrica][fila] = resultados[metrica][posicion]
+
+        ancho = max(len(curva) for curva in curvas)
+        acumulado = np.full((len(nombres), ancho), np.nan)
+        for fila, curva in enumerate(curvas):
+            acumulado[fila, :len(curva)] = curva
+
+        tabla = pd.DataFrame(metricas, index=pd.Index(nombres, name="escenario"))
+        # Months not reached (-1) become <NA> ("No alcanzado"), as in evaluate_batch
+        for nombre in ScenarioComparator.METRICAS_MESES:
+            tabla[nombre] = tabla[nombre].astype(np.int64).astype("Int64").mask(tabla[nombre] < 0)
+        return {'nombres': nombres, 'acumulado': acumulado, 'metricas': tabla}
+
+    @staticmethod
+    def _lote(escenarios: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Stack complete scalar parameters into one array per input
+        """
+        lote = {}
+        for nombre, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items():
+            valores = [escenario.get(nombre, defecto) for escenario in escenarios]
+            if any(valor is None for valor in valores):
+                raise ValueError(f"Faltan parámetros: {nombre}")
+            lote[nombre] = np.array(valores, dtype=np.int64 if nombre in CashFlowCalculator.PARAMETROS_ENTEROS
+                                    else np.float64)
+        return lote
+
+    @staticmethod
+    def grilla(base: Dict[str, Any], valores: Mapping[str, Sequence[float]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Variants of a base scenario for every combination of the given input values
+
+        Derived down payment and cuota follow the price, percentage and cuotas they
+        come from, as in the sensitivity analysis.
+
+        Args:
+            base: generar_flujo_caja parameters of the base scenario
+            valores: Input (one of SensitivityAnalyzer.VARIABLES) -> values to try
+
+        Returns:
+            Dict variant name -> parameters, e.g. "Precio por Dúplex=150,000 · Tasa de Ventas=1",
+            one per combination
+
+        Raises:
+            ValueError: Unknown variables, a variable without values or with repeated
+                values, too many combinations, or dúplex/meses/total de etapas with
+                per-etapa specs in the base
+        """
+        desconocidas = [variable for variable in valores if variable not in SensitivityAnalyzer.VARIABLES]
+        if desconocidas:
+            raise ValueError(f"Variables desconocidas: {', '.join(desconocidas)}")
+        # Per-etapa specs replace these inputs, so varying them would change nothing
+        if base.get('etapas') is not None and any(variable in SensitivityAnalyzer.VARIABLES_ETAPAS_UNIFORMES
+                                                  for variable in valores):
+            raise ValueError("Con etapas personalizadas no se pueden variar dúplex, meses ni total de etapas")
+        if any(len(opciones) == 0 for opciones in valores.values()):
+            raise ValueError("Cada variable necesita al menos un valor")
+        for variable, opciones in valores.items():
+            normalizadas = [int(valor) if variable in CashFlowCalculator.PARAMETROS_ENTEROS else float(valor)
+                            for valor in opciones]
+            repetidos = sorted({valor for valor in normalizadas if normalizadas.count(valor) > 1})
+            if repetidos:
+                raise ValueError(f"Valores repetidos para {SensitivityAnalyzer.VARIABLES[variable]}: "
+                                 f"{', '.join(f'{valor:,.6g}' for valor in repetidos)}")
+        num_escenarios = int(np.prod([len(opciones) for opciones in valores.values()]))
+        if num_escenarios > ScenarioComparator.MAX_ESCENARIOS:
+            raise ValueError(f"La grilla tiene {num_escenarios} escenarios; el máximo es "
+                             f"{ScenarioComparator.MAX_ESCENARIOS}")
+
+        # Values that read the same at 6 significant digits are labelled in full
+        formatos = {}
+        for variable, opciones in valores.items():
+            cortos = [f"{valor:,.6g}" for valor in opciones]
+            formatos[variable] = "{:,.6g}" if len(set(cortos)) == len(cortos) else "{:,}"
+
+        escenarios = {}
+        for combinacion in itertools.product(*valores.values()):
+            parametros = dict(base)
+            etiquetas = []
+            for variable, valor in zip(valores, combinacion):
+                if variable in CashFlowCalculator.PARAMETROS_ENTEROS:
+                    valor = int(valor)
+                parametros[variable] = valor
+                for derivado in SensitivityAnalyzer.PAGOS_DERIVADOS.get(variable, ()):
+                    parametros[derivado] = 0.0
+                etiquetas.append(f"{SensitivityAnalyzer.VARIABLES[variable]}={formatos[variable].format(valor)}")
+            escenarios[" · ".join(etiquetas) or "Base"] = parametros
+        return escenarios
+
+    @staticmethod
+    def diferencias(metricas: pd.DataFrame, referencia: Optional[str] = None) -> pd.DataFrame:
+        """
+        Metrics minus those of a reference variant
+
+        Args:
+            metricas: 'metricas' table from comparar
+            referencia: Reference variant (default: the first one)
+
+        Returns:
+            pd.DataFrame shaped like metricas; the reference row is all zeros
+        """
+        referencia = metricas.index[0] if referencia is None else referencia
+        return metricas - metricas.loc[referencia]
@@ -0,0 +1,261 @@
+# scenario_store.py
+import json
+import os
+import shutil
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cash_flow_calculator import CashFlowCalculator
+from result_cache import ResultCache
+
+
+class ScenarioStore:
+    """
+    Persistent on-disk store of computed scenarios
+
+    Inputs and metrics live in an indexed SQLite table; each cash flow table is
+    stored column by column as .npy files so loading it is a memory-mapped read.
+    The METRICAS columns are there for listing and filtering; the complete
+    metrics dict is also kept as JSON so loading returns it unchanged.
+    """
+
+    METRICAS = ('total_ingresos', 'total_gastos', 'total_comisiones', 'ganancia_neta',
+                'costo_oportunidad_total', 'mes_recuperacion')
+
+    def __init__(self, ruta: Optional[str] = None):
+        """
+        Args:
+            ruta: Store directory (default: $STREAMLINE_ESCENARIOS or ./escenarios)
+        """
+        self.ruta = ruta or os.environ.get("STREAMLINE_ESCENARIOS", "escenarios")
+        os.makedirs(os.path.join(self.ruta, "tablas"), exist_ok=True)
+        with self._conectar() as conexion:
+            conexion.executescript("""
+                CREATE TABLE IF NOT EXISTS escenarios (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nombre TEXT NOT NULL,
+                    hash_entradas TEXT NOT NULL,
+                    creado TEXT NOT NULL,
+                    parametros TEXT NOT NULL,
+                    total_meses INTEGER NOT NULL,
+                    total_ingresos REAL,
+                    total_gastos REAL,
+                    total_comisiones REAL,
+                    ganancia_neta REAL,
+                    costo_oportunidad_total REAL,
+                    mes_recuperacion INTEGER,
+                    metricas TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_escenarios_hash ON escenarios (hash_entradas);
+                CREATE INDEX IF NOT EXISTS idx_escenarios_nombre ON escenarios (nombre);
+                CREATE INDEX IF NOT EXISTS idx_escenarios_creado ON escenarios (creado);
+                CREATE INDEX IF NOT EXISTS idx_escenarios_ganancia ON escenarios (ganancia_neta);
+                CREATE INDEX IF NOT EXISTS idx_escenarios_recuperacion ON escenarios (mes_recuperacion);
+            """)
+            # Stores created before the full metrics were kept
+            columnas = {fila[1] for fila in conexion.execute("PRAGMA table_info(escenarios)")}
+            if 'metricas' not in columnas:
+                conexion.execute("ALTER TABLE escenarios ADD COLUMN metricas TEXT")
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation keeps the store safe across Streamlit threads
+        conexion = sqlite3.connect(os.path.join(self.ruta, "escenarios.sqlite"))
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    def _ruta_tabla(self, escenario_id: int) -> str:
+        return os.path.join(self.ruta, "tablas", str(escenario_id))
+
+    def guardar(self, nombre: str, parametros: Dict[str, Any], df: pd.DataFrame,
+                metricas: Dict[str, Any]) -> int:
+        """
+        Save a computed scenario
+
+        Args:
+            nombre: User-supplied scenario name
+            parametros: generar_flujo_caja parameters used for the run
+            df: Cash flow table
+            metricas: Output of calcular_metricas_financieras
+
+        Returns:
+            int: Id of the stored scenario
+        """
+        entradas = {nombre_param: parametros[nombre_param] for nombre_param in CashFlowCalculator.PARAMETROS_ESCENARIO
+                    if nombre_param in parametros}
+        if parametros.get('etapas') is not None:
+            entradas['etapas'] = parametros['etapas']
+        mes_recuperacion = metricas['mes_recuperacion']
+        valores_metricas = [float(metricas[clave]) for clave in self.METRICAS[:-1]]
+        valores_metricas.append(int(mes_recuperacion) if isinstance(mes_recuperacion, (int, np.integer)) else None)
+
+        with self._conectar() as conexion:
+            cursor = conexion.execute(
+                f"INSERT INTO escenarios (nombre, hash_entradas, creado, parametros, total_meses, metricas, "
+                f"{', '.join(self.METRICAS)}) VALUES (?, ?, ?, ?, ?, ?, {', '.join('?' * len(self.METRICAS))})",
+                [nombre, ResultCache.hash_parametros(entradas), datetime.now(timezone.utc).isoformat(),
+                 json.dumps(entradas, default=float), len(df) - 1,
+                 json.dumps(metricas, default=lambda valor: valor.item()), *valores_metricas]
+            )
+            escenario_id = cursor.lastrowid
+            # Written before the row is committed: if it fails the row is rolled back,
+            # so no listed scenario is ever missing its table
+            try:
+                self._escribir_tabla(self._ruta_tabla(escenario_id), df)
+            except BaseException:
+                shutil.rmtree(self._ruta_tabla(escenario_id), ignore_errors=True)
+                raise
+        return escenario_id
+
+    @staticmethod
+    def _escribir_tabla(ruta: str, df: pd.DataFrame):
+        """
+        Write a table as one .npy file per column plus a JSON schema
+        """
+        os.makedirs(ruta, exist_ok=True)
+        esquema = []
+        for posicion, columna in enumerate(df.columns):
+            valores = df[columna]
+            archivo = f"{posicion}.npy"
+            if pd.api.types.is_numeric_dtype(valores):
+                np.save(os.path.join(ruta, archivo), valores.to_numpy())
+                esquema.append({'nombre': columna, 'archivo': archivo})
+            else:
+                # Text columns are stored as categorical codes
+                codigos, categorias = pd.factorize(valores)
+                np.save(os.path.join(ruta, archivo), codigos.astype(np.int32))
+                esquema.append({'nombre': columna, 'archivo': archivo, 'categorias': [str(c) for c in categorias]})
+        with open(os.path.join(ruta, "esquema.json"), "w", encoding="utf-8") as archivo_esquema:
+            json.dump(esquema, archivo_esquema, ensure_ascii=False)
+
+    @staticmethod
+    def _leer_tabla(ruta: str) -> pd.DataFrame:
+        """
+        Read a stored table; numeric columns are memory-mapped, not copied
+        """
+        with open(os.path.join(ruta, "esquema.json"), encoding="utf-8") as archivo_esquema:
+            esquema = json.load(archivo_esquema)
+        columnas = {}
+        for columna in esquema:
+            # Plain ndarray view over the memory map (no copy)
+            valores = np.asarray(np.load(os.path.join(ruta, columna['archivo']), mmap_mode="r"))
+            if 'categorias' in columna:
+                valores = np.asarray(columna['categorias'], dtype=object)[valores].tolist()
+            columnas[columna['nombre']] = valores
+        return pd.DataFrame(columnas, copy=False)
+
+    def cargar(self, escenario_id: int) -> Tuple[Dict[str, Any], pd.DataFrame, Dict[str, Any]]:
+        """
+        Load a stored scenario without recomputing it
+
+        Args:
+            escenario_id: Scenario id
+
+        Returns:
+            Tuple (parametros, df, metricas); metricas is the dict given to
+            guardar (only the METRICAS for scenarios saved before it was kept)
+        """
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                f"SELECT parametros, metricas, {', '.join(self.METRICAS)} FROM escenarios WHERE id = ?",
+                (escenario_id,)
+            ).fetchone()
+        if fila is None:
+            raise KeyError(f"Escenario inexistente: {escenario_id}")
+
+        if fila[1] is not None:
+            metricas = json.loads(fila[1])
+        else:
+            metricas = dict(zip(self.METRICAS, fila[2:]))
+            if metricas['mes_recuperacion'] is None:
+                metricas['mes_recuperacion'] = "No alcanzado"
+        return json.loads(fila[0]), self._leer_tabla(self._ruta_tabla(escenario_id)), metricas
+
+    def cargar_parametros(self, escenario_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Inputs of several stored scenarios, without reading their tables
+
+        Args:
+            escenario_ids: Scenario ids
+
+        Returns:
+            Dict id -> generar_flujo_caja parameters, in the order given
+        """
+        with self._conectar() as conexion:
+            filas = dict(conexion.execute(
+                f"SELECT id, parametros FROM escenarios WHERE id IN ({', '.join('?' * len(escenario_ids))})",
+                list(escenario_ids)
+            ).fetchall())
+        faltantes = [str(escenario_id) for escenario_id in escenario_ids if escenario_id not in filas]
+        if faltantes:
+            raise KeyError(f"Escenarios inexistentes: {', '.join(faltantes)}")
+        return {escenario_id: json.loads(filas[escenario_id]) for escenario_id in escenario_ids}
+
+    def buscar_por_hash(self, parametros: Dict[str, Any]) -> Optional[int]:
+        """
+        Most recent stored scenario computed from equivalent inputs
+
+        Args:
+            parametros: generar_flujo_caja parameters
+
+        Returns:
+            Scenario id, or None when no stored scenario matches
+        """
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                "SELECT id FROM escenarios WHERE hash_entradas = ? ORDER BY id DESC LIMIT 1",
+                (ResultCache.hash_parametros(parametros),)
+            ).fetchone()
+        return fila[0] if fila else None
+
+    def listar(self, nombre_contiene: Optional[str] = None, ganancia_minima: Optional[float] = None,
+               mes_recuperacion_maximo: Optional[int] = None, limite: int = 200) -> pd.DataFrame:
+        """
+        List stored scenarios, most recent first, through indexed queries
+
+        Args:
+            nombre_contiene: Only names containing this text
+            ganancia_minima: Only scenarios with at least this ganancia neta
+            mes_recuperacion_maximo: Only scenarios recovered by this month
+            limite: Maximum rows returned
+
+        Returns:
+            pd.DataFrame: One row per scenario with its name, date and metrics
+        """
+        condiciones, argumentos = [], []
+        if nombre_contiene:
+            condiciones.append("nombre LIKE ?")
+            argumentos.append(f"%{nombre_contiene}%")
+        if ganancia_minima is not None:
+            condiciones.append("ganancia_neta >= ?")
+            argumentos.append(ganancia_minima)
+        if mes_recuperacion_maximo is not None:
+            condiciones.append("mes_recuperacion <= ?")
+            argumentos.append(mes_recuperacion_maximo)
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        with self._conectar() as conexion:
+            return pd.read_sql_query(
+                f"SELECT id, nombre, creado, total_meses, {', '.join(self.METRICAS)} FROM escenarios "
+                f"{donde} ORDER BY id DESC LIMIT ?",
+                conexion, params=[*argumentos, limite]
+            )
+
+    def eliminar(self, escenario_id: int):
+        """
+        Delete a stored scenario and its table
+
+        Args:
+            escenario_id: Scenario id
+        """
+        with self._conectar() as conexion:
+            conexion.execute("DELETE FROM escenarios WHERE id = ?", (escenario_id,))
+        shutil.rmtree(self._ruta_tabla(escenario_id), ignore_errors=True)
@@ -0,0 +1,153 @@
+# scenario_sweep.py
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from cash_flow_calculator import CashFlowCalculator
+
+
+def _evaluar_chunk(escenarios: pd.DataFrame) -> pd.DataFrame:
+    """
+    Worker entry point (module level so it can be pickled by the process pool)
+    """
+    return CashFlowCalculator.evaluate_batch(escenarios)
+
+
+class ScenarioSweepRunner:
+    """
+    Runs scenario sweeps on a process pool on top of CashFlowCalculator.evaluate_batch
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, tamano_chunk: int = 2000,
+                 progreso: Optional[Callable[[int, int], None]] = None):
+        """
+        Args:
+            num_workers: Worker processes (default: all CPUs); 1 runs in-process
+            tamano_chunk: Scenarios sent to a worker per task
+            progreso: Optional callback called as progreso(escenarios_completados, total_escenarios);
+                the total is None when streaming chunks of unknown length
+        """
+        if tamano_chunk < 1:
+            raise ValueError("tamano_chunk debe ser al menos 1")
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.tamano_chunk = tamano_chunk
+        self.progreso = progreso
+
+    @staticmethod
+    def construir_grilla(base: Dict[str, Any], **ejes: Iterable) -> pd.DataFrame:
+        """
+        Build a scenario grid as the cartesian product of the given parameter axes
+
+        Args:
+            base: Parameter values shared by every scenario
+            **ejes: Parameter name -> values to sweep
+
+        Returns:
+            pd.DataFrame: One row per scenario
+        """
+        nombres = list(ejes)
+        combinaciones = list(itertools.product(*(list(valores) for valores in ejes.values())))
+        grilla = pd.DataFrame(combinaciones, columns=nombres)
+        for nombre, valor in base.items():
+            if nombre not in grilla.columns:
+                grilla[nombre] = valor
+        return grilla
+
+    def iter_resultados(self, params_table) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """
+        Stream chunk results as they finish
+
+        Args:
+            params_table: Scenario table accepted by CashFlowCalculator.evaluate_batch
+
+        Yields:
+            (position of the chunk's first scenario, metrics of the chunk), in completion order
+        """
+        escenarios = params_table if isinstance(params_table, pd.DataFrame) else pd.DataFrame(params_table)
+        total = len(escenarios)
+        inicios = range(0, total, self.tamano_chunk)
+        completados = 0
+
+        if self.num_workers == 1 or len(inicios) <= 1:
+            for inicio in inicios:
+                resultado = _evaluar_chunk(escenarios.iloc[inicio:inicio + self.tamano_chunk])
+                completados += len(resultado)
+                if self.progreso:
+                    self.progreso(completados, total)
+                yield inicio, resultado
+            return
+
+        with ProcessPoolExecutor(max_workers=min(self.num_workers, len(inicios))) as pool:
+            futuros = {
+                pool.submit(_evaluar_chunk, escenarios.iloc[inicio:inicio + self.tamano_chunk]): inicio
+                for inicio in inicios
+            }
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                completados += len(resultado)
+                if self.progreso:
+                    self.progreso(completados, total)
+                yield futuros[futuro], resultado
+
+    def mapear_chunks(self, chunks: Iterable[pd.DataFrame],
+                      funcion: Callable[[pd.DataFrame], Any] = _evaluar_chunk) -> Iterator[Any]:
+        """
+        Apply a function to a stream of scenario chunks, yielding results in input order
+
+        Only a bounded number of chunks is in flight at once (two per worker), so
+        arbitrarily long inputs are processed in constant memory.
+
+        Args:
+            chunks: Iterable of scenario tables (e.g. read lazily from disk)
+            funcion: Module-level (picklable) function applied to each chunk
+
+        Yields:
+            funcion(chunk) for every chunk, in input order
+        """
+        completados = 0
+        if self.num_workers == 1:
+            for chunk in chunks:
+                resultado = funcion(chunk)
+                completados += len(chunk)
+                if self.progreso:
+                    self.progreso(completados, None)
+                yield resultado
+            return
+
+        with ProcessPoolExecutor(max_workers=self.num_workers) as pool:
+            pendientes = deque()
+
+            def siguiente():
+                nonlocal completados
+                tamano, futuro = pendientes.popleft()
+                resultado = futuro.result()
+                completados += tamano
+                if self.progreso:
+                    self.progreso(completados, None)
+                return resultado
+
+            for chunk in chunks:
+                pendientes.append((len(chunk), pool.submit(funcion, chunk)))
+                if len(pendientes) >= 2 * self.num_workers:
+                    yield siguiente()
+            while pendientes:
+                yield siguiente()
+
+    def run(self, params_table) -> pd.DataFrame:
+        """
+        Evaluate a scenario table and merge the results
+
+        Args:
+            params_table: Scenario table accepted by CashFlowCalculator.evaluate_batch
+
+        Returns:
+            pd.DataFrame: One row of metrics per scenario, in input order whatever the scheduling
+        """
+        partes = dict(self.iter_resultados(params_table))
+        if not partes:
+            return CashFlowCalculator.evaluate_batch(params_table)
+        return pd.concat([partes[inicio] for inicio in sorted(partes)])
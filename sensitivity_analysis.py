@@ -0,0 +1,144 @@
+# sensitivity_analysis.py
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from cash_flow_calculator import CashFlowCalculator
+
+
+class SensitivityAnalyzer:
+    """
+    One-at-a-time sensitivity (tornado) analysis on top of CashFlowCalculator
+
+    Each input is moved down and up by the same relative step while the others
+    keep their base values. Every variant is valued in one stacked batch that
+    computes each distinct sales schedule once, so the monetary inputs (price,
+    commission, costs, down payment, TEA) only revalue the base schedule; just
+    the inputs in CashFlowCalculator.PARAMETROS_PROGRAMA schedule new sales.
+    """
+
+    # Inputs analyzed by default, with their labels
+    VARIABLES = {
+        'precio_por_duplex': "Precio por Dúplex",
+        'tasa_ventas': "Tasa de Ventas",
+        'comision_por_venta': "Comisión por Venta",
+        'inversion_inicial': "Inversión Inicial",
+        'gasto_construccion_mensual': "Gasto Construcción Mensual",
+        'porcentaje_down_payment': "Down Payment (%)",
+        'num_cuotas_restantes': "Cuotas Restantes",
+        'duplex_por_etapa': "Dúplex por Etapa",
+        'meses_por_etapa': "Meses por Etapa",
+        'total_etapas': "Total Etapas",
+        'tea_costo_oportunidad': "TEA Costo de Oportunidad",
+    }
+
+    # Derived payment inputs that follow each input when it moves (as in the goal seek)
+    PAGOS_DERIVADOS = {
+        'precio_por_duplex': ('down_payment_amount', 'cuota_restante_mensual'),
+        'porcentaje_down_payment': ('down_payment_amount', 'cuota_restante_mensual'),
+        'num_cuotas_restantes': ('cuota_restante_mensual',),
+    }
+
+    # Inputs that per-etapa specs replace
+    VARIABLES_ETAPAS_UNIFORMES = ('duplex_por_etapa', 'meses_por_etapa', 'total_etapas')
+
+    # Metrics a tornado can be built for; the FinancialMetrics ones are only computed when asked for
+    METRICAS = ('ganancia_neta', 'capital_maximo', 'costo_oportunidad_total', 'van', 'tir', 'moic')
+    METRICAS_INVERSION = ('capital_maximo', 'van', 'tir', 'moic')
+
+    @staticmethod
+    def valores_extremos(variable: str, valor: float, variacion: float):
+        """
+        Low and high values of one input for a relative step
+
+        Integer inputs move at least one unit and never below 1; the down payment
+        percentage is capped at 100.
+
+        Returns:
+            Tuple (low value, high value)
+        """
+        bajo, alto = valor * (1 - variacion), valor * (1 + variacion)
+        if variable in CashFlowCalculator.PARAMETROS_ENTEROS:
+            bajo = max(min(int(round(bajo)), int(valor) - 1), 1)
+            alto = max(int(round(alto)), int(valor) + 1)
+        elif variable == 'porcentaje_down_payment':
+            alto = min(alto, 100.0)
+        return bajo, alto
+
+    @staticmethod
+    def tornado(parametros: Dict[str, Any], variacion: float = 0.1,
+                metricas: Sequence[str] = ('ganancia_neta', 'capital_maximo'),
+                variables: Optional[Sequence[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Tornado tables of the given metrics for a ±variacion step on each input
+
+        Args:
+            parametros: generar_flujo_caja parameters (e.g. the sidebar inputs), optionally
+                with per-etapa specs under 'etapas'
+            variacion: Relative step, e.g. 0.1 for ±10%
+            metricas: Metrics to report, from METRICAS
+            variables: Inputs to move (default: VARIABLES, without the uniform etapa
+                inputs when per-etapa specs are given)
+
+        Returns:
+            Dict metric -> pd.DataFrame indexed by input, with columns "Variable",
+            "Valor Bajo", "Valor Alto", "Resultado Bajo", "Resultado Alto", "Base" and
+            "Rango" (|Resultado Alto - Resultado Bajo|), sorted by Rango, largest first
+        """
+        if not 0 < variacion < 1:
+            raise ValueError("La variación debe estar entre 0 y 1 (exclusive)")
+        desconocidas = [metrica for metrica in metricas if metrica not in SensitivityAnalyzer.METRICAS]
+        if desconocidas:
+            raise ValueError(f"Métricas desconocidas: {', '.join(desconocidas)}. "
+                             f"Opciones: {', '.join(SensitivityAnalyzer.METRICAS)}")
+
+        etapas = parametros.get('etapas')
+        if variables is None:
+            variables = [variable for variable in SensitivityAnalyzer.VARIABLES
+                         if etapas is None or variable not in SensitivityAnalyzer.VARIABLES_ETAPAS_UNIFORMES]
+        desconocidas = [variable for variable in variables if variable not in SensitivityAnalyzer.VARIABLES]
+        if desconocidas:
+            raise ValueError(f"Variables desconocidas: {', '.join(desconocidas)}")
+        if etapas is not None and any(variable in SensitivityAnalyzer.VARIABLES_ETAPAS_UNIFORMES
+                                      for variable in variables):
+            raise ValueError("Con etapas personalizadas no se pueden variar dúplex, meses ni total de etapas")
+
+        p = {nombre: parametros.get(nombre, defecto)
+             for nombre, defecto in CashFlowCalculator.PARAMETROS_ESCENARIO.items()}
+        faltantes = [nombre for nombre, valor in p.items() if valor is None]
+        if faltantes:
+            raise ValueError(f"Faltan parámetros: {', '.join(faltantes)}")
+
+        # Row 0 is the base scenario, then the low and high variant of each input
+        extremos = {variable: SensitivityAnalyzer.valores_extremos(variable, p[variable], variacion)
+                    for variable in variables}
+        num_filas = 1 + 2 * len(variables)
+        lote = {
+            nombre: np.full(num_filas, valor, dtype=np.int64 if nombre in CashFlowCalculator.PARAMETROS_ENTEROS
+                            else np.float64)
+            for nombre, valor in p.items()
+        }
+        for indice, (variable, (bajo, alto)) in enumerate(extremos.items()):
+            lote[variable][1 + 2 * indice] = bajo
+            lote[variable][2 + 2 * indice] = alto
+            for derivado in SensitivityAnalyzer.PAGOS_DERIVADOS.get(variable, ()):
+                lote[derivado][1 + 2 * indice:3 + 2 * indice] = 0.0
+
+        incluir_inversion = any(metrica in SensitivityAnalyzer.METRICAS_INVERSION for metrica in metricas)
+        resultados = CashFlowCalculator._evaluar_filas(lote, etapas, incluir_inversion)
+
+        tornados = {}
+        for metrica in metricas:
+            valores = np.asarray(resultados[metrica], dtype=np.float64)
+            tabla = pd.DataFrame({
+                "Variable": [SensitivityAnalyzer.VARIABLES[variable] for variable in variables],
+                "Valor Bajo": [bajo for bajo, _ in extremos.values()],
+                "Valor Alto": [alto for _, alto in extremos.values()],
+                "Resultado Bajo": valores[1::2],
+                "Resultado Alto": valores[2::2],
+                "Base": valores[0],
+            }, index=pd.Index(list(variables), name="parametro"))
+            tabla["Rango"] = (tabla["Resultado Alto"] - tabla["Resultado Bajo"]).abs()
+            tornados[metrica] = tabla.sort_values("Rango", ascending=False, kind="stable", na_position="last")
+        return tornados
@@ -0,0 +1,231 @@
+# stage_scheduler.py
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class StageScheduler:
+    """
+    Event-driven sales scheduler for projects with any number of etapas
+
+    Each etapa has its own duplexes, construction months, first sales month and
+    an overlapping-sales option. Construction runs etapa after etapa. An etapa
+    without overlap opens for sale once every previous etapa is sold out (the
+    month after the sell-out is detected) and not before its inicio_venta; an
+    overlapping etapa opens at its inicio_venta. Monthly demand (tasa_ventas,
+    fractions carried over) is served from the open etapas in order.
+    """
+
+    @staticmethod
+    def etapas_uniformes(duplex_por_etapa: int, meses_por_etapa: int, total_etapas: int,
+                         solapar: bool = False) -> List[Dict[str, Any]]:
+        """
+        Stage specs for a project of identical etapas
+
+        Args:
+            duplex_por_etapa: Duplexes per stage
+            meses_por_etapa: Construction months per stage
+            total_etapas: Total stages
+            solapar: Let each etapa sell as soon as its construction starts
+
+        Returns:
+            List of normalized stage specs
+        """
+        return StageScheduler.normalizar_etapas(
+            [{'duplex': duplex_por_etapa, 'meses': meses_por_etapa, 'solapar': solapar}] * int(total_etapas)
+        )
+
+    @staticmethod
+    def normalizar_etapas(etapas: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validate stage specs and fill in their defaults
+
+        Args:
+            etapas: One dict per etapa with 'duplex' and 'meses' and, optionally,
+                'inicio_venta' (first month it may sell; default: its construction
+                start) and 'solapar' (sell without waiting for the previous etapas
+                to sell out; default False)
+
+        Returns:
+            List of dicts with every key set
+        """
+        normalizadas = []
+        inicio_construccion = 1
+        for numero, etapa in enumerate(etapas, start=1):
+            faltantes = [clave for clave in ('duplex', 'meses') if clave not in etapa]
+            if faltantes:
+                raise ValueError(f"Etapa {numero}: faltan {', '.join(faltantes)}")
+            duplex, meses = int(etapa['duplex']), int(etapa['meses'])
+            inicio_venta = etapa.get('inicio_venta')
+            inicio_venta = inicio_construccion if inicio_venta is None or inicio_venta != inicio_venta else int(inicio_venta)
+            if duplex < 0 or meses < 0:
+                raise ValueError(f"Etapa {numero}: dúplex y meses no pueden ser negativos")
+            if inicio_venta < 1:
+                raise ValueError(f"Etapa {numero}: inicio_venta debe ser al menos 1")
+            normalizadas.append({
+                'duplex': duplex,
+                'meses': meses,
+                'inicio_venta': inicio_venta,
+                'solapar': bool(etapa.get('solapar', False)),
+            })
+            inicio_construccion += meses
+        return normalizadas
+
+    @staticmethod
+    def fin_construccion(etapas: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Last construction month of each etapa (construction is sequential)
+        """
+        return np.cumsum([etapa['meses'] for etapa in etapas], dtype=np.int64)
+
+    @staticmethod
+    def programar_ventas(etapas: Sequence[Dict[str, Any]], tasa_ventas: float,
+                         mes_maximo: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the sales schedule as a list of sales runs
+
+        Idle periods (waiting for an etapa to start, sold-out gaps) are jumped
+        over, and whole-duplex rates with no carried fraction are filled in one
+        run up to the next sell-out or opening event. Fractional rates advance
+        one month at a time so the carried fraction rounds exactly like the
+        month-by-month engine.
+
+        Args:
+            etapas: Normalized stage specs
+            tasa_ventas: Sales rate (duplexes per month)
+            mes_maximo: Stop scheduling after this month (guards against tiny rates)
+
+        Returns:
+            Tuple of arrays (first month of the run, months in the run,
+            duplexes sold per month of the run)
+        """
+        inicios, duraciones, cantidades = [], [], []
+        numero_etapas = len(etapas)
+        restante = [etapa['duplex'] for etapa in etapas]
+        inicio_venta = [etapa['inicio_venta'] for etapa in etapas]
+        apertura: List[Optional[int]] = [None] * numero_etapas
+        # Month in which each etapa is seen sold out (the next etapa may sell the month after)
+        agotamiento: List[Optional[int]] = [None] * numero_etapas
+        if numero_etapas == 0 or tasa_ventas <= 0:
+            return (np.zeros(0, dtype=np.int64),) * 3
+
+        def registrar(mes, meses, cantidad):
+            if inicios and cantidades[-1] == cantidad and inicios[-1] + duraciones[-1] == mes:
+                duraciones[-1] += meses
+            else:
+                inicios.append(mes)
+                duraciones.append(meses)
+                cantidades.append(cantidad)
+
+        def resolver_aperturas():
+            agotadas_previas = 0
+            for k, etapa in enumerate(etapas):
+                if apertura[k] is None:
+                    if k == 0 or etapa['solapar']:
+                        apertura[k] = inicio_venta[k]
+                    elif agotadas_previas is not None:
+                        apertura[k] = max(inicio_venta[k], agotadas_previas + 1)
+                if apertura[k] is not None and restante[k] == 0 and agotamiento[k] is None:
+                    agotamiento[k] = apertura[k]  # Etapa without duplexes
+                if agotadas_previas is not None:
+                    agotadas_previas = None if agotamiento[k] is None else max(agotadas_previas, agotamiento[k])
+
+        fraccion_acumulada = 0.0
+        mes = 1
+        resolver_aperturas()
+        while mes_maximo is None or mes <= mes_maximo:
+            abiertas = [k for k in range(numero_etapas)
+                        if apertura[k] is not None and apertura[k] <= mes and restante[k] > 0]
+            proxima_apertura = min((apertura[k] for k in range(numero_etapas)
+                                    if apertura[k] is not None and apertura[k] > mes and restante[k] > 0),
+                                   default=None)
+            if not abiertas:
+                if proxima_apertura is None:
+                    break
+                mes = proxima_apertura  # Jump over the idle months
+                continue
+
+            disponibles = sum(restante[k] for k in abiertas)
+            tasa_mes = min(tasa_ventas, disponibles)
+
+            if fraccion_acumulada == 0.0 and tasa_mes == tasa_ventas and float(tasa_ventas).is_integer():
+                # Whole duplexes every month until the first open etapa sells out or another one opens
+                cantidad = int(tasa_ventas)
+                meses = restante[abiertas[0]] // cantidad
+                if proxima_apertura is not None:
+                    meses = min(meses, proxima_apertura - mes)
+                if mes_maximo is not None:
+                    meses = min(meses, mes_maximo - mes + 1)
+                if meses > 1:
+                    registrar(mes, meses, cantidad)
+                    restante[abiertas[0]] -= meses * cantidad
+                    if restante[abiertas[0]] == 0:
+                        agotamiento[abiertas[0]] = mes + meses
+                        resolver_aperturas()
+                    mes += meses
+                    continue
+
+            if mes == 1 and tasa_ventas < 1.0:
+                fraccion_acumulada = 1.0
+            else:
+                fraccion_acumulada += tasa_mes
+            duplex_completos = int(fraccion_acumulada)
+            fraccion_acumulada -= duplex_completos
+            duplex_completos = min(duplex_completos, disponibles)
+
+            if duplex_completos > 0:
+                registrar(mes, 1, duplex_completos)
+                por_asignar = duplex_completos
+                for k in abiertas:
+                    asignados = min(por_asignar, restante[k])
+                    restante[k] -= asignados
+                    por_asignar -= asignados
+                    if restante[k] == 0:
+                        agotamiento[k] = mes + 1
+                    if por_asignar == 0:
+                        break
+                resolver_aperturas()
+            mes += 1
+
+        return (np.asarray(inicios, dtype=np.int64), np.asarray(duraciones, dtype=np.int64),
+                np.asarray(cantidades, dtype=np.int64))
+
+    @staticmethod
+    def ultimo_mes_venta(programa: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> int:
+        """
+        Month of the last sale of a schedule (0 when nothing is sold)
+        """
+        inicios, duraciones, _ = programa
+        return int(inicios[-1] + duraciones[-1] - 1) if len(inicios) else 0
+
+    @staticmethod
+    def duplex_vendidos(programa: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> int:
+        """
+        Total duplexes sold by a schedule
+        """
+        _, duraciones, cantidades = programa
+        return int(np.dot(duraciones, cantidades))
+
+    @staticmethod
+    def ventas_mensuales(programa: Tuple[np.ndarray, np.ndarray, np.ndarray], total_meses: int,
+                         mes_inicial: int = 0) -> np.ndarray:
+        """
+        Expand a schedule into duplexes sold per month
+
+        Args:
+            programa: Output of programar_ventas
+            total_meses: Last month of the timeline; later sales are dropped
+            mes_inicial: First month expanded, to expand a long timeline block by block
+
+        Returns:
+            np.ndarray: Duplexes sold per month (index = month - mes_inicial)
+        """
+        ventas = np.zeros(total_meses + 1 - mes_inicial, dtype=np.int64)
+        inicios, duraciones, cantidades = programa
+        # Skip the runs that end before mes_inicial
+        primera = int(np.searchsorted(inicios + duraciones, mes_inicial, side='right'))
+        for inicio, duracion, cantidad in zip(inicios[primera:], duraciones[primera:], cantidades[primera:]):
+            if inicio > total_meses:
+                break
+            ventas[max(inicio, mes_inicial) - mes_inicial:min(inicio + duracion, total_meses + 1) - mes_inicial] = cantidad
+        return ventas
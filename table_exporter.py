@@ -0,0 +1,162 @@
+# table_exporter.py
+import csv
+import importlib.util
+import io
+from typing import Any, Optional
+
+import pandas as pd
+
+
+class TableExporter:
+    """
+    Streaming, constant-memory table writer for CSV, Parquet, Feather and XLSX
+
+    Tables are written chunk by chunk, so large multi-scenario outputs never
+    sit fully in memory. Parquet and Feather need pyarrow and XLSX needs
+    openpyxl; they are imported only when that format is used.
+    """
+
+    FORMATOS = ("csv", "parquet", "feather", "xlsx")
+    EXTENSIONES = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather", "xlsx": ".xlsx"}
+    MIME = {
+        "csv": "text/csv",
+        "parquet": "application/vnd.apache.parquet",
+        "feather": "application/vnd.apache.arrow.file",
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    }
+
+    def __init__(self, destino: Any, formato: str, hoja: str = "Flujo de Caja"):
+        """
+        Args:
+            destino: File path or binary file-like object
+            formato: One of FORMATOS
+            hoja: Worksheet name (XLSX only)
+        """
+        if formato not in self.FORMATOS:
+            raise ValueError(f"Formato desconocido: {formato!r}. Opciones: {', '.join(self.FORMATOS)}")
+        self.destino = destino
+        self.formato = formato
+        self.hoja = hoja
+        self._archivo = None
+        self._escritor = None
+        self._libro = None
+        self._esquema = None
+        self._columnas: Optional[list] = None
+
+    def __enter__(self) -> "TableExporter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+    @staticmethod
+    def formato_disponible(formato: str) -> bool:
+        """
+        Whether the optional dependency of a format is installed
+        """
+        modulo = {"parquet": "pyarrow", "feather": "pyarrow", "xlsx": "openpyxl"}.get(formato)
+        if modulo is None:
+            return formato in TableExporter.FORMATOS
+        # find_spec checks without importing, so probing stays cheap
+        return importlib.util.find_spec(modulo) is not None
+
+    @staticmethod
+    def exportar(df: pd.DataFrame, formato: str, hoja: str = "Flujo de Caja", tamano_bloque: int = 10000) -> bytes:
+        """
+        Serialize a whole table to bytes, writing it in blocks
+
+        Args:
+            df: Table to export
+            formato: One of FORMATOS
+            hoja: Worksheet name (XLSX only)
+            tamano_bloque: Rows written per block
+
+        Returns:
+            bytes: File contents
+        """
+        salida = io.BytesIO()
+        with TableExporter(salida, formato, hoja=hoja) as exportador:
+            for inicio in range(0, max(len(df), 1), tamano_bloque):
+                exportador.escribir(df.iloc[inicio:inicio + tamano_bloque])
+        return salida.getvalue()
+
+    def escribir(self, df: pd.DataFrame):
+        """
+        Append a chunk of rows (every chunk must have the same columns)
+
+        Args:
+            df: Rows to append
+        """
+        if self._columnas is None:
+            self._columnas = list(df.columns)
+            self._abrir(df)
+        elif list(df.columns) != self._columnas:
+            raise ValueError("Todas las partes de la tabla deben tener las mismas columnas")
+
+        if self.formato == "csv":
+            df.to_csv(self._archivo, header=False, index=False)
+        elif self.formato in ("parquet", "feather"):
+            import pyarrow as pa
+            self._escritor.write_table(pa.Table.from_pandas(df, schema=self._esquema, preserve_index=False))
+        else:
+            for fila in df.itertuples(index=False, name=None):
+                self._escritor.append([TableExporter._celda(valor) for valor in fila])
+
+    @staticmethod
+    def _celda(valor: Any) -> Any:
+        """
+        Plain Python value openpyxl can write; missing values (pd.NA, NaN, NaT,
+        e.g. an unrecovered mes_recuperacion) become empty cells
+        """
+        if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+            return None
+        return valor.item() if hasattr(valor, "item") else valor
+
+    def _es_ruta(self) -> bool:
+        return isinstance(self.destino, (str, bytes)) or hasattr(self.destino, "__fspath__")
+
+    def _abrir(self, df: pd.DataFrame):
+        if self.formato == "csv":
+            if self._es_ruta():
+                self._archivo = open(self.destino, "w", newline="", encoding="utf-8")
+            else:
+                self._archivo = io.TextIOWrapper(self.destino, encoding="utf-8", newline="", write_through=True)
+            csv.writer(self._archivo, lineterminator="\n").writerow(self._columnas)
+        elif self.formato in ("parquet", "feather"):
+            try:
+                import pyarrow as pa
+                import pyarrow.ipc
+                import pyarrow.parquet as pq
+            except ImportError as error:
+                raise ImportError(f"La exportación a {self.formato.capitalize()} requiere pyarrow (pip install pyarrow)") from error
+            self._esquema = pa.Schema.from_pandas(df, preserve_index=False)
+            if self.formato == "parquet":
+                self._escritor = pq.ParquetWriter(self.destino, self._esquema)
+            else:
+                # Feather v2 is the Arrow IPC file format; record batches are appended as they come
+                self._escritor = pa.ipc.new_file(self.destino, self._esquema)
+        else:
+            from openpyxl import Workbook
+            # Write-only mode streams rows to disk instead of keeping every cell in memory
+            self._libro = Workbook(write_only=True)
+            self._escritor = self._libro.create_sheet(self.hoja)
+            self._escritor.append(self._columnas)
+
+    def cerrar(self):
+        """
+        Flush and close the output (nothing is created if no chunk was written)
+        """
+        if self._columnas is None:
+            return
+        if self.formato == "csv":
+            if not self._es_ruta():
+                # Leave the caller's binary buffer open
+                self._archivo.flush()
+                self._archivo.detach()
+            else:
+                self._archivo.close()
+        elif self.formato in ("parquet", "feather"):
+            self._escritor.close()
+        else:
+            self._libro.save(self.destino)
+        self._columnas = None
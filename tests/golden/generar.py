@@ -0,0 +1,120 @@
+# tests/golden/generar.py - Capture the golden cash flow tables from the baseline commit
+"""
+Run the month-by-month generar_flujo_caja of the baseline commit (the code
+before any engine change) over the scenarios of escenarios() and store its
+tables, so the current engines can be checked against the original behavior.
+
+Usage:
+    python tests/golden/generar.py [--commit 53b113f]
+
+Writes tests/golden/flujo_caja.json (scenarios and column names) and
+tests/golden/flujo_caja.npz (one array per column of each table). Only needs
+rerunning if the scenarios change; the baseline code does not.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import types
+from typing import Any, Dict, List
+
+import numpy as np
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(os.path.dirname(DIRECTORIO))
+
+COMMIT_BASE = "53b113f"
+
+
+def escenarios(semilla: int = 20240601, aleatorios: int = 40) -> List[Dict[str, Any]]:
+    """
+    Edge cases, then seeded random scenarios
+
+    The baseline only sequences up to 3 etapas, so no scenario has more.
+    """
+    base = {
+        'inversion_inicial': 790000.0,
+        'gasto_construccion_mensual': 66293.33,
+        'comision_por_venta': 2000.0,
+        'precio_por_duplex': 140000.0,
+        'num_cuotas': 10,
+        'duplex_por_etapa': 11,
+        'meses_por_etapa': 15,
+        'total_etapas': 3,
+        'tasa_ventas': 0.5,
+        'tea_costo_oportunidad': 0.0512,
+        'porcentaje_down_payment': 40.0,
+        'num_cuotas_restantes': 10,
+    }
+    casos = [
+        base,
+        {**base, 'tasa_ventas': 0.0},
+        {**base, 'total_etapas': 0},
+        {**base, 'duplex_por_etapa': 0},
+        {**base, 'tasa_ventas': 0.35},
+        {**base, 'tasa_ventas': 1.0 / 3},
+        {**base, 'tasa_ventas': 2.5},
+        {**base, 'tasa_ventas': 20.0},
+        {**base, 'num_cuotas_restantes': 0},
+        {**base, 'num_cuotas_restantes': 1},
+        {**base, 'num_cuotas_restantes': 60},
+        {**base, 'tea_costo_oportunidad': 0.0},
+        {**base, 'porcentaje_down_payment': 100.0},
+        {**base, 'inversion_inicial': 0.0, 'total_etapas': 1},
+    ]
+
+    rng = np.random.default_rng(semilla)
+    for _ in range(aleatorios):
+        casos.append({
+            'inversion_inicial': float(rng.choice([0.0, round(rng.uniform(1e5, 2e6), 2)])),
+            'gasto_construccion_mensual': round(float(rng.uniform(1e4, 2e5)), 2),
+            'comision_por_venta': round(float(rng.uniform(0, 5000)), 2),
+            'precio_por_duplex': round(float(rng.uniform(5e4, 3e5)), 2),
+            'num_cuotas': 10,
+            'duplex_por_etapa': int(rng.integers(0, 15)),
+            'meses_por_etapa': int(rng.integers(1, 20)),
+            'total_etapas': int(rng.integers(0, 4)),
+            'tasa_ventas': float(rng.choice([0.0, rng.uniform(0.05, 1), rng.integers(1, 4), rng.uniform(1, 4)])),
+            'tea_costo_oportunidad': float(rng.choice([0.0, rng.uniform(0, 0.2)])),
+            'porcentaje_down_payment': round(float(rng.uniform(0, 100)), 2),
+            'num_cuotas_restantes': int(rng.choice([0, 1, rng.integers(2, 40)])),
+        })
+    return casos
+
+
+def calculadora_base(commit: str):
+    """
+    CashFlowCalculator of the baseline commit, loaded from git without checking it out
+    """
+    codigo = subprocess.run(["git", "show", f"{commit}:cash_flow_calculator.py"], cwd=RAIZ,
+                            check=True, capture_output=True, text=True).stdout
+    modulo = types.ModuleType("cash_flow_calculator_base")
+    exec(compile(codigo, "cash_flow_calculator_base.py", "exec"), modulo.__dict__)
+    return modulo.CashFlowCalculator
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genera las tablas de referencia del commit base")
+    parser.add_argument("--commit", default=COMMIT_BASE, help=f"Commit base (default: {COMMIT_BASE})")
+    args = parser.parse_args(argv)
+
+    calculadora = calculadora_base(args.commit)
+    casos, arreglos = [], {}
+    for numero, parametros in enumerate(escenarios()):
+        df = calculadora.generar_flujo_caja(**parametros)
+        casos.append({'parametros': parametros, 'columnas': list(df.columns)})
+        for posicion, columna in enumerate(df.columns):
+            arreglos[f"{numero}_{posicion}"] = df[columna].to_numpy(dtype=str if columna == "Etapa de Construcción"
+                                                                     else None)
+
+    with open(os.path.join(DIRECTORIO, "flujo_caja.json"), "w", encoding="utf-8") as archivo:
+        json.dump({'commit': args.commit, 'escenarios': casos}, archivo, indent=1, ensure_ascii=False)
+        archivo.write("\n")
+    np.savez_compressed(os.path.join(DIRECTORIO, "flujo_caja.npz"), **arreglos)
+    print(f"{len(casos)} tablas de {args.commit} guardadas en {DIRECTORIO}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
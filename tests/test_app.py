@@ -0,0 +1,115 @@
+# tests/test_app.py - The Streamlit page, driven by streamlit's AppTest
+"""
+Each test runs the page in a fresh AppTest with its own scenario store (in a
+temporary directory) and empty resource caches.
+"""
+import os
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+st = pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from cash_flow_result import CashFlowResult  # noqa: E402
+from table_exporter import TableExporter  # noqa: E402
+from ui_components import UIComponents  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def widget(elementos, etiqueta):
+    [elemento] = [elemento for elemento in elementos if elemento.label == etiqueta]
+    return elemento
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("STREAMLINE_ESCENARIOS", str(tmp_path / "escenarios"))
+    # The store and the result caches are cache_resource objects shared across runs
+    st.cache_resource.clear()
+    prueba = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=120)
+    prueba.run()
+    assert not prueba.exception
+    return prueba
+
+
+def test_descargas_se_generan_solo_al_hacer_click(app):
+    with mock.patch.object(TableExporter, "exportar") as exportar:
+        app.run()
+        app.run()
+
+    assert not exportar.called
+    botones = app.get("download_button")
+    assert [boton.proto.label for boton in botones] == [
+        f"Descargar {UIComponents.FORMATOS_DESCARGA[formato]}"
+        for formato in UIComponents.FORMATOS_DESCARGA if TableExporter.formato_disponible(formato)
+    ]
+    # The file is produced by a callable when the button is clicked, without a rerun
+    assert all(boton.proto.deferred_file_id and boton.proto.ignore_rerun for boton in botones)
+
+
+def test_tabla_paginada_y_filtrada(app):
+    assert len(app.dataframe[0].value) == 50
+    widget(app.selectbox, "📄 Filas por Página").set_value(250).run()
+    completa = app.dataframe[0].value
+    meses = len(completa)
+    assert completa["Mes"].tolist() == list(range(meses))
+    assert not [entrada for entrada in app.number_input if entrada.label.startswith("Página")]
+
+    widget(app.selectbox, "📄 Filas por Página").set_value(25).run()
+    pagina = widget(app.number_input, f"Página (de {-(-meses // 25)})")
+    pagina.set_value(2).run()
+    pd.testing.assert_frame_equal(app.dataframe[0].value, completa.iloc[25:50].reset_index(drop=True))
+    assert app.caption[-1].value == f"Meses 25–49 · {meses} de {meses} meses filtrados"
+
+    widget(app.multiselect, "🏗️ Etapas").set_value([1]).run()
+    etapa = completa[CashFlowResult.COLUMNAS['etapa']]
+    esperada = completa[etapa == etapa.unique()[1]].reset_index(drop=True)
+    assert 0 < len(esperada) < meses
+    pd.testing.assert_frame_equal(app.dataframe[0].value, esperada.iloc[:25])
+    assert app.caption[-1].value.endswith(f"{len(esperada)} de {meses} meses filtrados")
+
+
+def test_parametros_se_aplican_al_enviar_el_formulario(app, monkeypatch):
+    inicial = app.session_state.parametros
+    tabla = app.dataframe[0].value
+
+    # An edit alone is held by the form
+    app.sidebar.number_input(key="precio_por_duplex").set_value(200000.0).run()
+    assert app.session_state.parametros == inicial
+    pd.testing.assert_frame_equal(app.dataframe[0].value, tabla)
+
+    app.sidebar.number_input(key="precio_por_duplex").set_value(200000.0)
+    widget(app.sidebar.button, "🔄 Recalcular Tabla").click().run()
+    assert app.session_state.parametros['precio_por_duplex'] == 200000.0
+    assert not app.dataframe[0].value.equals(tabla)
+
+    # With automatic recalculation an edit applies on its own once the pause ends
+    app.sidebar.toggle(key="auto_recalcular").set_value(True).run()
+    app.sidebar.number_input(key="precio_por_duplex").set_value(180000.0).run()
+    assert app.session_state.parametros['precio_por_duplex'] == 200000.0
+    assert "⏳ Cambios pendientes: se aplican al dejar de editar" in [caption.value for caption in app.caption]
+    monkeypatch.setenv("STREAMLINE_DEBOUNCE_SEGUNDOS", "0")
+    app.run()
+    assert app.session_state.parametros['precio_por_duplex'] == 180000.0
+
+
+def test_guardar_y_cargar_escenario(app):
+    guardados = app.session_state.parametros
+    [nombre] = [entrada for entrada in app.text_input if entrada.label.startswith("📝")]
+    nombre.set_value("A").run()
+    widget(app.button, "💾 Guardar Escenario").click().run()
+    assert not app.exception
+    assert "Escenario guardado: A" in [mensaje.value for mensaje in app.sidebar.success]
+    [escenario] = [seleccion for seleccion in app.sidebar.selectbox if seleccion.label == "📂 Escenario"]
+    assert [etiqueta.split(" (")[0] for etiqueta in escenario.options] == ["A"]
+
+    app.sidebar.number_input(key="precio_por_duplex").set_value(200000.0)
+    widget(app.sidebar.button, "🔄 Recalcular Tabla").click().run()
+    assert app.session_state.parametros != guardados
+
+    widget(app.button, "📂 Cargar Escenario").click().run()
+    assert not app.exception
+    assert app.session_state.parametros == guardados
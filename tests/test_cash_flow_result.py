@@ -0,0 +1,81 @@
+# tests/test_cash_flow_result.py - Compact result against the generar_flujo_caja table
+import numpy as np
+import pandas as pd
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+from cash_flow_result import CashFlowResult
+
+PARAMETROS = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+
+def resultado(**cambios):
+    parametros = {**PARAMETROS, **cambios}
+    programa = CashFlowCalculator.calcular_programa(
+        *(parametros.get(nombre, CashFlowCalculator.PARAMETROS_ESCENARIO[nombre])
+          for nombre in CashFlowCalculator.PARAMETROS_PROGRAMA)
+    )
+    flujo = CashFlowCalculator.valorizar_programa(
+        programa, **{nombre: parametros.get(nombre, CashFlowCalculator.PARAMETROS_ESCENARIO[nombre])
+                     for nombre in CashFlowCalculator.PARAMETROS_VALORIZACION}
+    )
+    return parametros, flujo
+
+
+@pytest.mark.parametrize("cambios", [{}, {'tea_costo_oportunidad': 0.0}, {'total_etapas': 0}, {'tasa_ventas': 2.5}],
+                         ids=["base", "tea_cero", "sin_etapas", "rapido"])
+def test_to_frame_igual_a_la_tabla_e_ida_y_vuelta(cambios):
+    parametros, flujo = resultado(**cambios)
+    df = CashFlowCalculator.generar_flujo_caja(**parametros)
+
+    tabla = flujo.to_frame()
+    pd.testing.assert_frame_equal(tabla, df)
+
+    vuelta = CashFlowResult.from_frame(tabla, parametros['tea_costo_oportunidad'])
+    # Only the etapa labels the table uses come back, so compare them month by month
+    assert [vuelta.etapas[codigo] for codigo in vuelta.etapa] == [flujo.etapas[codigo] for codigo in flujo.etapa]
+    assert vuelta.tea_costo_oportunidad == flujo.tea_costo_oportunidad
+    for campo in CashFlowResult.COLUMNAS:
+        if campo == 'etapa':
+            continue
+        valores = getattr(vuelta, campo)
+        np.testing.assert_array_equal(valores, getattr(flujo, campo), err_msg=campo)
+        assert valores.dtype == getattr(flujo, campo).dtype, campo
+
+
+def test_etiquetas_filas_y_tamano():
+    _, flujo = resultado()
+
+    assert flujo.etiqueta('costo_oportunidad') == "Costo de Oportunidad Mensual (USD, TEA 5.12% Depósito USD)"
+    assert flujo.total_meses == len(flujo) - 1
+    np.testing.assert_array_equal(flujo.mes, np.arange(len(flujo)))
+    assert flujo.to_frame(labels=False).columns.tolist() == list(CashFlowResult.COLUMNAS)
+    renombrada = flujo.to_frame(labels={'costo_oportunidad': "Costo"})
+    assert renombrada.columns[-1] == "Costo" and renombrada.columns[0] == "Mes"
+
+    pagina = flujo.to_frame(filas=np.arange(10, 20))
+    pd.testing.assert_frame_equal(pagina, flujo.to_frame().iloc[10:20].reset_index(drop=True))
+    # A month is 9 float64 fields and 3 int32 ones ('mes' is not stored)
+    assert flujo.nbytes == len(flujo) * (9 * 8 + 3 * 4)
+
+
+def test_la_tabla_no_comparte_memoria_con_el_resultado():
+    _, flujo = resultado()
+    tabla = flujo.to_frame(labels=False)
+
+    tabla.loc[0, 'acumulado'] = 1.0
+    tabla.loc[0, 'duplex_vendidos'] = 99
+
+    assert flujo.acumulado[0] == -PARAMETROS['inversion_inicial']
+    assert flujo.duplex_vendidos[0] == 0
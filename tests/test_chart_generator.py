@@ -0,0 +1,89 @@
+# tests/test_chart_generator.py - Downsampling of the chart lines
+import numpy as np
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+from chart_generator import ChartGenerator
+
+
+def lttb_simple(x, y, max_puntos):
+    """
+    Largest-Triangle-Three-Buckets, one point at a time
+    """
+    n = len(x)
+    bordes = [int(1 + k * (n - 2) / (max_puntos - 2)) for k in range(max_puntos - 1)]
+    bordes[-1] = n - 1
+    indices = [0]
+    for cubo in range(max_puntos - 2):
+        inicio, fin = bordes[cubo], bordes[cubo + 1]
+        if cubo + 2 < len(bordes):
+            siguiente = range(bordes[cubo + 1], bordes[cubo + 2])
+            promedio_x = sum(x[i] for i in siguiente) / len(siguiente)
+            promedio_y = sum(y[i] for i in siguiente) / len(siguiente)
+        else:
+            promedio_x, promedio_y = x[n - 1], y[n - 1]
+        anterior = indices[-1]
+        mejor, mejor_area = inicio, -1.0
+        for i in range(inicio, fin):
+            area = abs((x[anterior] - promedio_x) * (y[i] - y[anterior])
+                       - (x[anterior] - x[i]) * (promedio_y - y[anterior]))
+            if area > mejor_area:
+                mejor, mejor_area = i, area
+        indices.append(mejor)
+    indices.append(n - 1)
+    return np.array(indices)
+
+
+@pytest.mark.parametrize("semilla", range(20))
+@pytest.mark.parametrize("n, max_puntos", [(10, 5), (11, 3), (30, 8), (100, 7), (1000, 50), (1201, 200)])
+def test_reducir_puntos_igual_a_lttb_simple(n, max_puntos, semilla):
+    rng = np.random.default_rng(semilla)
+    x = np.arange(n, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=n))
+
+    indices = ChartGenerator.reducir_puntos(x, y, max_puntos)
+
+    np.testing.assert_array_equal(indices, lttb_simple(x.tolist(), y.tolist(), max_puntos))
+
+
+def test_reducir_puntos_conserva_extremos_y_orden():
+    x = np.arange(500)
+    y = np.sin(x / 20.0)
+    y[137] = 50.0
+
+    indices = ChartGenerator.reducir_puntos(x, y, 40)
+
+    assert len(indices) == 40
+    assert indices[0] == 0 and indices[-1] == 499
+    assert np.all(np.diff(indices) > 0)
+    assert 137 in indices
+
+
+def test_reducir_puntos_sin_limite_o_serie_corta():
+    np.testing.assert_array_equal(ChartGenerator.reducir_puntos(np.arange(10), np.zeros(10), None), np.arange(10))
+    np.testing.assert_array_equal(ChartGenerator.reducir_puntos(np.arange(10), np.zeros(10), 10), np.arange(10))
+    with pytest.raises(ValueError):
+        ChartGenerator.reducir_puntos(np.arange(10), np.zeros(10), 2)
+
+
+def test_grafico_de_flujo_igual_desde_tabla_o_resultado():
+    parametros = {
+        'inversion_inicial': 790000.0, 'gasto_construccion_mensual': 66293.33, 'comision_por_venta': 2000.0,
+        'precio_por_duplex': 140000.0, 'num_cuotas': 10, 'duplex_por_etapa': 11, 'meses_por_etapa': 15,
+        'total_etapas': 3, 'tasa_ventas': 0.5, 'tea_costo_oportunidad': 0.0512,
+    }
+    flujo = CashFlowCalculator.valorizar_programa(
+        CashFlowCalculator.calcular_programa(*(parametros.get(nombre, CashFlowCalculator.PARAMETROS_ESCENARIO[nombre])
+                                               for nombre in CashFlowCalculator.PARAMETROS_PROGRAMA)),
+        **{nombre: parametros.get(nombre, CashFlowCalculator.PARAMETROS_ESCENARIO[nombre])
+           for nombre in CashFlowCalculator.PARAMETROS_VALORIZACION}
+    )
+    df = CashFlowCalculator.generar_flujo_caja(**parametros)
+
+    desde_resultado = ChartGenerator.create_cash_flow_chart(flujo)
+    # The TEA of the table is not needed, nor is the baseline positional TEA argument
+    for figura in (ChartGenerator.create_cash_flow_chart(df),
+                   ChartGenerator.create_cash_flow_chart(df, parametros['tea_costo_oportunidad'])):
+        for traza, esperada in zip(figura.data, desde_resultado.data):
+            np.testing.assert_array_equal(traza.x, esperada.x)
+            np.testing.assert_array_equal(traza.y, esperada.y)
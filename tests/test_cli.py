@@ -0,0 +1,96 @@
+# tests/test_cli.py - Batch runner end to end
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import cli
+from cash_flow_calculator import CashFlowCalculator
+from table_exporter import TableExporter
+
+PARAMETROS = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+LECTORES = {
+    "csv": pd.read_csv,
+    "parquet": pd.read_parquet,
+    "feather": pd.read_feather,
+    "xlsx": pd.read_excel,
+}
+
+
+@pytest.mark.parametrize("formato", [
+    pytest.param(formato, marks=pytest.mark.skipif(not TableExporter.formato_disponible(formato),
+                                                   reason=f"{formato} no disponible"))
+    for formato in TableExporter.FORMATOS
+])
+def test_escenario_sin_recuperacion_en_cada_formato(formato, tmp_path):
+    escenarios = [
+        {'nombre': "base", **PARAMETROS},
+        # Never sells, so never recovers the investment
+        {'nombre': "sin_ventas", **PARAMETROS, 'tasa_ventas': 0.0},
+    ]
+    ruta = tmp_path / "escenarios.json"
+    ruta.write_text(json.dumps(escenarios), encoding="utf-8")
+    salida = tmp_path / "resultados"
+
+    codigo = cli.main([str(ruta), "--salida", str(salida), "--formato", formato, "--tablas", "--silencioso"])
+
+    assert codigo == 0
+    extension = TableExporter.EXTENSIONES[formato]
+    metricas = LECTORES[formato](os.path.join(salida, f"metricas{extension}"))
+    assert metricas["escenario"].tolist() == ["base", "sin_ventas"]
+    assert metricas["mes_recuperacion"].isna().tolist() == [False, True]
+    assert metricas["payback_descontado"].isna().tolist()[1]
+
+    flujos = LECTORES[formato](os.path.join(salida, f"flujos{extension}"))
+    for escenario in escenarios:
+        parametros = {clave: valor for clave, valor in escenario.items() if clave != 'nombre'}
+        esperado = CashFlowCalculator.generar_flujo_caja(**parametros)
+        tabla = flujos[flujos["Escenario"] == escenario['nombre']]
+        assert len(tabla) == len(esperado)
+        assert tabla["Acumulado (USD)"].iloc[-1] == pytest.approx(esperado["Acumulado (USD)"].iloc[-1], rel=1e-12)
+
+
+@pytest.mark.parametrize("columna, valor, detalle", [
+    ('total_etapas', "", "celda vacía"),
+    ('precio_por_duplex', "", "celda vacía"),
+    ('num_cuotas', "diez", "no numérica ('diez')"),
+])
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_celda_invalida_es_error_de_uso(columna, valor, detalle, jobs, tmp_path, capsys):
+    filas = [dict(PARAMETROS) for _ in range(5)]
+    filas[3][columna] = valor
+    ruta = tmp_path / "escenarios.csv"
+    pd.DataFrame(filas).to_csv(ruta, index=False)
+
+    codigo = cli.main([str(ruta), "--salida", str(tmp_path / "resultados"), "--tablas", "--silencioso",
+                       "--jobs", jobs, "--tamano-chunk", "2"])
+
+    assert codigo == 2
+    error = capsys.readouterr().err
+    assert f"fila 4, columna '{columna}'" in error
+    assert detalle in error
+
+
+def test_opcional_vacio_usa_el_valor_por_defecto(tmp_path):
+    filas = [{**PARAMETROS, 'num_cuotas_restantes': 10}, {**PARAMETROS, 'num_cuotas_restantes': None}]
+    ruta = tmp_path / "escenarios.csv"
+    pd.DataFrame(filas).to_csv(ruta, index=False)
+    salida = tmp_path / "resultados"
+
+    assert cli.main([str(ruta), "--salida", str(salida), "--silencioso"]) == 0
+    metricas = pd.read_csv(salida / "metricas.csv")
+    metricas = metricas.drop(columns="escenario")
+    pd.testing.assert_series_equal(metricas.iloc[0], metricas.iloc[1], check_names=False)
@@ -0,0 +1,78 @@
+# tests/test_evaluate_batch.py - Batch metrics against the per-scenario path
+"""
+evaluate_batch must give, for every scenario, exactly the metrics of
+calcular_metricas_financieras over its generar_flujo_caja table, however the
+scenarios are split into blocks. Unrecovered scenarios ("No alcanzado") are <NA>.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+
+RUTA_GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "flujo_caja.json")
+
+with open(RUTA_GOLDEN, encoding="utf-8") as archivo:
+    ESCENARIOS = [caso['parametros'] for caso in json.load(archivo)['escenarios']]
+
+
+def metricas_por_escenario(parametros):
+    df = CashFlowCalculator.generar_flujo_caja(**parametros)
+    return CashFlowCalculator.calcular_metricas_financieras(df, parametros['tea_costo_oportunidad'])
+
+
+def assert_metricas_iguales(fila, esperadas, contexto):
+    for clave, esperado in esperadas.items():
+        obtenido = fila[clave]
+        if esperado == "No alcanzado" or esperado is None or (isinstance(esperado, float) and np.isnan(esperado)):
+            assert pd.isna(obtenido), (contexto, clave, obtenido)
+        else:
+            assert obtenido == esperado, (contexto, clave, obtenido, esperado)
+
+
+@pytest.fixture(scope="module")
+def esperadas():
+    return [metricas_por_escenario(parametros) for parametros in ESCENARIOS]
+
+
+@pytest.mark.parametrize("tamano_bloque", [1, 7, 2048])
+def test_igual_a_metricas_por_escenario(tamano_bloque, esperadas):
+    lote = CashFlowCalculator.evaluate_batch(pd.DataFrame(ESCENARIOS), tamano_bloque=tamano_bloque)
+
+    assert len(lote) == len(ESCENARIOS)
+    for numero, metricas in enumerate(esperadas):
+        assert_metricas_iguales(lote.iloc[numero], metricas, numero)
+
+
+def test_indice_tipos_y_valores_por_defecto():
+    base = {clave: valor for clave, valor in ESCENARIOS[0].items()
+            if CashFlowCalculator.PARAMETROS_ESCENARIO[clave] is None}
+    escenarios = pd.DataFrame(
+        [base, {**base, 'porcentaje_down_payment': 60.0}, {**base, 'tasa_ventas': 0.0}],
+        index=["base", "mas_anticipo", "sin_ventas"]
+    )
+    # A NaN optional parameter falls back to its default
+    escenarios.loc["base", 'porcentaje_down_payment'] = np.nan
+
+    lote = CashFlowCalculator.evaluate_batch(escenarios)
+
+    assert lote.index.tolist() == ["base", "mas_anticipo", "sin_ventas"]
+    assert str(lote['mes_recuperacion'].dtype) == "Int64"
+    assert str(lote['payback_descontado'].dtype) == "Int64"
+    assert pd.isna(lote.loc["sin_ventas", 'mes_recuperacion'])
+    assert_metricas_iguales(lote.loc["base"], metricas_por_escenario(base), "base")
+    assert_metricas_iguales(lote.loc["mas_anticipo"],
+                            metricas_por_escenario({**base, 'porcentaje_down_payment': 60.0}), "mas_anticipo")
+
+
+def test_sin_escenarios_y_columnas_faltantes():
+    vacio = CashFlowCalculator.evaluate_batch(pd.DataFrame(columns=list(ESCENARIOS[0])))
+    assert vacio.empty
+    assert 'van' in vacio.columns
+
+    with pytest.raises(ValueError, match="tasa_ventas"):
+        CashFlowCalculator.evaluate_batch([{clave: valor for clave, valor in ESCENARIOS[0].items()
+                                            if clave != 'tasa_ventas'}])
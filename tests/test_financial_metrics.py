@@ -0,0 +1,105 @@
+# tests/test_financial_metrics.py - Investment metrics against plain per-scenario formulas
+import numpy as np
+import pytest
+
+from financial_metrics import FinancialMetrics
+
+
+def van_simple(flujo, tasa):
+    return sum(valor / (1 + tasa) ** mes for mes, valor in enumerate(flujo))
+
+
+def payback_simple(flujo, tasa):
+    acumulado = 0.0
+    for mes, valor in enumerate(flujo):
+        acumulado += valor / (1 + tasa) ** mes
+        if acumulado > 0:
+            return mes
+    return -1
+
+
+def flujos_aleatorios(semilla, escenarios=100, meses=60):
+    """
+    Project-like flows: an investment, months of construction costs, then sales income
+    """
+    rng = np.random.default_rng(semilla)
+    flujos = np.zeros((escenarios, meses))
+    flujos[:, 0] = -rng.uniform(1e5, 1e6, escenarios)
+    fin_obra = rng.integers(5, meses // 2, escenarios)
+    for fila, fin in enumerate(fin_obra):
+        flujos[fila, 1:fin + 1] -= rng.uniform(1e4, 1e5)
+        flujos[fila, rng.integers(1, meses, 20)] += rng.uniform(0, 3e5, 20)
+    return flujos, rng.uniform(0, 0.02, escenarios)
+
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_igual_a_las_formulas_simples(semilla):
+    flujos, tasas = flujos_aleatorios(semilla)
+
+    metricas = FinancialMetrics.calcular(flujos, tasas)
+
+    for fila, (flujo, tasa) in enumerate(zip(flujos, tasas)):
+        assert metricas['van'][fila] == pytest.approx(van_simple(flujo, tasa), rel=1e-12, abs=1e-6)
+        assert metricas['payback_descontado'][fila] == payback_simple(flujo, tasa)
+        acumulado = np.cumsum(flujo)
+        assert metricas['capital_maximo'][fila] == pytest.approx(max(-acumulado.min(), 0.0), rel=1e-12)
+        assert metricas['moic'][fila] == pytest.approx(flujo[flujo > 0].sum() / -flujo[flujo < 0].sum(), rel=1e-12)
+        tir = metricas['tir'][fila]
+        if np.isnan(tir):
+            # Undefined only when the VAN keeps its sign over the whole search range
+            extremos = [van_simple(flujo, tasa_mensual) for tasa_mensual in
+                        (FinancialMetrics.TIR_MENSUAL_MINIMA, FinancialMetrics.TIR_MENSUAL_MAXIMA)]
+            assert np.sign(extremos[0]) == np.sign(extremos[1])
+        else:
+            escala = np.abs(flujo).sum()
+            assert abs(van_simple(flujo, (1 + tir) ** (1 / 12) - 1)) <= 1e-8 * escala
+
+
+def test_casos_conocidos():
+    flujos = np.array([
+        [-100.0, 110.0, 0.0],
+        [-100.0, 0.0, 121.0],
+        [100.0, 50.0, 0.0],
+        [-100.0, 50.0, 40.0],
+    ])
+
+    metricas = FinancialMetrics.calcular(flujos, np.array([0.1, 0.1, 0.1, 0.0]))
+
+    np.testing.assert_allclose(metricas['tir'][:2], [1.1 ** 12 - 1] * 2, rtol=1e-9)
+    assert np.isnan(metricas['tir'][2]) and np.isnan(metricas['moic'][2])
+    np.testing.assert_allclose(metricas['van'], [0.0, 0.0, 100 + 50 / 1.1, -10.0], atol=1e-9)
+    assert metricas['payback_descontado'].tolist() == [-1, -1, 0, -1]
+    np.testing.assert_allclose(metricas['moic'][[0, 1, 3]], [1.1, 1.21, 0.9])
+    np.testing.assert_allclose(metricas['capital_maximo'], [100.0, 100.0, 0.0, 100.0])
+
+
+def test_no_depende_del_lote_los_bloques_ni_los_meses_finales_en_cero():
+    flujos, tasas = flujos_aleatorios(5, escenarios=FinancialMetrics.FILAS_MES_A_MES + 6)
+
+    juntos = FinancialMetrics.calcular(flujos, tasas)
+    por_separado = [FinancialMetrics.calcular(flujos[fila:fila + 1], tasas[fila:fila + 1])
+                    for fila in range(len(flujos))]
+    con_ceros = FinancialMetrics.calcular(np.pad(flujos, ((0, 0), (0, 30))), tasas)
+
+    for nombre, valores in juntos.items():
+        np.testing.assert_array_equal(valores, np.concatenate([parte[nombre] for parte in por_separado]),
+                                      err_msg=nombre)
+        np.testing.assert_array_equal(valores, con_ceros[nombre], err_msg=nombre)
+
+    # Months fed block by block through the returned state
+    estado = None
+    for inicio in range(0, flujos.shape[1], 7):
+        estado = FinancialMetrics.descontar(flujos[:, inicio:inicio + 7], tasas[:, None], estado, payback=True)
+    np.testing.assert_array_equal(estado['van'][:, 0], juntos['van'])
+    np.testing.assert_array_equal(estado['payback'][:, 0], juntos['payback_descontado'])
+
+
+def test_a_escalares():
+    metricas = FinancialMetrics.calcular(np.array([[100.0, 50.0], [-100.0, 50.0]]), np.array([0.0, 0.0]))
+
+    assert FinancialMetrics.a_escalares(metricas, 0) == {
+        'capital_maximo': 0.0, 'van': 150.0, 'tir': None, 'moic': None, 'payback_descontado': 0,
+    }
+    escalares = FinancialMetrics.a_escalares(metricas, 1)
+    assert escalares['payback_descontado'] == "No alcanzado"
+    assert type(escalares['van']) is float
@@ -0,0 +1,127 @@
+# tests/test_flujo_caja.py - Cash flow tables against the baseline commit
+"""
+Golden tables come from the month-by-month generar_flujo_caja of the baseline
+commit (see tests/golden/generar.py): edge cases (tasa 0, 0 etapas, 0 dúplex,
+fractional rates, 0/1/many cuotas, TEA 0) and seeded random scenarios.
+
+Two intended changes are accounted for:
+
+- The baseline estimated the timeline; the engines now size it exactly. Each
+  table is generated with horizonte_meses set to the golden table's last month.
+- "Ingresos Acumulados (USD)" was re-summed over all previous months every
+  month (pandas' pairwise summation); it is now a running sum, so it can differ
+  from the baseline in the last bits. It is checked to be exactly the cumulative
+  sum of the month income, and within 1e-12 of the baseline.
+
+Every other column must match the baseline bit for bit.
+
+The exact timeline, the fixed horizon and the MESES_MAXIMOS cut are also
+checked directly, on variations of the first scenario.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+
+DIRECTORIO_GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+INGRESOS_MES = "Ingresos por Down Payment + Cuotas Mensuales (USD)"
+INGRESOS_ACUMULADOS = "Ingresos Acumulados (USD)"
+
+
+def cargar_golden():
+    with open(os.path.join(DIRECTORIO_GOLDEN, "flujo_caja.json"), encoding="utf-8") as archivo:
+        casos = json.load(archivo)['escenarios']
+    with np.load(os.path.join(DIRECTORIO_GOLDEN, "flujo_caja.npz")) as arreglos:
+        return [
+            (caso['parametros'], {columna: arreglos[f"{numero}_{posicion}"]
+                                  for posicion, columna in enumerate(caso['columnas'])})
+            for numero, caso in enumerate(casos)
+        ]
+
+
+GOLDEN = cargar_golden()
+
+
+@pytest.mark.parametrize("motor", CashFlowCalculator.MOTORES)
+@pytest.mark.parametrize("numero", range(len(GOLDEN)))
+def test_igual_al_commit_base(numero, motor):
+    parametros, esperado = GOLDEN[numero]
+    total_meses = len(esperado["Mes"]) - 1
+    df = CashFlowCalculator.generar_flujo_caja(**parametros, horizonte_meses=total_meses, motor=motor)
+
+    assert list(df.columns) == list(esperado)
+    for columna, valores in esperado.items():
+        obtenido = df[columna].to_numpy()
+        if columna == INGRESOS_ACUMULADOS:
+            np.testing.assert_array_equal(obtenido, np.cumsum(df[INGRESOS_MES].to_numpy()))
+            np.testing.assert_allclose(obtenido, valores, rtol=1e-12, atol=1e-6)
+        elif valores.dtype.kind == "U":
+            assert obtenido.tolist() == valores.tolist(), columna
+        else:
+            assert obtenido.dtype.kind == valores.dtype.kind, columna
+            np.testing.assert_array_equal(obtenido, valores, err_msg=columna)
+
+
+@pytest.mark.parametrize("numero", range(len(GOLDEN)))
+def test_motores_identicos_con_linea_de_tiempo_exacta(numero):
+    parametros, _ = GOLDEN[numero]
+    referencia = CashFlowCalculator.generar_flujo_caja(**parametros)
+    vectorizado = CashFlowCalculator.generar_flujo_caja(**parametros, motor="vectorizado")
+
+    assert list(referencia.columns) == list(vectorizado.columns)
+    for columna in referencia.columns:
+        assert referencia[columna].tolist() == vectorizado[columna].tolist(), columna
+
+
+PARAMETROS = GOLDEN[0][0]
+DUPLEX_VENDIDOS = "Dúplex Vendidos"
+
+
+@pytest.mark.parametrize("motor", CashFlowCalculator.MOTORES)
+@pytest.mark.parametrize("cambios", [{}, {'tasa_ventas': 3.0}, {'num_cuotas_restantes': 0}, {'tasa_ventas': 0.0}],
+                         ids=["base", "rapido", "sin_cuotas", "sin_ventas"])
+def test_linea_de_tiempo_exacta(cambios, motor):
+    parametros = {**PARAMETROS, **cambios}
+    df = CashFlowCalculator.generar_flujo_caja(**parametros, motor=motor)
+
+    total_meses = len(df) - 1
+    fin_construccion = parametros['meses_por_etapa'] * parametros['total_etapas']
+    vendidos = df[DUPLEX_VENDIDOS].to_numpy()
+    ultima_venta = np.flatnonzero(vendidos)[-1] if vendidos.any() else 0
+    # Ends with construction or with the last cuota of the last sale, whichever is later
+    assert total_meses == max(fin_construccion, ultima_venta + parametros['num_cuotas_restantes'])
+    if parametros['tasa_ventas'] > 0:
+        assert vendidos.sum() == parametros['duplex_por_etapa'] * parametros['total_etapas']
+    if total_meses > fin_construccion:
+        # No padding: the last month still collects a cuota (or a down payment)
+        assert df[INGRESOS_MES].iloc[-1] != 0
+
+
+@pytest.mark.parametrize("motor", CashFlowCalculator.MOTORES)
+def test_horizonte_fijo(motor):
+    exacto = CashFlowCalculator.generar_flujo_caja(**PARAMETROS, motor=motor)
+    total_meses = len(exacto) - 1
+
+    # A shorter horizon cuts the table (later sales are dropped)
+    corto = CashFlowCalculator.generar_flujo_caja(**PARAMETROS, horizonte_meses=40, motor=motor)
+    assert corto.equals(exacto.iloc[:41])
+
+    # A longer one pads it with months without movements
+    largo = CashFlowCalculator.generar_flujo_caja(**PARAMETROS, horizonte_meses=total_meses + 12, motor=motor)
+    assert len(largo) == total_meses + 13
+    assert largo.iloc[:total_meses + 1].equals(exacto)
+    relleno = largo.iloc[total_meses + 1:]
+    assert (relleno[INGRESOS_MES] == 0).all() and (relleno["Gastos Construcción (USD)"] == 0).all()
+    assert (relleno["Acumulado (USD)"] == exacto["Acumulado (USD)"].iloc[-1]).all()
+
+
+@pytest.mark.parametrize("motor", CashFlowCalculator.MOTORES)
+def test_ventas_demasiado_lentas_se_cortan_en_el_maximo(motor):
+    df = CashFlowCalculator.generar_flujo_caja(**{**PARAMETROS, 'tasa_ventas': 0.01}, motor=motor)
+
+    assert len(df) - 1 == CashFlowCalculator.MESES_MAXIMOS
+    assert df[DUPLEX_VENDIDOS].sum() < PARAMETROS['duplex_por_etapa'] * PARAMETROS['total_etapas']
@@ -0,0 +1,81 @@
+# tests/test_import_budget.py - Import-time budget for the app modules
+"""
+Cold import time of each module, measured in a fresh interpreter, must stay
+within its budget and must not load dependencies that are meant to load lazily.
+
+Times are measured on top of the pandas/numpy baseline every module pays
+anyway. Budgets are a few times the cost measured when they were set; scale
+them on slow machines with STREAMLINE_ESCALA_PRESUPUESTO (e.g. 2).
+
+app is the Streamlit entry script, so importing it also runs one bare-mode pass
+of the page (defaults in, first calculation and chart); it runs in a
+temporary directory so its scenario store does not touch the repository.
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (budget in ms over the baseline, modules it must not import)
+PRESUPUESTOS = {
+    "cash_flow_calculator": (10, ("streamlit", "plotly", "openpyxl")),
+    "monte_carlo": (15, ("streamlit", "plotly", "openpyxl")),
+    "cli": (60, ("streamlit", "plotly", "openpyxl")),
+    "chart_generator": (10, ("streamlit", "plotly", "openpyxl")),
+    # streamlit itself loads plotly (graph objects) for its theme
+    "ui_components": (2500, ("plotly.express", "openpyxl")),
+    "app": (4000, ("plotly.express", "openpyxl")),
+}
+
+REPETICIONES = 3
+ESCALA = float(os.environ.get("STREAMLINE_ESCALA_PRESUPUESTO", 1.0))
+
+BASE = "pandas"
+
+MEDIR = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+duracion = (time.perf_counter() - inicio) * 1000
+print(json.dumps({{"ms": duracion, "modulos": sorted(sys.modules)}}))
+"""
+
+
+def medir(modulo: str, directorio: str) -> dict:
+    """
+    Best-of-REPETICIONES cold import time of a module, each run in a new interpreter
+
+    Returns:
+        Dict with the best time in ms and the modules loaded
+    """
+    entorno = {**os.environ, 'PYTHONPATH': RAIZ, 'STREAMLINE_ESCENARIOS': os.path.join(directorio, "escenarios")}
+    mejor = None
+    for _ in range(REPETICIONES):
+        salida = subprocess.run(
+            [sys.executable, "-c", f"import {BASE}\n" + MEDIR.format(modulo=modulo)],
+            cwd=directorio, env=entorno, capture_output=True, text=True, check=True
+        )
+        resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+        if mejor is None or resultado["ms"] < mejor["ms"]:
+            mejor = resultado
+    return mejor
+
+
+@pytest.mark.parametrize("modulo", list(PRESUPUESTOS))
+def test_presupuesto_importacion(modulo, tmp_path):
+    presupuesto, prohibidos = PRESUPUESTOS[modulo]
+    if "streamlit" not in prohibidos and importlib.util.find_spec("streamlit") is None:
+        pytest.skip("streamlit no está instalado")
+
+    resultado = medir(modulo, str(tmp_path))
+
+    cargados = [prohibido for prohibido in prohibidos
+                if any(m == prohibido or m.startswith(prohibido + ".") for m in resultado["modulos"])]
+    assert not cargados, f"{modulo} importa {', '.join(cargados)}"
+    assert resultado["ms"] <= presupuesto * ESCALA, \
+        f"{modulo}: {resultado['ms']:.1f} ms (límite {presupuesto * ESCALA:.0f} ms)"
@@ -0,0 +1,95 @@
+# tests/test_monte_carlo.py - Monte Carlo paths against the deterministic model
+import numpy as np
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+from monte_carlo import MonteCarloSimulator
+
+PARAMETROS = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+
+def metricas_deterministas(parametros):
+    df = CashFlowCalculator.generar_flujo_caja(**parametros)
+    return CashFlowCalculator.calcular_metricas_financieras(df, parametros['tea_costo_oportunidad'])
+
+
+def test_sin_ventas_todos_los_caminos_son_el_flujo_determinista():
+    parametros = {**PARAMETROS, 'tasa_ventas': 0.0}
+    df = CashFlowCalculator.generar_flujo_caja(**parametros)
+
+    resultado = MonteCarloSimulator.simular(parametros, num_caminos=50, semilla=1)
+
+    bandas = resultado['bandas_acumulado']
+    assert resultado['horizonte_meses'] == len(df) - 1
+    assert bandas["Mes"].tolist() == df["Mes"].tolist()
+    for etiqueta in ("P5", "P50", "P95"):
+        np.testing.assert_allclose(bandas[etiqueta], df["Acumulado (USD)"], rtol=1e-12)
+    assert resultado['probabilidad_recuperacion'] == 0
+    assert resultado['mes_recuperacion'] == {"P5": None, "P50": None, "P95": None}
+    assert resultado['distribucion_recuperacion'].empty
+
+
+@pytest.mark.parametrize("distribucion_ventas", MonteCarloSimulator.DISTRIBUCIONES_VENTAS)
+@pytest.mark.parametrize("cambios", [{}, {'porcentaje_down_payment': 100.0}, {'num_cuotas_restantes': 0}])
+def test_precio_fijo_vendiendo_todo_da_la_ganancia_determinista(distribucion_ventas, cambios):
+    # Every path sells out and collects all its cuotas; only the timing differs
+    parametros = {**PARAMETROS, **cambios}
+
+    resultado = MonteCarloSimulator.simular(parametros, num_caminos=200, distribucion_ventas=distribucion_ventas,
+                                            distribucion_precio="fijo", semilla=7)
+
+    esperado = metricas_deterministas(parametros)
+    for valor in resultado['ganancia_neta'].values():
+        assert valor == pytest.approx(esperado['ganancia_neta'], rel=1e-12)
+    # Without cuotas 60% of the price is never paid, so no path recovers
+    recupera = esperado['mes_recuperacion'] != "No alcanzado"
+    assert resultado['probabilidad_recuperacion'] == (1 if recupera else 0)
+    assert resultado['distribucion_recuperacion']["Caminos"].sum() == (200 if recupera else 0)
+
+
+def test_precio_aleatorio_se_centra_en_el_precio_base():
+    resultado = MonteCarloSimulator.simular(PARAMETROS, num_caminos=4000, distribucion_precio="lognormal",
+                                            volatilidad_precio=0.1, semilla=3)
+
+    ganancia = resultado['ganancia_neta']
+    assert ganancia["P5"] < ganancia["P50"] < ganancia["P95"]
+    assert ganancia["P50"] == pytest.approx(metricas_deterministas(PARAMETROS)['ganancia_neta'], rel=0.05)
+
+
+def test_semilla_reproducible_y_horizonte_fijo():
+    primero = MonteCarloSimulator.simular(PARAMETROS, num_caminos=100, semilla=11, horizonte_meses=40)
+    segundo = MonteCarloSimulator.simular(PARAMETROS, num_caminos=100, semilla=11, horizonte_meses=40)
+    otro = MonteCarloSimulator.simular(PARAMETROS, num_caminos=100, semilla=12, horizonte_meses=40)
+
+    assert primero['horizonte_meses'] == 40
+    assert len(primero['bandas_acumulado']) == 41
+    assert primero['bandas_acumulado'].equals(segundo['bandas_acumulado'])
+    assert primero['ganancia_neta'] == segundo['ganancia_neta']
+    assert not primero['bandas_acumulado'].equals(otro['bandas_acumulado'])
+
+
+@pytest.mark.parametrize("argumentos, mensaje", [
+    ({'num_caminos': 0}, "num_caminos"),
+    ({'distribucion_ventas': "uniforme"}, "ventas"),
+    ({'distribucion_precio': "uniforme"}, "precio"),
+])
+def test_argumentos_invalidos(argumentos, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        MonteCarloSimulator.simular(PARAMETROS, **argumentos)
+
+
+def test_parametros_faltantes():
+    with pytest.raises(ValueError, match="precio_por_duplex"):
+        MonteCarloSimulator.simular({clave: valor for clave, valor in PARAMETROS.items()
+                                     if clave != 'precio_por_duplex'})
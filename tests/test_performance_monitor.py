@@ -0,0 +1,117 @@
+# tests/test_performance_monitor.py - Spans and rerun records, switched on through the class settings
+import os
+import pstats
+import time
+import tracemalloc
+
+import pytest
+
+from performance_monitor import PerformanceMonitor
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    """
+    Turn timing on (no memory, no profiles) for one test
+    """
+    monkeypatch.setattr(PerformanceMonitor, "ACTIVO", True)
+    monkeypatch.setattr(PerformanceMonitor, "MEMORIA", False)
+    monkeypatch.setattr(PerformanceMonitor, "DIRECTORIO_PERFILES", None)
+    rastreando = tracemalloc.is_tracing()
+    yield monkeypatch
+    PerformanceMonitor._descartar()
+    if not rastreando:
+        tracemalloc.stop()
+
+
+def test_inactivo_no_mide_nada(monkeypatch):
+    monkeypatch.setattr(PerformanceMonitor, "ACTIVO", False)
+
+    assert PerformanceMonitor.iniciar_rerun() is None
+    assert PerformanceMonitor.span("calculo") is PerformanceMonitor._SIN_MEDICION
+    historial = PerformanceMonitor.nuevo_historial()
+    with PerformanceMonitor.rerun("grafico", historial):
+        pass
+    assert PerformanceMonitor.terminar_rerun(historial) is None
+    assert not historial
+
+
+def test_spans_del_rerun_se_acumulan(monitor):
+    historial = PerformanceMonitor.nuevo_historial()
+
+    registro = PerformanceMonitor.iniciar_rerun()
+    for _ in range(3):
+        with PerformanceMonitor.span("calculo"):
+            time.sleep(0.002)
+    with PerformanceMonitor.span("tabla"):
+        pass
+    with PerformanceMonitor.rerun("grafico", historial):
+        pass
+    terminado = PerformanceMonitor.terminar_rerun(historial)
+
+    assert terminado is registro and list(historial) == [registro]
+    assert registro['nombre'] == "app" and registro['perfil'] is None
+    assert list(registro['spans']) == ["calculo", "tabla", "grafico"]
+    assert registro['spans']['calculo']['llamadas'] == 3 and registro['spans']['calculo']['ms'] >= 6
+    assert registro['spans']['calculo']['kib'] is None
+    assert registro['total_ms'] >= sum(span['ms'] for span in registro['spans'].values())
+    assert PerformanceMonitor.registro_actual() is None
+    assert PerformanceMonitor.terminar_rerun(historial) is None
+
+
+def test_rerun_de_fragmento_y_registro_explicito(monitor):
+    historial = PerformanceMonitor.nuevo_historial()
+
+    with PerformanceMonitor.rerun("grafico", historial):
+        with PerformanceMonitor.span("dibujo"):
+            pass
+    [fragmento] = historial
+    assert fragmento['nombre'] == "grafico"
+    assert set(fragmento['spans']) == {"grafico", "dibujo"}
+
+    # Work done after the rerun ended (a download) still lands in its record
+    with PerformanceMonitor.span("exportacion[csv]", fragmento):
+        pass
+    assert fragmento['spans']['exportacion[csv]']['llamadas'] == 1
+    # Without a rerun, a span has nowhere to go
+    with PerformanceMonitor.span("suelto"):
+        pass
+    assert "suelto" not in fragmento['spans']
+
+
+def test_rerun_sin_terminar_se_descarta_e_historial_limitado(monitor):
+    historial = PerformanceMonitor.nuevo_historial()
+
+    PerformanceMonitor.iniciar_rerun()
+    with PerformanceMonitor.span("guardado"):
+        pass
+    # Stopped by st.rerun: the next run starts over
+    registro = PerformanceMonitor.iniciar_rerun()
+    assert PerformanceMonitor.terminar_rerun(historial) is registro
+    assert list(historial) == [registro] and not registro['spans']
+
+    for numero in range(PerformanceMonitor.HISTORIAL + 5):
+        PerformanceMonitor.iniciar_rerun(f"app{numero}")
+        PerformanceMonitor.terminar_rerun(historial)
+    assert len(historial) == PerformanceMonitor.HISTORIAL
+    assert historial[-1]['nombre'] == f"app{PerformanceMonitor.HISTORIAL + 4}"
+
+
+def test_memoria_y_perfiles(monitor, tmp_path):
+    directorio = tmp_path / "perfiles"
+    monitor.setattr(PerformanceMonitor, "MEMORIA", True)
+    monitor.setattr(PerformanceMonitor, "DIRECTORIO_PERFILES", str(directorio))
+
+    PerformanceMonitor.iniciar_rerun()
+    assert tracemalloc.is_tracing()
+    with PerformanceMonitor.span("calculo"):
+        datos = [bytes(1024) for _ in range(256)]
+    registro = PerformanceMonitor.terminar_rerun()
+
+    assert registro['spans']['calculo']['kib'] >= 256
+    assert os.path.dirname(registro['perfil']) == str(directorio)
+    assert registro['perfil'].endswith("-app")
+    assert os.path.getsize(registro['perfil'] + ".tracemalloc") > 0
+    estadisticas = pstats.Stats(registro['perfil'] + ".prof")
+    assert estadisticas.total_calls > 0
+    del datos
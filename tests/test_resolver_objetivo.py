@@ -0,0 +1,92 @@
+# tests/test_resolver_objetivo.py - Goal seek against the per-scenario metrics
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+
+PARAMETROS = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+
+def metrica(variable, valor, nombre):
+    parametros = {**PARAMETROS, variable: valor}
+    df = CashFlowCalculator.generar_flujo_caja(**parametros)
+    return CashFlowCalculator.calcular_metricas_financieras(df, parametros['tea_costo_oportunidad'])[nombre]
+
+
+def cumple(valor_metrica, nombre, objetivo):
+    if CashFlowCalculator.METRICAS_OBJETIVO[nombre]:
+        return valor_metrica >= objetivo
+    return valor_metrica != "No alcanzado" and valor_metrica <= objetivo
+
+
+@pytest.mark.parametrize("puntos_por_iteracion", [1, 8])
+@pytest.mark.parametrize("variable, nombre, objetivo, minimo, maximo", [
+    ('precio_por_duplex', 'ganancia_neta', 1_000_000.0, 100000.0, 250000.0),
+    ('precio_por_duplex', 'van', 0.0, 50000.0, 250000.0),
+    ('tasa_ventas', 'mes_recuperacion', 40, 0.2, 5.0),
+    ('porcentaje_down_payment', 'costo_oportunidad_total', 200000.0, 10.0, 100.0),
+])
+def test_valor_en_el_borde_del_objetivo(variable, nombre, objetivo, minimo, maximo, puntos_por_iteracion):
+    resultado = CashFlowCalculator.resolver_objetivo(PARAMETROS, variable, nombre, objetivo, minimo, maximo,
+                                                     puntos_por_iteracion=puntos_por_iteracion)
+
+    assert resultado['alcanzado']
+    valor = resultado['valor']
+    tolerancia = CashFlowCalculator.VARIABLES_OBJETIVO[variable]
+    # The value meets the target and the value one tolerance further out does not
+    encontrado = metrica(variable, valor, nombre)
+    assert cumple(encontrado, nombre, objetivo)
+    afuera = valor - tolerancia if cumple(metrica(variable, maximo, nombre), nombre, objetivo) else valor + tolerancia
+    assert not cumple(metrica(variable, afuera, nombre), nombre, objetivo)
+    assert resultado['valor_metrica'] == pytest.approx(encontrado, rel=1e-12)
+    assert resultado['evaluaciones'] == 2 + resultado['iteraciones'] * puntos_por_iteracion
+
+
+def test_todo_el_rango_cumple_o_ninguno():
+    todo = CashFlowCalculator.resolver_objetivo(PARAMETROS, 'precio_por_duplex', 'ganancia_neta', 0.0,
+                                                150000.0, 200000.0)
+    assert (todo['valor'], todo['iteraciones'], todo['alcanzado']) == (150000.0, 0, True)
+
+    ninguno = CashFlowCalculator.resolver_objetivo(PARAMETROS, 'tasa_ventas', 'mes_recuperacion', 5,
+                                                   0.2, 5.0)
+    assert (ninguno['valor'], ninguno['valor_metrica'], ninguno['alcanzado']) == (None, None, False)
+
+
+def test_variable_resuelta_no_hace_falta_en_los_parametros():
+    sin_precio = {clave: valor for clave, valor in PARAMETROS.items() if clave != 'precio_por_duplex'}
+
+    resultado = CashFlowCalculator.resolver_objetivo(sin_precio, 'precio_por_duplex', 'ganancia_neta',
+                                                     1_000_000.0, 100000.0, 250000.0)
+
+    assert resultado['valor'] == CashFlowCalculator.resolver_objetivo(
+        PARAMETROS, 'precio_por_duplex', 'ganancia_neta', 1_000_000.0, 100000.0, 250000.0)['valor']
+
+
+@pytest.mark.parametrize("argumentos, mensaje", [
+    ({'variable': 'comision_por_venta'}, "Variable desconocida"),
+    ({'metrica': 'moic'}, "Métrica desconocida"),
+    ({'minimo': 300000.0}, "mínimo"),
+    ({'puntos_por_iteracion': 0}, "puntos_por_iteracion"),
+])
+def test_argumentos_invalidos(argumentos, mensaje):
+    argumentos = {'variable': 'precio_por_duplex', 'metrica': 'ganancia_neta', 'objetivo': 0.0,
+                  'minimo': 100000.0, 'maximo': 250000.0, **argumentos}
+    with pytest.raises(ValueError, match=mensaje):
+        CashFlowCalculator.resolver_objetivo(PARAMETROS, **argumentos)
+
+
+def test_parametros_faltantes():
+    with pytest.raises(ValueError, match="tasa_ventas"):
+        CashFlowCalculator.resolver_objetivo({clave: valor for clave, valor in PARAMETROS.items()
+                                              if clave != 'tasa_ventas'},
+                                             'precio_por_duplex', 'ganancia_neta', 0.0, 100000.0, 250000.0)
@@ -0,0 +1,110 @@
+# tests/test_scenario_comparison.py - Comparison view against each variant's own table
+import numpy as np
+import pandas as pd
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+from scenario_comparison import ScenarioComparator
+
+PARAMETROS = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+ETAPAS = [{'duplex': 8, 'meses': 12}, {'duplex': 14, 'meses': 18, 'solapar': True}]
+
+
+def test_igual_a_la_tabla_de_cada_variante():
+    escenarios = {
+        "base": PARAMETROS,
+        "etapas": {**PARAMETROS, 'etapas': ETAPAS},
+        "rapido": {**PARAMETROS, 'tasa_ventas': 2.0},
+        "etapas_caro": {**PARAMETROS, 'etapas': ETAPAS, 'precio_por_duplex': 180000.0},
+        "sin_ventas": {**PARAMETROS, 'tasa_ventas': 0.0},
+    }
+
+    resultado = ScenarioComparator.comparar(escenarios)
+
+    assert resultado['nombres'] == list(escenarios)
+    assert resultado['metricas'].index.tolist() == list(escenarios)
+    assert resultado['metricas'].columns.tolist() == list(ScenarioComparator.METRICAS)
+    for fila, (nombre, parametros) in enumerate(escenarios.items()):
+        df = CashFlowCalculator.generar_flujo_caja(**parametros, motor="vectorizado")
+        curva = resultado['acumulado'][fila]
+        np.testing.assert_array_equal(curva[:len(df)], df["Acumulado (USD)"].to_numpy(), err_msg=nombre)
+        assert np.isnan(curva[len(df):]).all()
+        esperadas = CashFlowCalculator.calcular_metricas_financieras(df, parametros['tea_costo_oportunidad'])
+        for metrica in ScenarioComparator.METRICAS:
+            obtenido, esperado = resultado['metricas'].loc[nombre, metrica], esperadas[metrica]
+            if esperado in ("No alcanzado", None):
+                assert pd.isna(obtenido), (nombre, metrica)
+            else:
+                assert obtenido == pytest.approx(esperado, rel=1e-12, abs=1e-9), (nombre, metrica)
+
+
+def test_diferencias():
+    metricas = ScenarioComparator.comparar({"base": PARAMETROS,
+                                            "caro": {**PARAMETROS, 'precio_por_duplex': 150000.0}})['metricas']
+
+    diferencias = ScenarioComparator.diferencias(metricas)
+
+    assert (diferencias.loc["base"].fillna(0) == 0).all()
+    assert diferencias.loc["caro", 'ganancia_neta'] == pytest.approx(
+        metricas.loc["caro", 'ganancia_neta'] - metricas.loc["base", 'ganancia_neta'])
+    assert (ScenarioComparator.diferencias(metricas, "caro").loc["caro"].fillna(0) == 0).all()
+
+
+def test_grilla():
+    base = {**PARAMETROS, 'down_payment_amount': 50000.0, 'cuota_restante_mensual': 9000.0}
+
+    grilla = ScenarioComparator.grilla(base, {'precio_por_duplex': [150000, 160000.0],
+                                              'total_etapas': [2.0, 4], 'tasa_ventas': [1]})
+
+    assert list(grilla) == [
+        "Precio por Dúplex=150,000 · Total Etapas=2 · Tasa de Ventas=1",
+        "Precio por Dúplex=150,000 · Total Etapas=4 · Tasa de Ventas=1",
+        "Precio por Dúplex=160,000 · Total Etapas=2 · Tasa de Ventas=1",
+        "Precio por Dúplex=160,000 · Total Etapas=4 · Tasa de Ventas=1",
+    ]
+    variante = grilla["Precio por Dúplex=160,000 · Total Etapas=4 · Tasa de Ventas=1"]
+    assert variante['total_etapas'] == 4 and type(variante['total_etapas']) is int
+    # The derived payment amounts follow the new price
+    assert variante['down_payment_amount'] == variante['cuota_restante_mensual'] == 0.0
+    assert base['down_payment_amount'] == 50000.0
+    assert list(ScenarioComparator.grilla(PARAMETROS, {})) == ["Base"]
+
+
+def test_grilla_etiqueta_completa_los_valores_cercanos():
+    grilla = ScenarioComparator.grilla(PARAMETROS, {'precio_por_duplex': [150000.1, 150000.2]})
+
+    assert list(grilla) == ["Precio por Dúplex=150,000.1", "Precio por Dúplex=150,000.2"]
+
+
+@pytest.mark.parametrize("base, valores, mensaje", [
+    (PARAMETROS, {'num_cuotas': [10, 12]}, "Variables desconocidas: num_cuotas"),
+    ({**PARAMETROS, 'etapas': ETAPAS}, {'meses_por_etapa': [10, 12]}, "etapas personalizadas"),
+    (PARAMETROS, {'precio_por_duplex': [150000.0], 'tasa_ventas': []}, "al menos un valor"),
+    (PARAMETROS, {'precio_por_duplex': [150000, 150000.0, 160000.0]}, "Valores repetidos para Precio por Dúplex: 150,000"),
+    (PARAMETROS, {'total_etapas': [2, 2.0]}, "Valores repetidos para Total Etapas: 2"),
+    (PARAMETROS, {'precio_por_duplex': range(100000, 110000, 1000), 'tasa_ventas': [0.5, 1, 1.5, 2, 2.5, 3]},
+     "60 escenarios; el máximo es 50"),
+])
+def test_grilla_invalida(base, valores, mensaje):
+    with pytest.raises(ValueError, match=mensaje):
+        ScenarioComparator.grilla(base, valores)
+
+
+def test_comparar_sin_escenarios_o_con_parametros_faltantes():
+    with pytest.raises(ValueError, match="No hay escenarios"):
+        ScenarioComparator.comparar({})
+    with pytest.raises(ValueError, match="Faltan parámetros: tasa_ventas"):
+        ScenarioComparator.comparar({"incompleto": {clave: valor for clave, valor in PARAMETROS.items()
+                                                    if clave != 'tasa_ventas'}})
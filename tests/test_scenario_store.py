@@ -0,0 +1,90 @@
+# tests/test_scenario_store.py - Saving and loading computed scenarios
+import numpy as np
+import pandas as pd
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+from scenario_store import ScenarioStore
+
+PARAMETROS = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+
+def calcular(**cambios):
+    parametros = {**PARAMETROS, **cambios}
+    df = CashFlowCalculator.generar_flujo_caja(**parametros)
+    return parametros, df, CashFlowCalculator.calcular_metricas_financieras(df, parametros['tea_costo_oportunidad'])
+
+
+@pytest.mark.parametrize("cambios", [
+    {},
+    # Never recovers: mes_recuperacion is "No alcanzado"
+    {'tasa_ventas': 0.0},
+    {'total_etapas': 1, 'inversion_inicial': 0.0},
+], ids=["base", "sin_ventas", "una_etapa"])
+def test_ida_y_vuelta(cambios, tmp_path):
+    store = ScenarioStore(str(tmp_path))
+    parametros, df, metricas = calcular(**cambios)
+
+    escenario_id = store.guardar("prueba", parametros, df, metricas)
+    # A new store on the same directory reads what the first one wrote
+    cargados, tabla, metricas_cargadas = ScenarioStore(str(tmp_path)).cargar(escenario_id)
+
+    assert cargados == parametros
+    pd.testing.assert_frame_equal(tabla, df, check_dtype=False)
+    assert metricas_cargadas == {clave: valor.item() if isinstance(valor, np.generic) else valor
+                                 for clave, valor in metricas.items()}
+    assert store.cargar_parametros([escenario_id]) == {escenario_id: parametros}
+    assert store.buscar_por_hash(parametros) == escenario_id
+
+
+def test_listar_filtrar_y_eliminar(tmp_path):
+    store = ScenarioStore(str(tmp_path))
+    ids = {nombre: store.guardar(nombre, *calcular(tasa_ventas=tasa))
+           for nombre, tasa in [("lento", 0.35), ("rapido", 1.0), ("sin_ventas", 0.0)]}
+
+    assert store.listar()['nombre'].tolist() == ["sin_ventas", "rapido", "lento"]
+    assert store.listar(nombre_contiene="ra")['id'].tolist() == [ids["rapido"]]
+    assert store.listar(ganancia_minima=0)['nombre'].tolist() == ["rapido", "lento"]
+    # Unrecovered scenarios have no month, so a maximum month leaves them out
+    assert "sin_ventas" not in store.listar(mes_recuperacion_maximo=10 ** 6)['nombre'].tolist()
+    assert len(store.listar(limite=1)) == 1
+
+    store.eliminar(ids["rapido"])
+    assert store.listar()['nombre'].tolist() == ["sin_ventas", "lento"]
+    with pytest.raises(KeyError):
+        store.cargar(ids["rapido"])
+    with pytest.raises(KeyError):
+        store.cargar_parametros([ids["lento"], ids["rapido"]])
+
+
+def test_falla_al_escribir_la_tabla_no_deja_fila(tmp_path, monkeypatch):
+    store = ScenarioStore(str(tmp_path))
+    escribir = ScenarioStore._escribir_tabla
+
+    def escribir_a_medias(ruta, df):
+        escribir(ruta, df.iloc[:, :2])
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(ScenarioStore, "_escribir_tabla", staticmethod(escribir_a_medias))
+    with pytest.raises(OSError):
+        store.guardar("fallido", *calcular())
+    monkeypatch.undo()
+
+    assert store.listar().empty
+    assert not any((tmp_path / "tablas").iterdir())
+
+    # The store keeps working; the next scenario loads whole
+    escenario_id = store.guardar("bueno", *calcular())
+    _, tabla, _ = store.cargar(escenario_id)
+    assert tabla.shape == calcular()[1].shape
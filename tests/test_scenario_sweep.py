@@ -0,0 +1,68 @@
+# tests/test_scenario_sweep.py - Scenario sweeps on a process pool
+import pandas as pd
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+from scenario_sweep import ScenarioSweepRunner
+
+BASE = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+
+def grilla():
+    return ScenarioSweepRunner.construir_grilla(
+        BASE, precio_por_duplex=[120000.0, 140000.0, 160000.0], tasa_ventas=[0.0, 0.5, 1.5, 3.0],
+        porcentaje_down_payment=[30.0, 50.0]
+    )
+
+
+def test_construir_grilla():
+    escenarios = grilla()
+
+    assert len(escenarios) == 3 * 4 * 2
+    assert not escenarios.duplicated().any()
+    assert escenarios[['precio_por_duplex', 'tasa_ventas', 'porcentaje_down_payment']].iloc[1].tolist() == \
+        [120000.0, 0.0, 50.0]
+    assert (escenarios['inversion_inicial'] == BASE['inversion_inicial']).all()
+
+
+@pytest.mark.parametrize("num_workers, tamano_chunk", [(1, 5), (2, 5), (2, 100)])
+def test_igual_a_evaluate_batch_en_orden(num_workers, tamano_chunk):
+    escenarios = grilla()
+    avances = []
+    runner = ScenarioSweepRunner(num_workers=num_workers, tamano_chunk=tamano_chunk,
+                                 progreso=lambda completados, total: avances.append((completados, total)))
+
+    resultado = runner.run(escenarios)
+
+    pd.testing.assert_frame_equal(resultado, CashFlowCalculator.evaluate_batch(escenarios))
+    assert avances[-1] == (len(escenarios), len(escenarios))
+    assert [completados for completados, _ in avances] == sorted(completados for completados, _ in avances)
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_mapear_chunks_en_orden(num_workers):
+    escenarios = grilla()
+    chunks = (escenarios.iloc[inicio:inicio + 3] for inicio in range(0, len(escenarios), 3))
+
+    resultados = list(ScenarioSweepRunner(num_workers=num_workers).mapear_chunks(chunks))
+
+    pd.testing.assert_frame_equal(pd.concat(resultados), CashFlowCalculator.evaluate_batch(escenarios))
+
+
+def test_tabla_vacia_y_chunk_invalido():
+    vacio = ScenarioSweepRunner(num_workers=2).run(pd.DataFrame(columns=list(BASE)))
+    assert vacio.empty
+
+    with pytest.raises(ValueError):
+        ScenarioSweepRunner(tamano_chunk=0)
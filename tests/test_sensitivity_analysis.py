@@ -0,0 +1,90 @@
+# tests/test_sensitivity_analysis.py - Tornado rows against recomputing each variant
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+from sensitivity_analysis import SensitivityAnalyzer
+
+PARAMETROS = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+ETAPAS = [
+    {'duplex': 8, 'meses': 12},
+    {'duplex': 14, 'meses': 18, 'solapar': True},
+    {'duplex': 6, 'meses': 10, 'inicio_venta': 20},
+]
+
+
+def metricas(parametros):
+    df = CashFlowCalculator.generar_flujo_caja(**parametros, motor="vectorizado")
+    return CashFlowCalculator.calcular_metricas_financieras(df, parametros['tea_costo_oportunidad'])
+
+
+def variante(base, variable, valor):
+    parametros = {**base, variable: int(valor) if variable in CashFlowCalculator.PARAMETROS_ENTEROS else valor}
+    for derivado in SensitivityAnalyzer.PAGOS_DERIVADOS.get(variable, ()):
+        parametros[derivado] = 0.0
+    return parametros
+
+
+@pytest.mark.parametrize("base", [
+    PARAMETROS,
+    # Explicit payment amounts are recomputed when price, down payment or cuotas move
+    {**PARAMETROS, 'down_payment_amount': 50000.0, 'cuota_restante_mensual': 9000.0},
+    {**PARAMETROS, 'etapas': ETAPAS},
+], ids=["base", "pagos_explicitos", "etapas"])
+def test_cada_fila_igual_a_recalcular_la_variante(base):
+    nombres = SensitivityAnalyzer.METRICAS
+
+    tornados = SensitivityAnalyzer.tornado(base, variacion=0.2, metricas=nombres)
+
+    esperado_base = metricas(base)
+    for metrica in nombres:
+        tabla = tornados[metrica]
+        if 'etapas' in base:
+            assert not set(SensitivityAnalyzer.VARIABLES_ETAPAS_UNIFORMES) & set(tabla.index)
+        assert (tabla["Base"] == esperado_base[metrica]).all()
+        assert tabla["Rango"].is_monotonic_decreasing
+        for variable, fila in tabla.iterrows():
+            for extremo in ("Bajo", "Alto"):
+                esperado = metricas(variante(base, variable, fila[f"Valor {extremo}"]))[metrica]
+                obtenido = fila[f"Resultado {extremo}"]
+                if esperado is None:
+                    assert obtenido != obtenido, (metrica, variable, extremo)
+                else:
+                    assert obtenido == pytest.approx(esperado, rel=1e-12, abs=1e-9), (metrica, variable, extremo)
+
+
+@pytest.mark.parametrize("variable, valor, esperado", [
+    ('precio_por_duplex', 140000.0, (112000.0, 168000.0)),
+    ('total_etapas', 3, (2, 4)),
+    ('total_etapas', 1, (1, 2)),
+    ('num_cuotas_restantes', 40, (32, 48)),
+    ('porcentaje_down_payment', 90.0, (72.0, 100.0)),
+])
+def test_valores_extremos(variable, valor, esperado):
+    assert SensitivityAnalyzer.valores_extremos(variable, valor, 0.2) == pytest.approx(esperado)
+
+
+@pytest.mark.parametrize("argumentos, mensaje", [
+    ({'variacion': 0.0}, "variación"),
+    ({'variacion': 1.0}, "variación"),
+    ({'metricas': ['mes_recuperacion']}, "Métricas desconocidas"),
+    ({'variables': ['num_cuotas']}, "Variables desconocidas"),
+    ({'parametros': {**PARAMETROS, 'etapas': ETAPAS}, 'variables': ['total_etapas']}, "etapas personalizadas"),
+    ({'parametros': {clave: valor for clave, valor in PARAMETROS.items() if clave != 'tasa_ventas'}},
+     "Faltan parámetros"),
+])
+def test_argumentos_invalidos(argumentos, mensaje):
+    argumentos = {'parametros': PARAMETROS, **argumentos}
+    with pytest.raises(ValueError, match=mensaje):
+        SensitivityAnalyzer.tornado(**argumentos)
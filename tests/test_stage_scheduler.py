@@ -0,0 +1,143 @@
+# tests/test_stage_scheduler.py - Sales schedule against a month-by-month reference
+import numpy as np
+import pytest
+
+from stage_scheduler import StageScheduler
+
+MES_MAXIMO = 400
+
+
+def programa_simple(etapas, tasa_ventas, mes_maximo):
+    """
+    Month-by-month reference: every month opens what may open, then sells the
+    month's demand (fractions carried over) from the open etapas in order
+    """
+    restante = [etapa['duplex'] for etapa in etapas]
+    agotamiento = [None] * len(etapas)
+    ventas = np.zeros(mes_maximo + 1, dtype=np.int64)
+
+    def apertura(k):
+        if k == 0 or etapas[k]['solapar']:
+            return etapas[k]['inicio_venta']
+        if any(mes is None for mes in agotamiento[:k]):
+            return None
+        return max(etapas[k]['inicio_venta'], max(agotamiento[:k]) + 1)
+
+    fraccion = 0.0
+    for mes in range(1, mes_maximo + 1):
+        for k in range(len(etapas)):
+            # An etapa without duplexes is sold out as soon as it opens
+            if restante[k] == 0 and agotamiento[k] is None and apertura(k) is not None:
+                agotamiento[k] = apertura(k)
+        abiertas = [k for k in range(len(etapas))
+                    if restante[k] > 0 and apertura(k) is not None and apertura(k) <= mes]
+        if not abiertas:
+            continue
+        disponibles = sum(restante[k] for k in abiertas)
+        if mes == 1 and tasa_ventas < 1.0:
+            fraccion = 1.0
+        else:
+            fraccion += min(tasa_ventas, disponibles)
+        completos = int(fraccion)
+        fraccion -= completos
+        ventas[mes] = por_asignar = min(completos, disponibles)
+        for k in abiertas:
+            asignados = min(por_asignar, restante[k])
+            restante[k] -= asignados
+            por_asignar -= asignados
+            if restante[k] == 0 and asignados > 0:
+                agotamiento[k] = mes + 1
+    return ventas
+
+
+def etapas_aleatorias(rng):
+    return StageScheduler.normalizar_etapas([
+        {
+            'duplex': int(rng.integers(0, 13)),
+            'meses': int(rng.integers(0, 9)),
+            'inicio_venta': None if rng.random() < 0.5 else int(rng.integers(1, 31)),
+            'solapar': bool(rng.random() < 0.3),
+        }
+        for _ in range(int(rng.integers(1, 7)))
+    ])
+
+
+@pytest.mark.parametrize("tasa_ventas", [1 / 3, 0.5, 0.75, 1.0, 1.7, 2.0, 3.0])
+@pytest.mark.parametrize("semilla", range(15))
+def test_igual_a_la_referencia_mes_a_mes(semilla, tasa_ventas):
+    etapas = etapas_aleatorias(np.random.default_rng(semilla))
+
+    programa = StageScheduler.programar_ventas(etapas, tasa_ventas, MES_MAXIMO)
+
+    ventas = StageScheduler.ventas_mensuales(programa, MES_MAXIMO)
+    np.testing.assert_array_equal(ventas, programa_simple(etapas, tasa_ventas, MES_MAXIMO), err_msg=str(etapas))
+    assert StageScheduler.duplex_vendidos(programa) == ventas.sum()
+    assert StageScheduler.ultimo_mes_venta(programa) == (np.flatnonzero(ventas)[-1] if ventas.any() else 0)
+    # Sold out, unless the schedule ran into mes_maximo
+    if StageScheduler.ultimo_mes_venta(programa) < MES_MAXIMO:
+        assert ventas.sum() == sum(etapa['duplex'] for etapa in etapas)
+
+
+def test_etapa_siguiente_abre_despues_de_agotar_la_anterior():
+    etapas = StageScheduler.normalizar_etapas([{'duplex': 4, 'meses': 6}, {'duplex': 4, 'meses': 6, 'inicio_venta': 1}])
+
+    ventas = StageScheduler.ventas_mensuales(StageScheduler.programar_ventas(etapas, 2.0), 10)
+
+    # Etapa 1 sells out in month 2, is seen sold out in month 3 and etapa 2 opens in month 4
+    assert ventas.tolist() == [0, 2, 2, 0, 2, 2, 0, 0, 0, 0, 0]
+
+    # By default an etapa sells from the start of its construction (month 7)
+    ventas = StageScheduler.ventas_mensuales(StageScheduler.programar_ventas(
+        StageScheduler.etapas_uniformes(4, 6, 2), 2.0), 10)
+    assert ventas.tolist() == [0, 2, 2, 0, 0, 0, 0, 2, 2, 0, 0]
+
+
+def test_etapa_solapada_e_inicio_de_venta():
+    etapas = StageScheduler.normalizar_etapas([
+        {'duplex': 3, 'meses': 5},
+        {'duplex': 2, 'meses': 5, 'solapar': True, 'inicio_venta': 2},
+        {'duplex': 1, 'meses': 5, 'inicio_venta': 9},
+    ])
+
+    ventas = StageScheduler.ventas_mensuales(StageScheduler.programar_ventas(etapas, 1.0), 10)
+
+    assert ventas.tolist() == [0, 1, 1, 1, 1, 1, 0, 0, 0, 1, 0]
+    assert StageScheduler.fin_construccion(etapas).tolist() == [5, 10, 15]
+
+
+def test_sin_ventas_y_mes_maximo():
+    etapas = StageScheduler.etapas_uniformes(10, 3, 2)
+
+    assert StageScheduler.duplex_vendidos(StageScheduler.programar_ventas(etapas, 0.0)) == 0
+    assert StageScheduler.duplex_vendidos(StageScheduler.programar_ventas([], 1.0)) == 0
+    assert StageScheduler.ultimo_mes_venta(StageScheduler.programar_ventas(etapas, 1.0, mes_maximo=7)) == 7
+
+
+def test_ventas_mensuales_por_bloques():
+    programa = StageScheduler.programar_ventas(etapas_aleatorias(np.random.default_rng(3)), 0.75, MES_MAXIMO)
+    completas = StageScheduler.ventas_mensuales(programa, MES_MAXIMO)
+
+    bloques = [StageScheduler.ventas_mensuales(programa, min(inicio + 16, MES_MAXIMO + 1) - 1, inicio)
+               for inicio in range(0, MES_MAXIMO + 1, 16)]
+
+    np.testing.assert_array_equal(np.concatenate(bloques), completas)
+
+
+def test_normalizar_etapas():
+    etapas = StageScheduler.normalizar_etapas([{'duplex': 5, 'meses': 4}, {'duplex': 3.0, 'meses': 2,
+                                                                          'inicio_venta': float("nan")}])
+
+    assert etapas == [{'duplex': 5, 'meses': 4, 'inicio_venta': 1, 'solapar': False},
+                      {'duplex': 3, 'meses': 2, 'inicio_venta': 5, 'solapar': False}]
+    assert StageScheduler.etapas_uniformes(2, 3, 2, solapar=True)[1] == \
+        {'duplex': 2, 'meses': 3, 'inicio_venta': 4, 'solapar': True}
+
+
+@pytest.mark.parametrize("etapa, mensaje", [
+    ({'duplex': 5}, "faltan meses"),
+    ({'duplex': -1, 'meses': 3}, "negativos"),
+    ({'duplex': 1, 'meses': 3, 'inicio_venta': 0}, "inicio_venta"),
+])
+def test_etapa_invalida(etapa, mensaje):
+    with pytest.raises(ValueError, match=f"Etapa 2: .*{mensaje}"):
+        StageScheduler.normalizar_etapas([{'duplex': 1, 'meses': 1}, etapa])
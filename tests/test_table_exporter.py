@@ -0,0 +1,71 @@
+# tests/test_table_exporter.py - Round trip of every export format
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cash_flow_calculator import CashFlowCalculator
+from table_exporter import TableExporter
+
+PARAMETROS = {
+    'inversion_inicial': 790000.0,
+    'gasto_construccion_mensual': 66293.33,
+    'comision_por_venta': 2000.0,
+    'precio_por_duplex': 140000.0,
+    'num_cuotas': 10,
+    'duplex_por_etapa': 11,
+    'meses_por_etapa': 15,
+    'total_etapas': 3,
+    'tasa_ventas': 0.5,
+    'tea_costo_oportunidad': 0.0512,
+}
+
+
+def leer(contenido: bytes, formato: str) -> pd.DataFrame:
+    lectores = {"csv": lambda archivo: pd.read_csv(archivo, float_precision="round_trip"), "parquet": pd.read_parquet, "feather": pd.read_feather, "xlsx": pd.read_excel}
+    return lectores[formato](io.BytesIO(contenido))
+
+
+def formatos():
+    return [pytest.param(formato, marks=pytest.mark.skipif(not TableExporter.formato_disponible(formato),
+                                                           reason=f"{formato} no disponible"))
+            for formato in TableExporter.FORMATOS]
+
+
+@pytest.mark.parametrize("formato", formatos())
+def test_tabla_de_flujo_por_bloques(formato):
+    df = CashFlowCalculator.generar_flujo_caja(**PARAMETROS)
+
+    leido = leer(TableExporter.exportar(df, formato, tamano_bloque=7), formato)
+
+    pd.testing.assert_frame_equal(leido, df, check_dtype=False)
+
+
+@pytest.mark.parametrize("formato", formatos())
+def test_metricas_con_escenario_sin_recuperacion(formato):
+    # With no sales the investment is never recovered: mes_recuperacion is <NA>
+    metricas = CashFlowCalculator.evaluate_batch(pd.DataFrame([PARAMETROS, {**PARAMETROS, 'tasa_ventas': 0.0}]))
+    assert metricas['mes_recuperacion'].isna().tolist() == [False, True]
+
+    leido = leer(TableExporter.exportar(metricas, formato), formato)
+
+    assert list(leido.columns) == list(metricas.columns)
+    # Excel keeps 16 significant digits; the other formats round-trip exactly
+    rtol = 1e-15 if formato == "xlsx" else 0.0
+    for columna in metricas.columns:
+        np.testing.assert_allclose(leido[columna].to_numpy(dtype=np.float64, na_value=np.nan),
+                                   metricas[columna].to_numpy(dtype=np.float64, na_value=np.nan),
+                                   rtol=rtol, atol=0.0, err_msg=columna)
+
+
+def test_partes_con_columnas_distintas():
+    with pytest.raises(ValueError):
+        with TableExporter(io.BytesIO(), "csv") as exportador:
+            exportador.escribir(pd.DataFrame({'a': [1]}))
+            exportador.escribir(pd.DataFrame({'b': [1]}))
+
+
+def test_formato_desconocido():
+    with pytest.raises(ValueError):
+        TableExporter(io.BytesIO(), "ods")
@@ -1,6 +1,18 @@
 # ui_components.py
+import time
+
 import streamlit as st
-from typing import Dict, Any
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+
+from cash_flow_result import CashFlowResult
+from performance_monitor import PerformanceMonitor
+from result_cache import ResultCache
+from scenario_comparison import ScenarioComparator
+from sensitivity_analysis import SensitivityAnalyzer
+from stage_scheduler import StageScheduler
+from table_exporter import TableExporter
 
 class UIComponents:
     """
@@ -11,6 +23,46 @@ class UIComponents:
     DUPLEX_POR_ETAPA = 11
     MESES_POR_ETAPA = 15
     TOTAL_ETAPAS = 3
+    MAX_ETAPAS = 50
+
+    # Download formats offered (format -> label); unavailable ones are hidden
+    FORMATOS_DESCARGA = {"csv": "CSV", "xlsx": "Excel", "parquet": "Parquet", "feather": "Feather"}
+
+    # Goal seek: labels and default search ranges of the solvable inputs, and metric labels
+    VARIABLES_OBJETIVO = {
+        'precio_por_duplex': ("🏠 Precio por Dúplex (USD)", 0.0, 1000000.0),
+        'tasa_ventas': ("🎯 Tasa de Ventas (Dúplex por Mes)", 0.1, 20.0),
+        'porcentaje_down_payment': ("💰 Down Payment (%)", 0.0, 100.0),
+    }
+    METRICAS_OBJETIVO = {
+        'ganancia_neta': "Ganancia Neta (USD) mínima",
+        'mes_recuperacion': "Mes de Recuperación máximo",
+        'costo_oportunidad_total': "Costo de Oportunidad Total (USD) máximo",
+        'van': "VAN (USD) mínimo",
+        'tir': "TIR Anual (%) mínima",
+    }
+    
+    # Sensitivity (tornado) metrics: label and d3 format of their values
+    METRICAS_SENSIBILIDAD = {
+        'ganancia_neta': ("Ganancia Neta (USD)", "$,.0f"),
+        'capital_maximo': ("Capital Máximo (USD)", "$,.0f"),
+        'van': ("VAN (USD)", "$,.0f"),
+        'tir': ("TIR Anual", ".1%"),
+    }
+    
+    # Data table page sizes offered
+    FILAS_POR_PAGINA = (25, 50, 100, 250)
+    
+    # Scenario comparison: metrics of the table, with label and number format
+    METRICAS_COMPARACION = {
+        'ganancia_neta': ("Ganancia Neta (USD)", "{:,.2f}"),
+        'capital_maximo': ("Capital Máximo (USD)", "{:,.2f}"),
+        'costo_oportunidad_total': ("Costo de Oportunidad (USD)", "{:,.2f}"),
+        'mes_recuperacion': ("Mes de Recuperación", "{:,.0f}"),
+        'van': ("VAN (USD)", "{:,.2f}"),
+        'tir': ("TIR Anual", "{:.2%}"),
+        'moic': ("MOIC", "{:.2f}x"),
+    }
     
     @staticmethod
     def render_sidebar() -> Dict[str, Any]:
@@ -22,108 +74,110 @@ class UIComponents:
         """
         st.sidebar.header("🏗️ Parámetros del Proyecto")
         
+        # Inputs are grouped in a form and applied together by the button; with auto
+        # recalculation they apply on their own once editing pauses (debounced in app.py).
+        # Every input has a key, so its value survives switching between the two modes.
+        auto_recalcular = st.sidebar.toggle("⚡ Recalcular automáticamente", value=False, key="auto_recalcular",
+                                            help="Aplica los cambios al dejar de editar, sin esperar al botón")
+        panel = st.sidebar if auto_recalcular else st.sidebar.form("parametros_proyecto", border=False)
+        
         # Land costs
-        st.sidebar.subheader("🌍 Costos del Terreno")
-        costo_terreno = st.sidebar.number_input("💰 Costo del Terreno (USD)", value=600000.0, step=10000.0, min_value=0.0)
-        gastos_compra_terreno = st.sidebar.number_input("📋 Gastos Compra Terreno (USD)", value=20000.0, step=1000.0, min_value=0.0)
+        panel.subheader("🌍 Costos del Terreno")
+        costo_terreno = panel.number_input("💰 Costo del Terreno (USD)", value=600000.0, step=10000.0, min_value=0.0, key="costo_terreno")
+        gastos_compra_terreno = panel.number_input("📋 Gastos Compra Terreno (USD)", value=20000.0, step=1000.0, min_value=0.0, key="gastos_compra_terreno")
         
         # Calculate total land cost
         total_costo_terreno = costo_terreno + gastos_compra_terreno
-        st.sidebar.info(f"🏠 **Total Costo del Terreno:** ${total_costo_terreno:,.0f}")
+        panel.info(f"🏠 **Total Costo del Terreno:** ${total_costo_terreno:,.0f}")
         
         # Pre-construction costs
-        st.sidebar.subheader("🔧 Gastos Antes de Comenzar Obra")
-        proyecto = st.sidebar.number_input("📊 Proyecto (USD)", value=10000.0, step=1000.0, min_value=0.0)
-        cerramiento_mamposteria = st.sidebar.number_input("🧱 Cerramiento Mampostería (USD)", value=60000.0, step=1000.0, min_value=0.0)
-        movimiento_suelo = st.sidebar.number_input("🚜 Movimiento de Suelo (USD)", value=80000.0, step=1000.0, min_value=0.0)
-        varios = st.sidebar.number_input("🔩 Varios (USD)", value=20000.0, step=1000.0, min_value=0.0)
+        panel.subheader("🔧 Gastos Antes de Comenzar Obra")
+        proyecto = panel.number_input("📊 Proyecto (USD)", value=10000.0, step=1000.0, min_value=0.0, key="proyecto")
+        cerramiento_mamposteria = panel.number_input("🧱 Cerramiento Mampostería (USD)", value=60000.0, step=1000.0, min_value=0.0, key="cerramiento_mamposteria")
+        movimiento_suelo = panel.number_input("🚜 Movimiento de Suelo (USD)", value=80000.0, step=1000.0, min_value=0.0, key="movimiento_suelo")
+        varios = panel.number_input("🔩 Varios (USD)", value=20000.0, step=1000.0, min_value=0.0, key="varios")
         
         # Calculate total pre-construction costs
         gastos_varios_antes_obra = proyecto + cerramiento_mamposteria + movimiento_suelo + varios
-        st.sidebar.info(f"🔧 **Gastos Varios Antes Comenzar Obra:** ${gastos_varios_antes_obra:,.0f}")
+        panel.info(f"🔧 **Gastos Varios Antes Comenzar Obra:** ${gastos_varios_antes_obra:,.0f}")
         
         # Calculate total initial investment
         inversion_inicial = total_costo_terreno + gastos_varios_antes_obra
-        st.sidebar.success(f"💼 **Inversión Inicial Total:** ${inversion_inicial:,.0f}")
+        panel.success(f"💼 **Inversión Inicial Total:** ${inversion_inicial:,.0f}")
         
-        st.sidebar.divider()
+        panel.divider()
         
         # Construction parameters
-        st.sidebar.subheader("🏗️ Construcción")
-        superficie_promedio_duplex = st.sidebar.number_input("📐 Superficie Promedio Dúplex (M²)", value=90.4, step=0.1, min_value=0.1)
-        costo_construccion_por_m2 = st.sidebar.number_input("💰 Costo Construcción por M² (USD)", value=1100.0, step=10.0, min_value=0.0)
+        panel.subheader("🏗️ Construcción")
+        superficie_promedio_duplex = panel.number_input("📐 Superficie Promedio Dúplex (M²)", value=90.4, step=0.1, min_value=0.1, key="superficie_promedio_duplex")
+        costo_construccion_por_m2 = panel.number_input("💰 Costo Construcción por M² (USD)", value=1100.0, step=10.0, min_value=0.0, key="costo_construccion_por_m2")
         
-        st.sidebar.divider()
+        panel.divider()
         
         # Sales parameters
-        st.sidebar.subheader("💰 Ventas")
-        comision_por_venta = st.sidebar.number_input("🤝 Comisión por Venta (USD)", value=2000.0, step=100.0, min_value=0.0)
-        precio_por_duplex = st.sidebar.number_input("🏠 Precio por Dúplex (USD)", value=140000.0, step=1000.0, min_value=0.0)
+        panel.subheader("💰 Ventas")
+        comision_por_venta = panel.number_input("🤝 Comisión por Venta (USD)", value=2000.0, step=100.0, min_value=0.0, key="comision_por_venta")
+        precio_por_duplex = panel.number_input("🏠 Precio por Dúplex (USD)", value=140000.0, step=1000.0, min_value=0.0, key="precio_por_duplex")
         
         # Payment structure
-        st.sidebar.write("**💳 Estructura de Pago:**")
-        porcentaje_down_payment = st.sidebar.number_input("💰 Down Payment (%)", value=40.0, step=1.0, min_value=0.0, max_value=100.0)
-        num_cuotas_restantes = st.sidebar.number_input("📅 Cuotas Restantes", value=10, step=1, min_value=1)
+        panel.write("**💳 Estructura de Pago:**")
+        porcentaje_down_payment = panel.number_input("💰 Down Payment (%)", value=40.0, step=1.0, min_value=0.0, max_value=100.0, key="porcentaje_down_payment")
+        num_cuotas_restantes = panel.number_input("📅 Cuotas Restantes", value=10, step=1, min_value=1, key="num_cuotas_restantes")
         
         # Calculate payment amounts
         down_payment_amount = precio_por_duplex * (porcentaje_down_payment / 100)
         remaining_amount = precio_por_duplex - down_payment_amount
         cuota_restante_mensual = remaining_amount / num_cuotas_restantes if num_cuotas_restantes > 0 else 0
         
-        st.sidebar.info(f"💰 **Down Payment:** ${down_payment_amount:,.0f} ({porcentaje_down_payment}%)")
-        st.sidebar.info(f"📊 **Monto Restante:** ${remaining_amount:,.0f}")
-        st.sidebar.info(f"💳 **Cuota Mensual Restante:** ${cuota_restante_mensual:,.0f}")
+        panel.info(f"💰 **Down Payment:** ${down_payment_amount:,.0f} ({porcentaje_down_payment}%)")
+        panel.info(f"📊 **Monto Restante:** ${remaining_amount:,.0f}")
+        panel.info(f"💳 **Cuota Mensual Restante:** ${cuota_restante_mensual:,.0f}")
         
         # Keep legacy num_cuotas for compatibility (total payment period)
         num_cuotas = num_cuotas_restantes
         
-        st.sidebar.divider()
-        
-        # Project structure - now displayed as constants
-        st.sidebar.subheader("📋 Estructura del Proyecto")
-        st.sidebar.info(f"🏘️ **Dúplex por Etapa:** {UIComponents.DUPLEX_POR_ETAPA}")
-        st.sidebar.info(f"⏱️ **Meses por Etapa:** {UIComponents.MESES_POR_ETAPA}")
-        st.sidebar.info(f"📊 **Total Etapas:** {UIComponents.TOTAL_ETAPAS}")
-        
-        # Calculate total duplexes using constants
-        total_duplex = UIComponents.DUPLEX_POR_ETAPA * UIComponents.TOTAL_ETAPAS
-        st.sidebar.info(f"🏠 **Total Dúplex:** {total_duplex} unidades")
+        panel.divider()
+        
+        # Project structure (the class constants are the defaults)
+        panel.subheader("📋 Estructura del Proyecto")
+        duplex_por_etapa = panel.number_input("🏘️ Dúplex por Etapa", value=UIComponents.DUPLEX_POR_ETAPA, step=1, min_value=1, key="duplex_por_etapa")
+        meses_por_etapa = panel.number_input("⏱️ Meses por Etapa", value=UIComponents.MESES_POR_ETAPA, step=1, min_value=1, key="meses_por_etapa")
+        total_etapas = panel.number_input("📊 Total Etapas", value=UIComponents.TOTAL_ETAPAS, step=1, min_value=1,
+                                               max_value=UIComponents.MAX_ETAPAS, key="total_etapas")
+        ventas_solapadas = panel.checkbox("🔀 Ventas solapadas entre etapas", value=False,
+                                               help="Cada etapa vende desde el inicio de su obra, sin esperar a que se agote la anterior", key="ventas_solapadas")
+        etapas = StageScheduler.etapas_uniformes(duplex_por_etapa, meses_por_etapa, total_etapas, solapar=True) \
+            if ventas_solapadas else None
+        horizonte_meses = panel.number_input("📏 Horizonte Fijo (Meses, 0 = Automático)", value=0, step=12, min_value=0,
+                                                  help="Fija el largo de la tabla para comparar escenarios mes a mes", key="horizonte_meses")
+        
+        # Calculate total duplexes
+        total_duplex = duplex_por_etapa * total_etapas
+        costo_comisiones_total = comision_por_venta * total_duplex
+        panel.info(f"🏠 **Total Dúplex:** {total_duplex} unidades")
         
         # Calculate monthly construction expense based on construction parameters
-        total_meses_construccion = UIComponents.MESES_POR_ETAPA * UIComponents.TOTAL_ETAPAS
+        total_meses_construccion = meses_por_etapa * total_etapas
         promedio_duplex_por_mes = total_duplex / total_meses_construccion if total_meses_construccion > 0 else 0
         gasto_construccion_mensual = superficie_promedio_duplex * costo_construccion_por_m2 * promedio_duplex_por_mes
         
-        st.sidebar.info(f"📊 **Promedio Dúplex/Mes:** {promedio_duplex_por_mes:.2f}")
-        st.sidebar.success(f"🔨 **Gasto Construcción Mensual:** ${gasto_construccion_mensual:,.0f}")
+        panel.info(f"📊 **Promedio Dúplex/Mes:** {promedio_duplex_por_mes:.2f}")
+        panel.success(f"🔨 **Gasto Construcción Mensual:** ${gasto_construccion_mensual:,.0f}")
         
-        st.sidebar.divider()
+        panel.divider()
         
         # Financial parameters
-        st.sidebar.subheader("📈 Parámetros Financieros")
-        tasa_ventas = st.sidebar.number_input("🎯 Tasa de Ventas (Dúplex por Mes)", value=1.0, step=0.1, min_value=0.1)
-        tea_costo_oportunidad = st.sidebar.number_input("💹 TEA Costo de Oportunidad (%)", value=5.12, step=0.1, min_value=0.0) / 100
+        panel.subheader("📈 Parámetros Financieros")
+        tasa_ventas = panel.number_input("🎯 Tasa de Ventas (Dúplex por Mes)", value=1.0, step=0.1, min_value=0.1, key="tasa_ventas")
+        tea_costo_oportunidad = panel.number_input("💹 TEA Costo de Oportunidad (%)", value=5.12, step=0.1, min_value=0.0, key="tea_costo_oportunidad") / 100
         
-        st.sidebar.divider()
+        panel.divider()
         
-        # Calculate button
-        recalcular = st.sidebar.button("🔄 Recalcular Tabla", type="primary")
-        
-        # Summary section
-        st.sidebar.markdown("---")
-        st.sidebar.markdown("### 📊 Resumen Rápido")
-        ingreso_potencial = precio_por_duplex * total_duplex
-        costo_comisiones_total = comision_por_venta * total_duplex
-        st.sidebar.markdown(f"""
-        **💰 Inversión Total:** ${inversion_inicial:,.0f}  
-        **🌍 Costo Terreno:** ${total_costo_terreno:,.0f}  
-        **🔧 Gastos Pre-Obra:** ${gastos_varios_antes_obra:,.0f}  
-        **🏠 Total Dúplex:** {total_duplex}  
-        **🔨 Gasto Construcción/Mes:** ${gasto_construccion_mensual:,.0f}  
-        **🤝 Costo Total Comisiones:** ${costo_comisiones_total:,.0f}  
-        **💸 Ingreso Potencial:** ${ingreso_potencial:,.0f}  
-        **🎯 Tasa Ventas:** {tasa_ventas}/mes  
-        """)
+        # Calculate button (submits the form)
+        if auto_recalcular:
+            recalcular = st.sidebar.button("🔄 Recalcular Tabla", type="primary")
+        else:
+            recalcular = panel.form_submit_button("🔄 Recalcular Tabla", type="primary")
         
         return {
             # Land costs
@@ -159,48 +213,105 @@ class UIComponents:
             'num_cuotas': num_cuotas,
             'costo_comisiones_total': costo_comisiones_total,
             
-            # Project structure constants (for compatibility)
-            'duplex_por_etapa': UIComponents.DUPLEX_POR_ETAPA,
-            'meses_por_etapa': UIComponents.MESES_POR_ETAPA,
-            'total_etapas': UIComponents.TOTAL_ETAPAS,
+            # Project structure
+            'duplex_por_etapa': duplex_por_etapa,
+            'meses_por_etapa': meses_por_etapa,
+            'total_etapas': total_etapas,
             'total_duplex': total_duplex,
+            'etapas': etapas,
+            'horizonte_meses': horizonte_meses,
             
             # Financial parameters
             'tasa_ventas': tasa_ventas,
             'tea_costo_oportunidad': tea_costo_oportunidad,
             
             # UI controls
-            'recalcular': recalcular
+            'recalcular': recalcular,
+            'auto_recalcular': auto_recalcular
         }
     
     @staticmethod
-    def render_data_table(df):
+    def render_quick_summary(contenedor, parametros: Dict[str, Any], metricas: Dict[str, Any]):
         """
-        Render the data table with proper formatting
+        Render the sidebar "Resumen Rápido"
+        
+        The results are those of the main view (already computed and cached), so
+        the sidebar adds no calculation to a rerun. The inputs shown are the ones
+        that result was computed from (applied or loaded), not unapplied edits.
         
         Args:
-            df: DataFrame to display
+            contenedor: Sidebar container reserved for the summary
+            parametros: Calculator inputs of the cash flow shown (optionally with 'etapas')
+            metricas: Financial metrics of the cash flow shown
         """
-        st.subheader("Tabla de Flujo de Caja")
+        contenedor.markdown("---")
+        contenedor.markdown("### 📊 Resumen Rápido")
+        etapas = parametros.get('etapas')
+        total_duplex = (sum(etapa['duplex'] for etapa in etapas) if etapas is not None
+                        else parametros['duplex_por_etapa'] * parametros['total_etapas'])
+        ingreso_potencial = parametros['precio_por_duplex'] * total_duplex
+        recuperacion = metricas['mes_recuperacion']
+        # Scenarios saved before the investment metrics were stored have no TIR
+        tir = f"{metricas['tir']:.2%}" if metricas.get('tir') is not None else "No definida"
+        contenedor.markdown(f"""
+        **💰 Inversión Total:** ${parametros['inversion_inicial']:,.0f}  
+        **🏠 Total Dúplex:** {total_duplex}  
+        **🔨 Gasto Construcción/Mes:** ${parametros['gasto_construccion_mensual']:,.0f}  
+        **🤝 Costo Total Comisiones:** ${parametros['comision_por_venta'] * total_duplex:,.0f}  
+        **💸 Ingreso Potencial:** ${ingreso_potencial:,.0f}  
+        **🎯 Tasa Ventas:** {parametros['tasa_ventas']}/mes  
+        **📈 Ganancia Neta:** ${metricas['ganancia_neta']:,.0f}  
+        **📅 Recuperación:** {f"Mes {recuperacion}" if recuperacion != "No alcanzado" else recuperacion}  
+        **💹 TIR Anual:** {tir}  
+        """)
+    
+    @staticmethod
+    def render_data_table(flujo: CashFlowResult):
+        """
+        Render the data table: a month range / etapa filter and one page of rows
         
-        # Format columns with proper numeric formatting
-        format_dict = {
-            "Gastos Construcción (USD)": "{:,.2f}",
-            "Gastos Comisiones (USD)": "{:,.2f}",
-            "Ingresos por Downpayment - Gastos Comision (USD)": "{:,.2f}",
-            "Ingresos Cuotas Restantes (USD)": "{:,.2f}",
-            "Ingresos por Down Payment + Cuotas Mensuales (USD)": "{:,.2f}",
-            "Ingresos Acumulados (USD)": "{:,.2f}",
-            "Acumulado (USD)": "{:,.2f}",
-            "Capital Invertido (USD)": "{:,.2f}"
-        }
+        Only the visible page is turned into a table and sent to the browser, as
+        raw numbers with per-column formats (no Styler pass over every cell).
         
-        # Add the opportunity cost column with dynamic formatting
-        opportunity_cost_col = [col for col in df.columns if "Costo de Oportunidad Mensual" in col]
-        if opportunity_cost_col:
-            format_dict[opportunity_cost_col[0]] = "{:,.2f}"
+        Args:
+            flujo: Cash flow to display
+        """
+        st.subheader("Tabla de Flujo de Caja")
+        meses = flujo.mes
         
-        st.dataframe(df.style.format(format_dict), use_container_width=True)
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            primer_mes, ultimo_mes = 0, flujo.total_meses
+            desde, hasta = (st.slider("📅 Meses", primer_mes, ultimo_mes, (primer_mes, ultimo_mes))
+                            if ultimo_mes > primer_mes else (primer_mes, ultimo_mes))
+        with col2:
+            seleccion = st.multiselect("🏗️ Etapas", list(range(len(flujo.etapas))), format_func=flujo.etapas.__getitem__,
+                                       placeholder="Todas")
+        with col3:
+            filas_por_pagina = st.selectbox("📄 Filas por Página", UIComponents.FILAS_POR_PAGINA, index=1)
+        
+        mascara = (meses >= desde) & (meses <= hasta)
+        if seleccion:
+            mascara &= np.isin(flujo.etapa, seleccion)
+        filas = np.flatnonzero(mascara)
+        
+        num_paginas = max(1, -(-len(filas) // filas_por_pagina))
+        pagina = (st.number_input(f"Página (de {num_paginas})", min_value=1, max_value=num_paginas, value=1)
+                  if num_paginas > 1 else 1)
+        visibles = filas[(pagina - 1) * filas_por_pagina:pagina * filas_por_pagina]
+        tabla = flujo.to_frame(filas=visibles)
+        
+        # USD columns with thousands separators; the opportunity cost column's name depends on the TEA
+        formato_usd = st.column_config.NumberColumn(format="%,.2f")
+        configuracion_columnas = {flujo.etiqueta(campo): formato_usd for campo, etiqueta in flujo.COLUMNAS.items()
+                                  if "(USD" in etiqueta}
+        configuracion_columnas["Mes"] = st.column_config.NumberColumn(format="%d")
+        
+        st.dataframe(tabla, column_config=configuracion_columnas, use_container_width=True, hide_index=True)
+        if len(visibles):
+            st.caption(f"Meses {meses[visibles[0]]}–{meses[visibles[-1]]} · {len(filas)} de {len(flujo)} meses filtrados")
+        else:
+            st.caption(f"Ningún mes coincide con el filtro ({len(flujo)} meses en total)")
     
     @staticmethod
     def render_financial_summary(metricas: Dict[str, Any], tea_costo_oportunidad: float):
@@ -220,6 +331,7 @@ class UIComponents:
             <p><b>Ganancia Neta:</b> USD {:,.2f}</p>
             <p><b>Costo de Oportunidad Total (TEA {:.2f}%):</b> USD {:,.2f}</p>
             <p><b>Mes de Recuperación de Inversión:</b> Mes {}</p>
+            {}
         </div>
         """.format(
             metricas['total_ingresos'], 
@@ -228,37 +340,378 @@ class UIComponents:
             metricas['ganancia_neta'], 
             tea_costo_oportunidad * 100, 
             metricas['costo_oportunidad_total'], 
-            metricas['mes_recuperacion']
+            metricas['mes_recuperacion'],
+            UIComponents._render_investment_metrics(metricas)
         ), unsafe_allow_html=True)
     
     @staticmethod
-    def render_download_section(df):
+    def _render_investment_metrics(metricas: Dict[str, Any]) -> str:
+        """
+        Summary lines for VAN, TIR, MOIC, discounted payback and peak equity
+        (empty for scenarios saved before these metrics existed)
+        """
+        if 'van' not in metricas:
+            return ""
+        tir = f"{metricas['tir']:.2%}" if metricas['tir'] is not None else "No definida"
+        moic = f"{metricas['moic']:.2f}x" if metricas['moic'] is not None else "No definido"
+        payback = metricas['payback_descontado']
+        payback = f"Mes {payback}" if isinstance(payback, int) else payback
+        return f"""
+            <p><b>Capital Máximo Requerido:</b> USD {metricas['capital_maximo']:,.2f}</p>
+            <p><b>VAN (a la TEA de costo de oportunidad):</b> USD {metricas['van']:,.2f}</p>
+            <p><b>TIR Anual:</b> {tir}</p>
+            <p><b>MOIC:</b> {moic}</p>
+            <p><b>Recuperación Descontada:</b> {payback}</p>
+        """
+    
+    @staticmethod
+    def render_download_section(flujo: CashFlowResult, clave: Optional[str] = None,
+                                cache: Optional[ResultCache] = None):
         """
         Render the download section
+
+        Files (and the labelled table they are written from) are generated only
+        when a button is clicked, never on a rerun, and are kept in the cache
+        under the result key so repeated downloads are free. Clicking a button
+        does not rerun the app.
         
         Args:
-            df: DataFrame to download
+            flujo: Cash flow to download
+            clave: Key identifying the result shown (e.g. ResultCache.hash_parametros)
+            cache: Cache for the generated files; without it files are rebuilt per click
         """
         st.subheader("Descargar Tabla")
-        col1, col2 = st.columns(2)
+        formatos = [formato for formato in UIComponents.FORMATOS_DESCARGA
+                    if TableExporter.formato_disponible(formato)]
+        columnas = st.columns(len(formatos))
+        # Files are built after this rerun, on another thread, and timed as part of it
+        registro = PerformanceMonitor.registro_actual()
+
+        for columna, formato in zip(columnas, formatos):
+            def generar(formato=formato) -> bytes:
+                with PerformanceMonitor.span(f"exportacion[{formato}]", registro):
+                    if cache is None or clave is None:
+                        return TableExporter.exportar(flujo.to_frame(), formato)
+                    return cache.obtener_o_calcular((clave, formato),
+                                                    lambda: TableExporter.exportar(flujo.to_frame(), formato))
+
+            with columna:
+                st.download_button(
+                    label=f"Descargar {UIComponents.FORMATOS_DESCARGA[formato]}", 
+                    data=generar, 
+                    file_name=f"flujo_de_caja_modificado{TableExporter.EXTENSIONES[formato]}", 
+                    mime=TableExporter.MIME[formato],
+                    on_click="ignore"
+                )
+    
+    @staticmethod
+    def render_monte_carlo_controls() -> Optional[Dict[str, Any]]:
+        """
+        Render the Monte Carlo simulation controls
+        
+        Returns:
+            Dict with the simulation settings when "Simular" is clicked, None otherwise
+        """
+        st.subheader("Simulación Monte Carlo")
+        col1, col2, col3 = st.columns(3)
         
         with col1:
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Descargar CSV", 
-                data=csv, 
-                file_name="flujo_de_caja_modificado.csv", 
-                mime="text/csv"
+            num_caminos = st.number_input("🎲 Caminos", value=10000, step=1000, min_value=100, max_value=100000)
+            semilla = st.number_input("🌱 Semilla", value=42, step=1, min_value=0)
+        with col2:
+            distribucion_ventas = st.selectbox("📈 Distribución de Ventas", ["poisson", "binomial_negativa"],
+                                               format_func=lambda d: {"poisson": "Poisson",
+                                                                      "binomial_negativa": "Binomial Negativa"}[d])
+            dispersion_ventas = st.number_input("💥 Dispersión (Binomial Negativa)", value=2.0, step=0.5, min_value=0.1)
+        with col3:
+            distribucion_precio = st.selectbox("🏠 Distribución de Precio", ["normal", "lognormal", "fijo"],
+                                               format_func=str.capitalize)
+            volatilidad_precio = st.number_input("📉 Volatilidad de Precio (%)", value=5.0, step=1.0, min_value=0.0) / 100
+        
+        if not st.button("🎲 Simular"):
+            return None
+        
+        return {
+            'num_caminos': int(num_caminos),
+            'semilla': int(semilla),
+            'distribucion_ventas': distribucion_ventas,
+            'dispersion_ventas': dispersion_ventas,
+            'distribucion_precio': distribucion_precio,
+            'volatilidad_precio': volatilidad_precio,
+        }
+    
+    @staticmethod
+    def render_monte_carlo_summary(resultado: Dict[str, Any]):
+        """
+        Render the Monte Carlo percentile summary
+        
+        Args:
+            resultado: Output of MonteCarloSimulator.simular
+        """
+        filas = []
+        for etiqueta, capital_maximo in resultado['capital_maximo'].items():
+            mes_recuperacion = resultado['mes_recuperacion'][etiqueta]
+            mes_texto = f"Mes {mes_recuperacion:.0f}" if mes_recuperacion is not None else "No alcanzado"
+            filas.append(
+                f"<p><b>{etiqueta}:</b> Capital Máximo USD {capital_maximo:,.2f} · "
+                f"Ganancia Neta USD {resultado['ganancia_neta'][etiqueta]:,.2f} · Recuperación {mes_texto}</p>"
             )
+        filas_html = "".join(filas)
+        
+        st.markdown(f"""
+        <div class="summary-box">
+            {filas_html}
+            <p><b>Probabilidad de Recuperar la Inversión:</b> {resultado['probabilidad_recuperacion']:.1%}
+            ({resultado['num_caminos']:,} caminos, {resultado['horizonte_meses']} meses)</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    
+    @staticmethod
+    def render_sensitivity_controls() -> Dict[str, Any]:
+        """
+        Render the sensitivity analysis controls
+        
+        Returns:
+            Dict with the relative step ('variacion') and the metric shown ('metrica')
+        """
+        st.subheader("Análisis de Sensibilidad")
+        col1, col2 = st.columns(2)
         
+        with col1:
+            variacion = st.slider("↕️ Variación de Cada Variable (±%)", min_value=1, max_value=50, value=10)
         with col2:
-            from io import BytesIO
-            import pandas as pd
-            output = BytesIO()
-            df.to_excel(output, index=False, engine="openpyxl")
-            st.download_button(
-                label="Descargar Excel", 
-                data=output.getvalue(), 
-                file_name="flujo_de_caja_modificado.xlsx", 
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            ) 
\ No newline at end of file
+            metrica = st.selectbox("📏 Métrica", list(UIComponents.METRICAS_SENSIBILIDAD),
+                                   format_func=lambda m: UIComponents.METRICAS_SENSIBILIDAD[m][0])
+        
+        return {'variacion': variacion / 100, 'metrica': metrica}
+    
+    @staticmethod
+    def render_sensitivity_table(tornado, metrica: str):
+        """
+        Render one metric's tornado table
+        
+        Args:
+            tornado: Table from SensitivityAnalyzer.tornado
+            metrica: Metric of the table, one of METRICAS_SENSIBILIDAD
+        """
+        formato_resultado = "{:.2%}" if metrica == 'tir' else "{:,.2f}"
+        columnas = ["Variable", "Valor Bajo", "Valor Alto", "Resultado Bajo", "Resultado Alto", "Rango"]
+        st.dataframe(tornado[columnas].style.format({
+            "Valor Bajo": "{:,.4g}",
+            "Valor Alto": "{:,.4g}",
+            "Resultado Bajo": formato_resultado,
+            "Resultado Alto": formato_resultado,
+            "Rango": formato_resultado,
+        }, na_rep="No definida"), use_container_width=True, hide_index=True)
+    
+    @staticmethod
+    def render_comparison_controls(escenarios) -> Optional[Dict[str, Any]]:
+        """
+        Render the scenario comparison controls
+        
+        Args:
+            escenarios: Stored scenarios as returned by ScenarioStore.listar
+            
+        Returns:
+            None unless "Comparar" is clicked; then a dict with either 'guardados'
+            (label -> stored scenario id) or 'grilla' (input -> values to combine)
+        """
+        st.subheader("Comparación de Escenarios")
+        origen = st.radio("📚 Escenarios a Comparar", ["guardados", "grilla"], horizontal=True,
+                          format_func={"guardados": "Escenarios guardados", "grilla": "Grilla de valores"}.get)
+        
+        if origen == "guardados":
+            etiquetas = {fila.id: f"{fila.nombre} (#{fila.id})" for fila in escenarios.itertuples()}
+            seleccion = st.multiselect("📂 Escenarios", list(etiquetas), format_func=etiquetas.get,
+                                       max_selections=ScenarioComparator.MAX_ESCENARIOS)
+            if not st.button("📊 Comparar", disabled=not seleccion):
+                return None
+            return {'guardados': {etiquetas[escenario_id]: escenario_id for escenario_id in seleccion}}
+        
+        # Up to two inputs, each with a list of values; every combination is one scenario
+        opciones = [None, *SensitivityAnalyzer.VARIABLES]
+        valores_defecto = ("120000; 150000; 180000", "0.5; 1; 2")
+        grilla = {}
+        for indice, (col1, col2) in enumerate([st.columns(2), st.columns(2)]):
+            with col1:
+                variable = st.selectbox(f"🔧 Variable {indice + 1}", opciones, index=indice + 1,
+                                        format_func=lambda v: "Ninguna" if v is None else SensitivityAnalyzer.VARIABLES[v])
+            with col2:
+                texto = st.text_input(f"🔢 Valores {indice + 1} (separados por ;)", value=valores_defecto[indice],
+                                      disabled=variable is None)
+            if variable is not None:
+                try:
+                    grilla[variable] = [float(valor) for valor in texto.split(";") if valor.strip()]
+                except ValueError:
+                    st.error(f"Valores inválidos para {SensitivityAnalyzer.VARIABLES[variable]}: {texto}")
+                    return None
+        
+        if not st.button("📊 Comparar", disabled=not grilla):
+            return None
+        return {'grilla': grilla}
+    
+    @staticmethod
+    def render_comparison_table(comparacion: Dict[str, Any]):
+        """
+        Render the compared scenarios' metrics next to their difference from a reference
+        
+        Args:
+            comparacion: Output of ScenarioComparator.comparar
+        """
+        referencia = st.selectbox("📌 Escenario de Referencia", comparacion['nombres'])
+        metricas = comparacion['metricas'][list(UIComponents.METRICAS_COMPARACION)]
+        diferencias = ScenarioComparator.diferencias(metricas, referencia)
+        
+        tabla, formatos = {}, {}
+        for metrica, (etiqueta, formato) in UIComponents.METRICAS_COMPARACION.items():
+            tabla[etiqueta] = metricas[metrica]
+            tabla[f"Δ {etiqueta}"] = diferencias[metrica]
+            formatos[etiqueta] = formatos[f"Δ {etiqueta}"] = formato
+        st.dataframe(pd.DataFrame(tabla).style.format(formatos, na_rep="—"), use_container_width=True)
+    
+    @staticmethod
+    def render_goal_seek_section() -> Optional[Dict[str, Any]]:
+        """
+        Render the goal seek tool of the sidebar
+        
+        Returns:
+            Dict with the CashFlowCalculator.resolver_objetivo arguments (other than
+            the scenario parameters) when "Buscar" is clicked, None otherwise
+        """
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("### 🎯 Buscar Objetivo")
+        variable = st.sidebar.selectbox("🔧 Variable a Ajustar", list(UIComponents.VARIABLES_OBJETIVO),
+                                        format_func=lambda v: UIComponents.VARIABLES_OBJETIVO[v][0])
+        metrica = st.sidebar.selectbox("📏 Meta", list(UIComponents.METRICAS_OBJETIVO),
+                                       format_func=UIComponents.METRICAS_OBJETIVO.get)
+        if metrica == 'mes_recuperacion':
+            objetivo = st.sidebar.number_input("🏁 Valor Objetivo (Mes)", value=24, step=1, min_value=0)
+        elif metrica == 'tir':
+            objetivo = st.sidebar.number_input("🏁 Valor Objetivo (%)", value=20.0, step=1.0) / 100
+        else:
+            objetivo = st.sidebar.number_input("🏁 Valor Objetivo (USD)", value=0.0, step=10000.0)
+        
+        _, minimo_defecto, maximo_defecto = UIComponents.VARIABLES_OBJETIVO[variable]
+        col1, col2 = st.sidebar.columns(2)
+        # Keyed on the variable so the range resets to its defaults when the variable changes
+        minimo = col1.number_input("Mínimo", value=minimo_defecto, min_value=0.0, key=f"objetivo_minimo_{variable}")
+        maximo = col2.number_input("Máximo", value=maximo_defecto, min_value=0.0, key=f"objetivo_maximo_{variable}")
+        
+        if not st.sidebar.button("🎯 Buscar", disabled=minimo > maximo):
+            return None
+        
+        return {
+            'variable': variable,
+            'metrica': metrica,
+            'objetivo': objetivo,
+            'minimo': minimo,
+            'maximo': maximo,
+        }
+    
+    @staticmethod
+    def render_goal_seek_result(resultado: Dict[str, Any]):
+        """
+        Render the goal seek result in the sidebar
+        
+        Args:
+            resultado: Output of CashFlowCalculator.resolver_objetivo
+        """
+        etiqueta = UIComponents.VARIABLES_OBJETIVO[resultado['variable']][0]
+        if not resultado['alcanzado']:
+            st.sidebar.warning(f"🎯 Ningún valor de {etiqueta} en el rango alcanza la meta")
+            return
+        
+        if resultado['metrica'] == 'mes_recuperacion':
+            metrica_texto = f"Recuperación en el Mes {resultado['valor_metrica']}"
+        elif resultado['metrica'] == 'tir':
+            metrica_texto = f"TIR Anual: {resultado['valor_metrica']:.2%}"
+        else:
+            nombre_metrica = UIComponents.METRICAS_OBJETIVO[resultado['metrica']].rsplit(" ", 1)[0]
+            metrica_texto = f"{nombre_metrica}: ${resultado['valor_metrica']:,.2f}"
+        decimales = 4 if resultado['variable'] == 'tasa_ventas' else 2
+        st.sidebar.success(f"🎯 **{etiqueta}:** {resultado['valor']:,.{decimales}f}  \n{metrica_texto} "
+                           f"({resultado['evaluaciones']} evaluaciones)")
+    
+    @staticmethod
+    def render_scenario_section(escenarios) -> Dict[str, Any]:
+        """
+        Render the saved scenarios section of the sidebar
+        
+        Args:
+            escenarios: Stored scenarios as returned by ScenarioStore.listar
+            
+        Returns:
+            Dict with the name to save ('guardar') and the scenario id to load ('cargar'),
+            each None unless its button was clicked
+        """
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("### 💾 Escenarios Guardados")
+        nombre = st.sidebar.text_input("📝 Nombre del Escenario", value="").strip()
+        guardar = st.sidebar.button("💾 Guardar Escenario", disabled=not nombre)
+        
+        cargar = None
+        if len(escenarios):
+            etiquetas = {
+                fila.id: f"{fila.nombre} ({fila.creado[:16].replace('T', ' ')})"
+                for fila in escenarios.itertuples()
+            }
+            seleccion = st.sidebar.selectbox("📂 Escenario", list(etiquetas), format_func=etiquetas.get)
+            if st.sidebar.button("📂 Cargar Escenario"):
+                cargar = seleccion
+        
+        return {
+            'guardar': nombre if guardar else None,
+            'cargar': cargar
+        }
+    
+    @staticmethod
+    def render_performance_panel(historial, caches: Dict[str, ResultCache]):
+        """
+        Render the collapsible performance panel: time (and memory, when traced) per
+        span of the last reruns, and the hit rate of each cache
+        
+        Args:
+            historial: Rerun records from PerformanceMonitor, oldest first
+            caches: Display name -> ResultCache
+        """
+        with st.expander("⏱️ Rendimiento", expanded=False):
+            st.caption(f"Últimas {len(historial)} ejecuciones (la más reciente primero); "
+                       "los pasos que faltan se sirvieron desde la caché")
+            spans = list(dict.fromkeys(nombre for registro in historial for nombre in registro['spans']))
+            filas = []
+            for registro in reversed(historial):
+                fila = {
+                    'Hora': time.strftime("%H:%M:%S", time.localtime(registro['hora'])),
+                    'Ejecución': registro['nombre'],
+                    'Total (ms)': registro['total_ms'],
+                }
+                for nombre in spans:
+                    span = registro['spans'].get(nombre)
+                    fila[f"{nombre} (ms)"] = None if span is None else span['ms']
+                    if PerformanceMonitor.MEMORIA:
+                        fila[f"{nombre} (KiB)"] = None if span is None else span['kib']
+                filas.append(fila)
+            tabla = pd.DataFrame(filas)
+            st.dataframe(tabla, hide_index=True, use_container_width=True, column_config={
+                columna: st.column_config.NumberColumn(format="%.1f")
+                for columna in tabla.columns if columna.endswith(("(ms)", "(KiB)"))
+            })
+            
+            filas_caches = []
+            for nombre, cache in caches.items():
+                estadisticas = cache.estadisticas()
+                filas_caches.append({
+                    'Caché': nombre,
+                    'Aciertos': estadisticas['aciertos'],
+                    'Fallos': estadisticas['fallos'],
+                    'Desalojos': estadisticas['desalojos'],
+                    'Entradas': estadisticas['entradas'],
+                    'Tasa de Aciertos': estadisticas['tasa_aciertos'] * 100,
+                })
+            st.dataframe(pd.DataFrame(filas_caches), hide_index=True, use_container_width=True, column_config={
+                'Tasa de Aciertos': st.column_config.NumberColumn(format="%.1f%%"),
+            })
+            if PerformanceMonitor.DIRECTORIO_PERFILES is not None:
+                st.caption(f"Perfil de cada ejecución en `{PerformanceMonitor.DIRECTORIO_PERFILES}`: "
+                           "`.prof` (pstats) y `.tracemalloc` (tracemalloc.Snapshot.load)")